@@ -42,6 +42,10 @@ else:
     print("Full analyzer functionality will be limited without an API key")
     print("Set it using: export GOOGLE_API_KEY=your_api_key")
 
+# Number of Gradio handlers allowed to run at the same time. Handlers resolve
+# a per-user session for each request, so they are safe to run concurrently.
+concurrency_limit = int(os.environ.get("BUJONOW_CONCURRENCY_LIMIT", "16"))
+
 # Create required directories
 for directory in ["journals", "uploads", "visualizations", "users"]:
     os.makedirs(directory, exist_ok=True)
@@ -238,6 +242,7 @@ if __name__ == "__main__":
             app = create_simple_interface()
         
         print("Launching application...")
+        app.queue(default_concurrency_limit=concurrency_limit)
         app.launch(share=False, server_name="0.0.0.0", server_port=7860)
     except Exception as e:
         print(f"Critical error launching application: {e}")
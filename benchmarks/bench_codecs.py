@@ -0,0 +1,76 @@
+"""
+Storage Codec Benchmark
+
+Measures write and read throughput (entries per second) and bytes on disk for
+each available entry codec, using realistic entries with a chat history.
+
+Usage:
+    python benchmarks/bench_codecs.py [--entries 2000] [--chat 10]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add the project root to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.utils import serialization
+from src.utils.serialization import available_formats, get_codec, read_file
+
+def make_entry(day: datetime, chat_messages: int) -> dict:
+    """Build an entry shaped like the ones JournalManager writes"""
+    return {
+        "date": day.strftime("%Y-%m-%d"),
+        "timestamp": day.isoformat(),
+        "category": "daily",
+        "content": {
+            "text": "Went for a long walk and thought about the week ahead. Café later. " * 8,
+            "tasks": [{"text": f"task {i}", "status": "pending", "created_at": day.isoformat()} for i in range(3)],
+            "goals": [{"text": "read more", "progress": 0}],
+            "tags": ["walk", "reflection"],
+            "chat_history": [{"user": f"question {i}", "assistant": "A thoughtful answer. " * 10,
+                              "timestamp": day.isoformat()} for i in range(chat_messages)],
+            "ai_summary": []
+        },
+        "emotion_analysis": {"primary_emotion": "content", "emotion_intensity": 6,
+                             "themes": ["rest", "planning"], "suggested_actions": ["keep walking"]},
+        "metadata": {"last_modified": day.isoformat(), "word_count": 96, "has_chat_history": True}
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=2000)
+    parser.add_argument("--chat", type=int, default=10, help="Chat messages per entry")
+    args = parser.parse_args()
+
+    start = datetime(2020, 1, 1)
+    entries = [make_entry(start + timedelta(days=i), args.chat) for i in range(args.entries)]
+    print(f"orjson: {'yes' if serialization.orjson else 'no'}, msgpack: {'yes' if serialization.msgpack else 'no'}")
+    print(f"{'format':>12} {'write/s':>10} {'read/s':>10} {'bytes/entry':>12}")
+
+    for name in available_formats():
+        codec = get_codec(name)
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = [os.path.join(tmp, f"{entry['date']}.json") for entry in entries]
+
+            t0 = time.perf_counter()
+            for path, entry in zip(paths, entries):
+                with open(path, 'wb') as f:
+                    f.write(codec.encode(entry))
+            write_s = time.perf_counter() - t0
+
+            t0 = time.perf_counter()
+            for path in paths:
+                read_file(path)
+            read_s = time.perf_counter() - t0
+
+            total = sum(os.path.getsize(path) for path in paths)
+            print(f"{name:>12} {len(paths) / write_s:>10.0f} {len(paths) / read_s:>10.0f} {total / len(paths):>12.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Range Query Benchmark
+
+Measures the cost of a 7-day search_entries call as the journal history grows
+from 1 to 10 years, comparing a full directory walk (the original behaviour),
+month-directory pruning without the index, and the per-month index.
+
+Usage:
+    python benchmarks/bench_range_query.py [--years 1 2 5 10] [--repeat 20]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add the project root to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.journal_manager import JournalManager
+
+def build_history(journal_dir: str, years: int, end: datetime) -> int:
+    """Write one small entry per day for the given number of years"""
+    day = end - timedelta(days=365 * years - 1)
+    count = 0
+    while day <= end:
+        month_dir = os.path.join(journal_dir, day.strftime("%Y-%m"))
+        os.makedirs(month_dir, exist_ok=True)
+        entry = {
+            "date": day.strftime("%Y-%m-%d"),
+            "timestamp": day.isoformat(),
+            "category": "daily",
+            "content": {"text": "A day of journaling. " * 20, "tasks": [], "goals": [],
+                        "tags": ["daily"], "chat_history": [], "ai_summary": []},
+            "emotion_analysis": {"primary_emotion": "content", "emotion_intensity": 5},
+            "metadata": {"last_modified": day.isoformat(), "word_count": 80}
+        }
+        with open(os.path.join(month_dir, f"{entry['date']}.json"), 'w', encoding='utf-8') as f:
+            json.dump(entry, f, indent=2)
+        day += timedelta(days=1)
+        count += 1
+    return count
+
+def full_walk_search(journal_dir: str, start: datetime, end: datetime) -> list:
+    """The original search_entries: parse every file, then filter"""
+    entries = []
+    for root, _, files in os.walk(journal_dir):
+        for name in files:
+            if not name.endswith('.json') or name.startswith('_'):
+                continue
+            with open(os.path.join(root, name), 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            if start <= datetime.strptime(entry['date'], '%Y-%m-%d') <= end:
+                entries.append(entry)
+    return sorted(entries, key=lambda x: x['date'])
+
+def timed(fn, repeat: int) -> float:
+    """Average wall time of fn() in milliseconds"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) * 1000 / repeat
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--years", type=int, nargs="+", default=[1, 2, 5, 10])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    end = datetime(2025, 6, 30)
+    start = end - timedelta(days=6)
+
+    print(f"{'years':>5} {'entries':>8} {'full walk ms':>13} {'pruned ms':>10} {'indexed ms':>11}")
+    for years in args.years:
+        with tempfile.TemporaryDirectory() as tmp:
+            journal_dir = os.path.join(tmp, "journals")
+            count = build_history(journal_dir, years, end)
+
+            pruned = JournalManager(journal_dir, use_index=False)
+            indexed = JournalManager(journal_dir)
+            indexed.rebuild_index()
+
+            expected = len(full_walk_search(journal_dir, start, end))
+            assert len(pruned.search_entries(start, end)) == expected
+            assert len(indexed.search_entries(start, end)) == expected
+
+            walk_ms = timed(lambda: full_walk_search(journal_dir, start, end), max(1, args.repeat // 10))
+            pruned_ms = timed(lambda: pruned.search_entries(start, end), args.repeat)
+            indexed_ms = timed(lambda: indexed.search_entries(start, end), args.repeat)
+            print(f"{years:>5} {count:>8} {walk_ms:>13.2f} {pruned_ms:>10.2f} {indexed_ms:>11.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Full-Text Search Benchmark
+
+Measures JournalManager.search_text as the journal history grows, for a
+ranked term query and a phrase query, against the naive alternative of
+loading every entry and scanning its text for a substring.
+
+Usage:
+    python benchmarks/bench_text_search.py [--years 1 5 10] [--repeat 20]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add the project root to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.journal_manager import JournalManager
+
+WORDS = ("walk run coffee work meeting family friend river morning evening tired happy calm "
+         "anxious project deadline garden book music rain sun dinner sleep training race").split()
+
+def build_history(manager: JournalManager, years: int, end: datetime) -> int:
+    """Create one entry of random text per day for the given number of years"""
+    rng = random.Random(years)
+    day = end - timedelta(days=365 * years - 1)
+    count = 0
+    while day <= end:
+        text = " ".join(rng.choice(WORDS) for _ in range(150))
+        manager.create_entry(text, {"primary_emotion": "calm", "emotion_intensity": 5}, date=day)
+        day += timedelta(days=1)
+        count += 1
+    return count
+
+def substring_scan(manager: JournalManager, needle: str) -> list:
+    """The alternative without an index: load everything and scan"""
+    return [entry for entry in manager.get_all_entries() if needle in entry["content"]["text"].lower()]
+
+def timed(fn, repeat: int) -> float:
+    """Average wall time of fn() in milliseconds"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) * 1000 / repeat
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--years", type=int, nargs="+", default=[1, 5, 10])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    end = datetime(2025, 6, 30)
+    print(f"{'years':>5} {'entries':>8} {'scan ms':>9} {'cold ms':>9} {'terms ms':>9} {'phrase ms':>10}")
+    for years in args.years:
+        with tempfile.TemporaryDirectory() as tmp:
+            journal_dir = os.path.join(tmp, "journals")
+            count = build_history(JournalManager(journal_dir), years, end)
+
+            manager = JournalManager(journal_dir)
+            cold_ms = timed(lambda: manager.text_index.search("river garden"), 1)
+            scan_ms = timed(lambda: substring_scan(manager, "river garden"), 1)
+            terms_ms = timed(lambda: manager.text_index.search("river garden", limit=20), args.repeat)
+            phrase_ms = timed(lambda: manager.text_index.search('"morning coffee"', limit=20), args.repeat)
+            print(f"{years:>5} {count:>8} {scan_ms:>9.1f} {cold_ms:>9.1f} {terms_ms:>9.2f} {phrase_ms:>10.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+RAG Retrieval Benchmark
+
+Measures top-k document retrieval as the knowledge base grows, comparing
+VectorIndex (one matrix-vector product over pre-normalized float32 rows plus
+argpartition) with the previous approach of converting each stored embedding
+to an array, computing its norm and sorting all scores on every query.
+
+Usage:
+    python benchmarks/bench_vector_search.py [--docs 10000 100000] [--dimensions 768] [--repeat 20]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add the project root to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.vector_index import VectorIndex
+
+def loop_top_k(documents: list, query: list, top_k: int) -> list:
+    """The previous get_top_context scoring loop"""
+    query_np = np.array(query)
+    similarities = []
+    for i, doc in enumerate(documents):
+        doc_embedding = np.array(doc["embedding"])
+        similarity = np.dot(query_np, doc_embedding) / (np.linalg.norm(query_np) * np.linalg.norm(doc_embedding))
+        similarities.append((i, similarity))
+    similarities.sort(key=lambda x: x[1], reverse=True)
+    return similarities[:top_k]
+
+def timed(fn, repeat: int) -> float:
+    """Average wall time of fn() in milliseconds"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) * 1000 / repeat
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--dimensions", type=int, default=768)
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'docs':>8} {'build ms':>9} {'loop ms':>9} {'index ms':>9} {'speedup':>8}")
+    for count in args.docs:
+        vectors = rng.standard_normal((count, args.dimensions), dtype=np.float32)
+        documents = [{"content": f"doc {i}", "embedding": vectors[i].tolist()} for i in range(count)]
+        query = rng.standard_normal(args.dimensions, dtype=np.float32).tolist()
+
+        start = time.perf_counter()
+        index = VectorIndex(vectors, documents)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        expected = [i for i, _ in loop_top_k(documents, query, args.top_k)]
+        found = [doc["content"] for doc, _ in index.search(query, args.top_k)]
+        assert found == [f"doc {i}" for i in expected], "VectorIndex and the loop disagree"
+
+        loop_ms = timed(lambda: loop_top_k(documents, query, args.top_k), max(1, args.repeat // 10))
+        index_ms = timed(lambda: index.search(query, args.top_k), args.repeat)
+        print(f"{count:>8} {build_ms:>9.1f} {loop_ms:>9.1f} {index_ms:>9.2f} {loop_ms / index_ms:>7.0f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Knowledge Base Embedding Build
+
+Embeds the documents of the analyzer's knowledge base directory into the
+on-disk embedding cache, so app processes start without calling the
+embedding API and share the cached matrix through the page cache. Documents
+that are already cached are skipped, so run it again after editing the
+knowledge base (the app does the same on startup, but only for the process
+that gets there first).
+
+Requires GOOGLE_API_KEY.
+
+Usage:
+    python scripts/build_knowledge_base.py [--knowledge-dir knowledge] [--batch-size 100] [--concurrency 4]
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+# Add the project root to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import google.generativeai as genai
+
+from src.analyzer import EMBED_BATCH_SIZE, EMBED_CONCURRENCY, EmbeddingClient
+from src.knowledge_base import KNOWLEDGE_DIR, KnowledgeBase
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--knowledge-dir", default=KNOWLEDGE_DIR, help="Directory holding the knowledge base documents")
+    parser.add_argument("--batch-size", type=int, default=EMBED_BATCH_SIZE, help="Documents per embedding request")
+    parser.add_argument("--concurrency", type=int, default=EMBED_CONCURRENCY, help="Embedding requests in flight")
+    args = parser.parse_args()
+
+    api_key = os.environ.get("GOOGLE_API_KEY")
+    if not api_key:
+        sys.exit("Please set the GOOGLE_API_KEY environment variable.")
+    genai.configure(api_key=api_key)
+
+    knowledge_base = KnowledgeBase(args.knowledge_dir)
+    client = EmbeddingClient(batch_size=args.batch_size, concurrency=args.concurrency)
+    start = time.perf_counter()
+    index = knowledge_base.vector_index(client.model, client.embed)
+    elapsed = time.perf_counter() - start
+
+    embedded = len(index) if index is not None else 0
+    print(f"{embedded} of {len(knowledge_base)} documents embedded in {knowledge_base.cache_dir} ({elapsed:.1f}s)")
+    if embedded < len(knowledge_base):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Journal Export / Import
+
+Exports every user's journal to one NDJSON file per user (optionally gzip or
+zstd compressed), or imports such files back, e.g. to move users between
+nodes or to restore a backup. Users are processed in parallel worker
+processes and throughput is reported in entries per second.
+
+Usage:
+    python scripts/journal_transfer.py export backups/ [--users-dir users] [--compression gzip] [--workers 4]
+    python scripts/journal_transfer.py import backups/ [--users-dir users] [--workers 4]
+"""
+
+import argparse
+import os
+import sys
+import time
+from multiprocessing import Pool
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+# Add the project root to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.journal_manager import create_journal_manager
+from src.utils.file_io import COMPRESSIONS
+from src.utils.user_paths import iter_user_dirs, user_dir
+
+EXTENSIONS = {None: ".ndjson", "gzip": ".ndjson.gz", "zstd": ".ndjson.zst"}
+
+def export_user(job: Tuple[str, str, str, Optional[str]]) -> Tuple[str, int, float]:
+    """Export one user's journal; returns (user ID, entries, seconds)"""
+    journal_dir, user_id, out_dir, compression = job
+    start = time.perf_counter()
+    manager = create_journal_manager(journal_dir)
+    count = manager.export_stream(os.path.join(out_dir, user_id + EXTENSIONS[compression]), compression)
+    return user_id, count, time.perf_counter() - start
+
+def import_user(job: Tuple[str, str, str]) -> Tuple[str, int, float]:
+    """Import one user's journal; returns (user ID, entries, seconds)"""
+    journal_dir, user_id, path = job
+    start = time.perf_counter()
+    manager = create_journal_manager(journal_dir)
+    count = manager.import_stream(path)
+    return user_id, count, time.perf_counter() - start
+
+def export_jobs(args) -> List[Tuple]:
+    """One job per user that has a journal directory"""
+    jobs = []
+    for user_id, path in iter_user_dirs(args.users_dir):
+        journal_dir = os.path.join(path, args.journals_dir)
+        if os.path.isdir(journal_dir):
+            jobs.append((journal_dir, user_id, args.path, args.compression))
+    return jobs
+
+def import_jobs(args) -> List[Tuple]:
+    """One job per export file found in the input directory"""
+    jobs = []
+    for name in sorted(os.listdir(args.path)):
+        for extension in sorted(EXTENSIONS.values(), key=len, reverse=True):
+            if name.endswith(extension):
+                user_id = name[:-len(extension)]
+                journal_dir = os.path.join(user_dir(user_id, args.users_dir), args.journals_dir)
+                jobs.append((journal_dir, user_id, os.path.join(args.path, name)))
+                break
+    return jobs
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["export", "import"])
+    parser.add_argument("path", help="Directory to write export files to, or to read them from")
+    parser.add_argument("--users-dir", default="users", help="Directory holding the user folders")
+    parser.add_argument("--journals-dir", default="journals", help="Journal directory name inside each user folder")
+    parser.add_argument("--compression", choices=COMPRESSIONS, default=None, help="Compression for exports")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Parallel worker processes")
+    args = parser.parse_args()
+
+    if args.command == "export":
+        os.makedirs(args.path, exist_ok=True)
+        jobs, worker = export_jobs(args), export_user
+    else:
+        jobs, worker = import_jobs(args), import_user
+
+    start = time.perf_counter()
+    total = 0
+    with Pool(max(1, min(args.workers, len(jobs) or 1))) as pool:
+        for user_id, count, seconds in pool.imap_unordered(worker, jobs):
+            total += count
+            rate = count / seconds if seconds > 0 else 0
+            print(f"{args.command}ed {count} entries for {user_id} ({rate:.0f} entries/s)")
+    elapsed = time.perf_counter() - start
+    rate = total / elapsed if elapsed > 0 else 0
+    print(f"{args.command}ed {total} entries for {len(jobs)} users in {elapsed:.2f}s ({rate:.0f} entries/s)")
+
+if __name__ == "__main__":
+    main()
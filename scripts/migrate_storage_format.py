@@ -0,0 +1,65 @@
+"""
+Storage Format Migration
+
+Rewrites journal entries and user data files with another codec, e.g. to
+convert a tree of indented JSON files to compact JSON or MessagePack. Files
+already in the target format are skipped, so the command can be re-run
+safely, and the app reads mixed trees while a migration is in progress.
+
+Usage:
+    python scripts/migrate_storage_format.py --format json [--users-dir users] [--journals-dir journals]
+"""
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+# Add the project root to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.journal_manager import JournalManager
+from src.utils.file_io import atomic_write
+from src.utils.serialization import available_formats, decode, get_codec
+from src.utils.user_paths import iter_user_dirs
+
+def migrate_file(path: str, codec) -> bool:
+    """Rewrite one stored file with a codec; returns True if it changed"""
+    with open(path, 'rb') as f:
+        raw = f.read()
+    data = codec.encode(decode(raw))
+    if data == raw:
+        return False
+    atomic_write(path, data)
+    return True
+
+def migrate_journal(journal_dir: str, storage_format: str) -> int:
+    """Rewrite the entries of one journal directory"""
+    if not os.path.isdir(journal_dir):
+        return 0
+    return JournalManager(journal_dir, storage_format=storage_format).migrate_format()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--format", required=True, choices=available_formats(), help="Target storage format")
+    parser.add_argument("--users-dir", default="users", help="Directory holding the user folders")
+    parser.add_argument("--journals-dir", default="journals", help="Journal directory name inside each user folder")
+    args = parser.parse_args()
+
+    codec = get_codec(args.format)
+    entries = migrate_journal(args.journals_dir, args.format)
+    users = 0
+
+    for _, user_dir in iter_user_dirs(args.users_dir):
+        user_data_path = os.path.join(user_dir, "user_data.json")
+        if os.path.exists(user_data_path):
+            try:
+                users += migrate_file(user_data_path, codec)
+            except Exception as e:
+                print(f"Error migrating {user_data_path}: {str(e)}")
+        entries += migrate_journal(os.path.join(user_dir, args.journals_dir), args.format)
+
+    print(f"Rewrote {entries} entries and {users} user data files as {args.format}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+"""
+User Directory Layout Migration
+
+Moves user directories from the flat layout (users/<id>) to the hashed
+two-level layout (users/ab/cd/<id>). Each directory is moved with a single
+rename, already migrated users are skipped, and the app finds users in
+either layout, so the command can be re-run safely. Stop the app while it
+runs: running processes keep the directories they already resolved.
+
+Usage:
+    python scripts/migrate_user_layout.py [--users-dir users]
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Add the project root to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.utils.user_paths import iter_user_dirs, migrate_user_dirs
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users-dir", default="users", help="Directory holding the user folders")
+    args = parser.parse_args()
+
+    moved = migrate_user_dirs(args.users_dir)
+    total = sum(1 for _ in iter_user_dirs(args.users_dir))
+    print(f"Moved {moved} user directories to the hashed layout ({total} users in total)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Cold Month Packing
+
+Packs the months of every user's journal that ended more than --days days ago
+into one compressed pack file per month, replacing the individual day files
+and chat logs. Packed entries are still read one at a time by the app, and
+entries saved to a packed month later are repacked on the next run, so the
+command can be scheduled (e.g. nightly with cron).
+
+Usage:
+    python scripts/pack_cold_months.py [--days 90] [--users-dir users] [--journals-dir journals]
+"""
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+# Add the project root to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.journal_manager import PACK_AFTER_DAYS, JournalManager
+from src.utils.user_paths import iter_user_dirs
+
+def directory_size(path: str) -> int:
+    """Total size of the files under a directory, counting whole 4 KiB blocks"""
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += -(-os.path.getsize(os.path.join(root, name)) // 4096) * 4096
+            except OSError:
+                pass
+    return total
+
+def pack_journal(journal_dir: str, days: int) -> int:
+    """Pack the cold months of one journal directory"""
+    if not os.path.isdir(journal_dir):
+        return 0
+    return JournalManager(journal_dir).pack_cold_months(days)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=PACK_AFTER_DAYS, help="Pack months that ended more than this many days ago")
+    parser.add_argument("--users-dir", default="users", help="Directory holding the user folders")
+    parser.add_argument("--journals-dir", default="journals", help="Journal directory name inside each user folder")
+    args = parser.parse_args()
+
+    journal_dirs = [args.journals_dir]
+    journal_dirs += [os.path.join(path, args.journals_dir) for _, path in iter_user_dirs(args.users_dir)]
+
+    before = after = entries = 0
+    for journal_dir in journal_dirs:
+        if not os.path.isdir(journal_dir):
+            continue
+        before += directory_size(journal_dir)
+        try:
+            entries += pack_journal(journal_dir, args.days)
+        except Exception as e:
+            print(f"Error packing {journal_dir}: {str(e)}")
+        after += directory_size(journal_dir)
+
+    print(f"Packed {entries} entries; journals use {after / 1024:.0f} KiB (was {before / 1024:.0f} KiB)")
+
+if __name__ == "__main__":
+    main()
@@ -9,6 +9,7 @@ import os
 import time
 import typing
 import random
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Any, Optional, Tuple
 
 try:
@@ -18,18 +19,12 @@ try:
 except ImportError:
     print("Warning: Some dependencies not available - analyzer will use fallback mode")
 
-# Load RAG documents if helper_functions is available
+from src.knowledge_base import shared_knowledge_base
+
 try:
-    from src.utils.helper_functions import RAG_DOCUMENTS
+    from src.local_embeddings import LocalEmbeddingClient
 except ImportError:
-    # Create a basic fallback for RAG
-    RAG_DOCUMENTS = [
-        {"title": "Self-care", "content": "Self-care is crucial for mental health. Consider daily practices like meditation, adequate sleep, and physical activity."},
-        {"title": "Journaling benefits", "content": "Regular journaling helps process emotions, track patterns in your thinking, and provides an outlet for stress."},
-        {"title": "Emotional regulation", "content": "Naming emotions can help regulate them. Try identifying specific feelings rather than general states like 'bad' or 'good'."},
-        {"title": "Mindfulness", "content": "Mindfulness involves paying attention to the present moment without judgment. It can reduce anxiety and improve focus."},
-        {"title": "Goal setting", "content": "Effective goals are specific, measurable, achievable, relevant, and time-bound (SMART)."}
-    ]
+    LocalEmbeddingClient = None
 
 # Default context to use when embeddings aren't available
 DEFAULT_CONTEXT = """
@@ -40,6 +35,135 @@ Getting adequate sleep is crucial for emotional regulation and mental clarity.
 Gratitude practices have been linked to increased happiness. Try listing 3 things you're grateful for each day.
 """
 
+# Model used for RAG document and query embeddings
+EMBEDDING_MODEL = "models/embedding-001"
+# "gemini", "local", or "auto" (Gemini, with local embeddings when it is unavailable)
+EMBEDDING_PROVIDER = os.environ.get("BUJONOW_EMBEDDING_PROVIDER", "auto").lower()
+# Seconds queries use local embeddings after a Gemini query embedding failed
+REMOTE_RETRY_SECONDS = 60
+# Texts sent in one embed_content request
+EMBED_BATCH_SIZE = int(os.environ.get("BUJONOW_EMBED_BATCH_SIZE", "100"))
+# embed_content requests in flight at the same time
+EMBED_CONCURRENCY = int(os.environ.get("BUJONOW_EMBED_CONCURRENCY", "4"))
+
+def _extract_embeddings(result, count: int) -> Optional[List[List[float]]]:
+    """
+    Get the embedding values from an embed_content result, whichever format it has
+
+    Args:
+        result: The embed_content result
+        count: Number of texts that were embedded
+
+    Returns:
+        One vector per text, or None if the result does not hold count vectors
+    """
+    if isinstance(result, dict):
+        values = result.get("embedding", result.get("embeddings"))
+    elif hasattr(result, 'embedding'):
+        # New API format
+        values = result.embedding
+    elif hasattr(result, 'embeddings'):
+        # Alternative format
+        values = result.embeddings
+    else:
+        return None
+    if values is None or not len(values):
+        return None
+    # A single text comes back as a flat vector, a batch as a list of vectors
+    if isinstance(values[0], (int, float)):
+        values = [values]
+    values = [getattr(value, 'values', value) for value in values]
+    return list(values) if len(values) == count else None
+
+class EmbeddingClient:
+    """Embeds texts with the Gemini embedding API, many texts per request"""
+
+    def __init__(self,
+                 model: str = EMBEDDING_MODEL,
+                 batch_size: int = EMBED_BATCH_SIZE,
+                 concurrency: int = EMBED_CONCURRENCY,
+                 max_retries: int = 3,
+                 retry_delay: float = 1.0):
+        """
+        Initialize the client
+
+        Args:
+            model: Embedding model name
+            batch_size: Texts sent in one request
+            concurrency: Requests in flight at the same time
+            max_retries: Retries of a failed request before its batch is split
+            retry_delay: Seconds before the first retry (doubled on each retry)
+        """
+        self.model = model
+        self.batch_size = max(1, batch_size)
+        self.concurrency = max(1, concurrency)
+        self.max_retries = max(0, max_retries)
+        self.retry_delay = retry_delay
+
+    def _request(self, texts: List[str], task_type: str, retries: Optional[int] = None) -> Optional[List[List[float]]]:
+        """Send one embed_content request, retrying errors and malformed results"""
+        retries = self.max_retries if retries is None else retries
+        for attempt in range(retries + 1):
+            if attempt:
+                time.sleep(self.retry_delay * 2 ** (attempt - 1))
+            try:
+                result = genai.embed_content(
+                    model=self.model,
+                    content=texts if len(texts) > 1 else texts[0],
+                    task_type=task_type
+                )
+            except Exception as e:
+                print(f"Error embedding {len(texts)} texts (attempt {attempt + 1}): {e}")
+                continue
+            embeddings = _extract_embeddings(result, len(texts))
+            if embeddings is not None:
+                return embeddings
+            print("Warning: Embedding result doesn't have expected structure")
+        return None
+
+    def _embed_batch(self, texts: List[str], task_type: str) -> List[Optional[List[float]]]:
+        """
+        Embed one batch, splitting it when the request keeps failing
+
+        A batch that fails after every retry is halved and each half is sent
+        on its own, so one bad text only costs its own embedding.
+        """
+        embeddings = self._request(texts, task_type)
+        if embeddings is not None:
+            return embeddings
+        if len(texts) == 1:
+            return [None]
+        middle = len(texts) // 2
+        return self._embed_batch(texts[:middle], task_type) + self._embed_batch(texts[middle:], task_type)
+
+    def embed(self, texts: List[str], task_type: str = "retrieval_document") -> List[Optional[List[float]]]:
+        """
+        Embed texts in batches, sending several batches concurrently
+
+        Args:
+            texts: Texts to embed
+            task_type: Embedding task ("retrieval_document" or "retrieval_query")
+
+        Returns:
+            One embedding per text, None where embedding failed
+        """
+        batches = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+        if len(batches) <= 1 or self.concurrency == 1:
+            results = [self._embed_batch(batch, task_type) for batch in batches]
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.concurrency, len(batches))) as executor:
+                results = list(executor.map(lambda batch: self._embed_batch(batch, task_type), batches))
+        return [embedding for batch in results for embedding in batch]
+
+    def embed_one(self, text: str, task_type: str = "retrieval_query") -> Optional[List[float]]:
+        """
+        Embed a single text (by default as a search query)
+
+        Queries are on the request path, so a failure is not retried.
+        """
+        embeddings = self._request([text], task_type, retries=0)
+        return embeddings[0] if embeddings else None
+
 class JournalAnalysis(typing.TypedDict):
     emotion: str
     themes: List[str]
@@ -47,8 +171,14 @@ class JournalAnalysis(typing.TypedDict):
     affirmation: str
 
 class Analyzer:
-    def __init__(self, api_key: Optional[str] = None):
-        """Initialize the analyzer with optional API key"""
+    def __init__(self, api_key: Optional[str] = None, embedding_provider: Optional[str] = None):
+        """
+        Initialize the analyzer with optional API key
+        
+        Args:
+            api_key: Google API key (defaults to GOOGLE_API_KEY)
+            embedding_provider: "gemini", "local" or "auto" (defaults to BUJONOW_EMBEDDING_PROVIDER)
+        """
         # Use provided API key or try to get from environment variable
         if api_key is None:
             api_key = os.environ.get("GOOGLE_API_KEY")
@@ -56,18 +186,32 @@ class Analyzer:
         # Store the API key directly
         self.api_key = api_key
         self.model_name = "gemini-2.0-flash"  # Default model name - using a free tier model
+        self.knowledge_base = shared_knowledge_base()
+        self.embedding_provider = (embedding_provider or EMBEDDING_PROVIDER).lower()
+        self.local_embedding_client = None
+        self.local_rag_index = None
+        self._remote_failed_at = 0.0
+        self.embedding_client = None
+        self.rag_index = None
+        
+        if self.embedding_provider == "local":
+            # Retrieve with local embeddings only, with or without an API key
+            self.embedding_client, self.rag_index = self._local_retrieval() or (None, None)
         
         if not api_key:
             print("Please set the GOOGLE_API_KEY environment variable or provide it as a parameter.")
             # Initialize without API functionality for now
             self.client = None
-            self.rag_embeddings = None
             return
 
         # Configure the Google Generative AI client
         genai.configure(api_key=api_key)
         self.client = genai
         
+        if self.embedding_provider == "local":
+            return
+        self.embedding_client = EmbeddingClient() if hasattr(genai, 'embed_content') else None
+        
         # Try to initialize embeddings with proper error handling
         try:
             # Check if embed_content function is available
@@ -76,136 +220,109 @@ class Analyzer:
                 self._initialize_embeddings()
             else:
                 print("Warning: google.generativeai does not have embed_content function. Embeddings will be disabled.")
-                self.rag_embeddings = None
+                self.rag_index = None
         except Exception as e:
             print(f"Error initializing embeddings: {e}")
-            self.rag_embeddings = None
+            self.rag_index = None
     
     def _initialize_embeddings(self):
-        """Initialize RAG document embeddings using embed_content"""
+        """
+        Initialize RAG document embeddings using embed_content
+
+        Embeddings of the knowledge base are read from the on-disk cache (see
+        KnowledgeBase.vector_index), so only documents that are new or changed
+        since the last run are sent to the embedding API.
+        """
         try:
             # Initialize embeddings for RAG documents
-            if not RAG_DOCUMENTS:
+            if not len(self.knowledge_base):
                 print("No RAG documents available for embedding")
-                self.rag_embeddings = None
+                self.rag_index = None
                 return
             
             print("Initializing embeddings for RAG documents")
+            self.rag_index = self.knowledge_base.vector_index(self.embedding_client.model, self.embed_texts)
             
-            # Create embeddings for all RAG documents
-            embeddings = []
-            
-            # First, try to see what embedding models are available
-            try:
-                print("Checking available embedding models...")
-                embedding_model = "models/embedding-001"
-                
-                # Use a fixed embedding model for now since we know it's common
-                print(f"Using embedding model: {embedding_model}")
-                
-                # Test with a simple embedding to check the response format
-                test_result = genai.embed_content(
-                    model=embedding_model,
-                    content="Test content",
-                    task_type="retrieval_document"
-                )
-                
-                # Log the structure of the response
-                print(f"Embedding result type: {type(test_result)}")
-                print(f"Embedding result dir: {dir(test_result)}")
-                
-                # Try to extract the embedding values differently
-                if hasattr(test_result, 'embedding'):
-                    print("Embedding result has 'embedding' attribute")
-                    print(f"Embedding type: {type(test_result.embedding)}")
-                    print(f"Embedding length: {len(test_result.embedding) if hasattr(test_result.embedding, '__len__') else 'unknown'}")
-                elif hasattr(test_result, 'embeddings'):
-                    print("Embedding result has 'embeddings' attribute")
-                    print(f"Embeddings type: {type(test_result.embeddings)}")
-                    print(f"Embeddings length: {len(test_result.embeddings) if hasattr(test_result.embeddings, '__len__') else 'unknown'}")
-                else:
-                    print("WARNING: Embedding result doesn't have expected attributes")
-                    print(f"Available attributes: {dir(test_result)}")
-            except Exception as e:
-                print(f"Error testing embedding model: {e}")
-                self.rag_embeddings = None
-                return
-            
-            # If we reach here, try to process all documents
-            for doc in RAG_DOCUMENTS:
-                try:
-                    # Handle both string and dictionary formats
-                    doc_content = doc
-                    doc_title = ""
-                    
-                    # Check if doc is a dictionary with content key
-                    if isinstance(doc, dict) and "content" in doc:
-                        doc_content = doc["content"]
-                        doc_title = doc.get("title", "")
-                    
-                    # Use the embed_content function from the latest library
-                    result = genai.embed_content(
-                        model=embedding_model,
-                        content=doc_content,
-                        task_type="retrieval_document"
-                    )
-                    
-                    # Extract the embedding values - try different approaches
-                    embedding = None
-                    
-                    if hasattr(result, 'embedding'):
-                        # New API format
-                        embedding = result.embedding
-                    elif hasattr(result, 'embeddings') and result.embeddings:
-                        # Alternative format
-                        embedding = result.embeddings[0] if isinstance(result.embeddings, list) else result.embeddings
-                    
-                    # Only add if we successfully got an embedding
-                    if embedding is not None:
-                        embeddings.append({
-                            "content": doc_content,
-                            "title": doc_title,
-                            "embedding": embedding
-                        })
-                    else:
-                        print("Warning: Embedding result doesn't have expected structure")
-                except Exception as e:
-                    print(f"Error embedding document: {e}")
-            
-            if not embeddings:
+            if self.rag_index is None:
                 print("Failed to create any valid embeddings")
-                self.rag_embeddings = None
                 return
             
-            # Store the embeddings
-            self.rag_embeddings = embeddings
-            print(f"Successfully initialized {len(embeddings)} document embeddings")
+            print(f"Successfully initialized {len(self.rag_index)} document embeddings")
             
         except Exception as e:
             print(f"Error initializing embeddings: {e}")
-            self.rag_embeddings = None
+            self.rag_index = None
+    
+    def embed_texts(self, texts: List[str], task_type: str = "retrieval_document") -> List[Optional[List[float]]]:
+        """
+        Embed many texts (e.g. journal entries) with batched requests
+        
+        Args:
+            texts: Texts to embed
+            task_type: Embedding task ("retrieval_document" or "retrieval_query")
+            
+        Returns:
+            One embedding per text, None where embedding failed (or for every
+            text when the API is not available)
+        """
+        if self.embedding_client is None:
+            return [None] * len(texts)
+        return self.embedding_client.embed(texts, task_type)
+    
+    def embed_entries(self, entries: List[Dict]) -> Dict[str, List[float]]:
+        """
+        Embed journal entries in bulk
+        
+        Args:
+            entries: Journal entries (as returned by JournalManager)
+            
+        Returns:
+            Embedding by entry date, for the entries with text that could be embedded
+        """
+        texts = {}
+        for entry in entries:
+            text = (entry.get("content") or {}).get("text")
+            if text and entry.get("date"):
+                texts[entry["date"]] = text
+        dates = list(texts)
+        vectors = self.embed_texts([texts[date] for date in dates])
+        return {date: vector for date, vector in zip(dates, vectors) if vector is not None}
+    
+    def _local_retrieval(self) -> Optional[Tuple[Any, Any]]:
+        """
+        Get the local embedding client and its index over the knowledge base,
+        loading (or fitting) them on first use
+        
+        Returns:
+            (LocalEmbeddingClient, VectorIndex), or None if local embeddings
+            are not available
+        """
+        if self.local_rag_index is None and LocalEmbeddingClient is not None and len(self.knowledge_base):
+            try:
+                texts = [doc["content"] for doc in self.knowledge_base.documents]
+                client = LocalEmbeddingClient.load_or_fit(texts, self.knowledge_base.cache_dir)
+                index = self.knowledge_base.vector_index(client.model, client.embed)
+                if index is not None:
+                    self.local_embedding_client, self.local_rag_index = client, index
+            except Exception as e:
+                print(f"Error initializing local embeddings: {e}")
+        if self.local_rag_index is None:
+            return None
+        return self.local_embedding_client, self.local_rag_index
     
     def _get_random_contexts(self, top_k: int = 3) -> str:
         """Get random contexts when embeddings fail"""
-        if not RAG_DOCUMENTS:
+        documents = self.knowledge_base.documents
+        if not documents:
             return DEFAULT_CONTEXT
             
-        import random
         # Select random documents
-        selected_indices = random.sample(range(len(RAG_DOCUMENTS)), min(top_k, len(RAG_DOCUMENTS)))
-        
         selected_docs = []
-        for idx in selected_indices:
-            doc = RAG_DOCUMENTS[idx]
-            if isinstance(doc, dict) and "content" in doc:
-                content = doc["content"]
-                title = doc.get("title", "")
-                if title:
-                    selected_docs.append(f"{title}: {content}")
-                else:
-                    selected_docs.append(content)
+        for doc in random.sample(documents, min(top_k, len(documents))):
+            if doc["title"]:
+                selected_docs.append(f"{doc['title']}: {doc['content']}")
             else:
-                selected_docs.append(doc)  # Handle string format
+                selected_docs.append(doc["content"])
                 
         return "\n\n".join(selected_docs)
     
@@ -220,50 +337,35 @@ class Analyzer:
         Returns:
             String with the top matching documents joined together
         """
-        # Fall back to default or random contexts if no embeddings or input
-        if self.rag_embeddings is None:
-            print("No embeddings available, using random contexts")
-            return self._get_random_contexts(top_k)
-            
         if not input_text:
             return DEFAULT_CONTEXT
         
         try:
-            # Get input text embedding
-            result = genai.embed_content(
-                model="models/embedding-001",
-                content=input_text,
-                task_type="retrieval_query"
-            )
-            
-            if not hasattr(result, 'embedding'):
-                print("Query embedding has unexpected structure, using random contexts")
+            # Get input text embedding, skipping Gemini for a while after it failed
+            query_embedding = None
+            index = None
+            if self.rag_index is not None and time.time() - self._remote_failed_at >= REMOTE_RETRY_SECONDS:
+                index = self.rag_index
+                query_embedding = self.embedding_client.embed_one(input_text)
+                if query_embedding is None:
+                    self._remote_failed_at = time.time()
+            
+            if query_embedding is None and self.embedding_provider in ("auto", "local"):
+                local = self._local_retrieval()
+                if local is not None:
+                    client, index = local
+                    query_embedding = client.embed_one(input_text)
+            
+            # Fall back to random contexts if no embeddings
+            if query_embedding is None:
+                print("No embeddings available, using random contexts")
                 return self._get_random_contexts(top_k)
             
-            query_embedding = result.embedding
-            
-            # Convert input embedding to numpy array for calculations
-            query_embedding_np = np.array(query_embedding)
-            
-            # Calculate similarity scores
-            similarities = []
-            for i, doc in enumerate(self.rag_embeddings):
-                doc_embedding = np.array(doc["embedding"])
-                # Calculate cosine similarity
-                similarity = np.dot(query_embedding_np, doc_embedding) / (
-                    np.linalg.norm(query_embedding_np) * np.linalg.norm(doc_embedding)
-                )
-                similarities.append((i, similarity))
-            
-            # Sort by similarity (descending)
-            similarities.sort(key=lambda x: x[1], reverse=True)
-            
             # Get top_k documents
             top_docs = []
-            for i in range(min(top_k, len(similarities))):
-                doc_idx = similarities[i][0]
-                doc = self.rag_embeddings[doc_idx]
-                
+            for doc, score in index.search(query_embedding, top_k):
+                if score <= 0:
+                    continue
                 title = doc.get("title", "")
                 content = doc["content"]
                 
@@ -272,6 +374,8 @@ class Analyzer:
                 else:
                     top_docs.append(content)
             
+            if not top_docs:
+                return self._get_random_contexts(top_k)
             return "\n\n".join(top_docs)
         except Exception as e:
             print(f"Error in get_top_context: {e}")
@@ -430,12 +534,13 @@ class Analyzer:
         # Process the transcribed text the same way as a regular text entry
         return self.analyze_journal_entry(transcribed_text)
     
-    def create_weekly_summary(self, entries: List[Dict]) -> Dict[str, Any]:
+    def create_weekly_summary(self, entries: List[Dict], stats: Optional[Dict] = None) -> Dict[str, Any]:
         """
         Generate a summary of journal entries from the past week
         
         Args:
             entries: List of journal entries
+            stats: Optional precomputed statistics for the week (JournalManager.get_stats)
             
         Returns:
             Dictionary with summary information
@@ -458,6 +563,14 @@ class Analyzer:
         # Combine all journal texts
         combined_text = " ".join([entry["content"]["text"] for entry in entries if "text" in entry.get("content", {})])
         
+        stats_text = ""
+        if stats:
+            stats_text = (
+                f"Entries: {stats['entries']}, emotions: {stats['emotions']}, "
+                f"average intensity: {stats.get('average_intensity')}, top themes: {stats.get('top_themes', [])}, "
+                f"tasks done: {stats['tasks']['done']}/{stats['tasks']['total']}"
+            )
+        
         # Use the same approach as analyze_journal_entry but with a different prompt
         context = self.get_top_context(combined_text)
         prompt = f"""
@@ -472,6 +585,9 @@ class Analyzer:
 
             Journal entries from the past week:
             {combined_text}
+
+            Statistics for the week:
+            {stats_text or "Not available"}
             
             Return your analysis in JSON format like:
             {{
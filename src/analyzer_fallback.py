@@ -23,7 +23,7 @@ class Analyzer:
             "suggested_actions": ["Continue journaling"]
         }
     
-    def create_weekly_summary(self, entries):
+    def create_weekly_summary(self, entries, stats=None):
         """Minimal weekly summary"""
         return {
             "summary": f"You made {len(entries)} journal entries.",
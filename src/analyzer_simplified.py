@@ -5,24 +5,33 @@ Contains simplified functions for analyzing journal entries without depending on
 """
 
 import os
+import re
 import json
 import random
+import zlib
 from typing import Dict, List, Any, Optional, Union
 from datetime import datetime
 
-# Sample RAG documents for generating suggestions
-RAG_DOCUMENTS = [
-    "Journaling has been shown to reduce stress and anxiety. Try to write daily for at least 5 minutes.",
-    "When feeling overwhelmed, try breaking tasks into smaller, manageable steps.",
-    "Regular physical activity can improve mood and reduce symptoms of depression.",
-    "Gratitude practices have been linked to increased happiness. Try listing 3 things you're grateful for each day.",
-    "Mindfulness meditation can help reduce stress and improve focus. Even 5 minutes daily can make a difference.",
-    "Social connections are important for mental health. Reach out to someone you care about today.",
-    "Setting boundaries is healthy. It's okay to say no to additional commitments when you're feeling overwhelmed.",
-    "Progressive muscle relaxation can help reduce physical tension from stress.",
-    "Getting adequate sleep is crucial for emotional regulation and mental clarity.",
-    "Spending time in nature has been shown to reduce stress and improve mood."
-]
+try:
+    from src.vector_index import VectorIndex
+except ImportError:
+    # numpy is not installed; contexts are picked at random
+    VectorIndex = None
+
+from src.journal_rollup import emotion_key
+from src.knowledge_base import shared_knowledge_base
+
+# Length of the hashed term vectors documents are matched with
+TERM_DIMENSIONS = 1024
+STOPWORDS = frozenset("a an and are as at be can for from has have i in is it my of on or so that the this to was with you your".split())
+
+def _term_vector(text: str) -> List[float]:
+    """Count the words of a text into TERM_DIMENSIONS hashed buckets"""
+    vector = [0.0] * TERM_DIMENSIONS
+    for word in re.findall(r"[a-z']+", text.lower()):
+        if word not in STOPWORDS:
+            vector[zlib.crc32(word.encode('utf-8')) % TERM_DIMENSIONS] += 1.0
+    return vector
 
 class Analyzer:
     """Simple analyzer for journal entries that doesn't depend on external APIs"""
@@ -30,10 +39,19 @@ class Analyzer:
     def __init__(self, api_key: Optional[str] = None):
         """Initialize the analyzer without API dependency"""
         print("Using simplified analyzer without API dependencies")
-        self.rag_documents = RAG_DOCUMENTS
+        self.rag_documents = [doc["content"] for doc in shared_knowledge_base().documents]
+        self.rag_index = None
+        if VectorIndex is not None and self.rag_documents:
+            self.rag_index = VectorIndex([_term_vector(doc) for doc in self.rag_documents], self.rag_documents)
     
     def get_top_context(self, input_text: str, top_k: int = 3) -> str:
-        """Get random documents as context"""
+        """Get the documents sharing the most words with the input, or random documents if none do"""
+        if self.rag_index is not None and input_text:
+            matches = [doc for doc, score in self.rag_index.search(_term_vector(input_text), top_k) if score > 0]
+            if matches:
+                return "\n".join(matches)
+        if not self.rag_documents:
+            return ""
         selected_indices = random.sample(range(len(self.rag_documents)), min(top_k, len(self.rag_documents)))
         return "\n".join([self.rag_documents[i] for i in selected_indices])
     
@@ -141,8 +159,8 @@ class Analyzer:
         """Analyze transcribed audio text"""
         return self.analyze_journal_entry(transcribed_text)
     
-    def create_weekly_summary(self, entries: List[Dict]) -> Dict[str, Any]:
-        """Create a simple weekly summary"""
+    def create_weekly_summary(self, entries: List[Dict], stats: Optional[Dict] = None) -> Dict[str, Any]:
+        """Create a simple weekly summary, using precomputed statistics when given"""
         if not entries:
             return {
                 "summary": "No entries found for this week.",
@@ -150,11 +168,12 @@ class Analyzer:
                 "recommendations": []
             }
         
-        # Count emotions across entries
-        emotion_counts = {}
-        for entry in entries:
-            if "emotion_analysis" in entry and "primary_emotion" in entry["emotion_analysis"]:
-                emotion = entry["emotion_analysis"]["primary_emotion"]
+        # Count emotions across entries, unless the rollups already did
+        # (both count them by emotion_key, so the two agree)
+        emotion_counts = dict(stats["emotions"]) if stats else {}
+        for entry in ([] if stats else entries):
+            emotion = emotion_key((entry.get("emotion_analysis") or {}).get("primary_emotion"))
+            if emotion:
                 emotion_counts[emotion] = emotion_counts.get(emotion, 0) + 1
         
         # Determine predominant emotion
@@ -163,7 +182,7 @@ class Analyzer:
             predominant_emotion = max(emotion_counts, key=emotion_counts.get)
         
         # Generate simple summary
-        entry_count = len(entries)
+        entry_count = stats["entries"] if stats else len(entries)
         summary = f"You made {entry_count} journal entries this week. "
         
         if predominant_emotion != "mixed":
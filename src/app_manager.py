@@ -7,10 +7,13 @@ Handles core application logic and manages interactions between components.
 import os
 import json
 import datetime
+import threading
 from typing import Dict, List, Any, Union, Optional
 from pathlib import Path
 
-from src.journal_manager import JournalManager
+from src.async_journal_manager import AsyncJournalManager
+from src.journal_manager import create_journal_manager
+from src.user_session import UserSession, UserSessionPool, session_pool
 # Try to import analyzers in prioritized order
 try:
     # First try to import the main analyzer
@@ -45,79 +48,187 @@ JOURNALS_DIR = "journals"
 UPLOADS_DIR = "uploads"
 VISUALIZATIONS_DIR = "visualizations"
 
+# Characters of entry text shown per entry when browsing
+PREVIEW_CHARS = 200
+BROWSE_FIELDS = ["date", "content.text", "content.tags", "emotion_analysis.primary_emotion"]
+
+class SharedComponents:
+    """
+    Process-wide registry of the heavy, user-independent components.
+
+    The analyzer (with its RAG embeddings), the image processor (MTCNN/FER
+    models) and the audio processor are expensive to build and hold no
+    per-user state, so they are created once on first use and shared by
+    every AppManager in the process.
+    """
+    
+    def __init__(self):
+        """Initialize an empty registry; components are built lazily"""
+        self._lock = threading.Lock()
+        self._analyzer = None
+        self._image_processor = None
+        self._audio_processor = None
+    
+    def _create_analyzer(self):
+        """Create the best available analyzer in priority order"""
+        print("Initializing analyzer component...")
+        try:
+            if has_main_analyzer:
+                # Try the main analyzer first
+                analyzer = Analyzer()
+                print("Using main analyzer with full functionality")
+            elif has_simplified_analyzer:
+                # Try simplified analyzer if main fails
+                analyzer = SimplifiedAnalyzer()
+                print("Using simplified analyzer (main analyzer not available)")
+            elif has_fallback_analyzer:
+                # Use fallback if both main and simplified fail
+                analyzer = FallbackAnalyzer()
+                print("Using fallback analyzer (main and simplified not available)")
+            else:
+                # If all analyzers fail, raise an exception
+                raise Exception("No analyzer components available")
+        except Exception as e:
+            print(f"Error initializing analyzer component: {e}")
+            raise Exception("Failed to initialize analyzer component")
+        return analyzer
+    
+    @property
+    def analyzer(self):
+        """The shared analyzer, built on first access"""
+        if self._analyzer is None:
+            with self._lock:
+                if self._analyzer is None:
+                    self._analyzer = self._create_analyzer()
+        return self._analyzer
+    
+    @property
+    def image_processor(self) -> ImageProcessor:
+        """The shared image processor, built on first access"""
+        if self._image_processor is None:
+            with self._lock:
+                if self._image_processor is None:
+                    self._image_processor = ImageProcessor()
+        return self._image_processor
+    
+    @property
+    def audio_processor(self) -> AudioProcessor:
+        """The shared audio processor, built on first access"""
+        if self._audio_processor is None:
+            with self._lock:
+                if self._audio_processor is None:
+                    self._audio_processor = AudioProcessor()
+        return self._audio_processor
+
+# Process-wide component registry
+shared_components = SharedComponents()
+
 class AppManager:
     """Manages the BujoNow application components and operations"""
     
-    def __init__(self, initialize_dirs: bool = True):
+    def __init__(self,
+                 initialize_dirs: bool = True,
+                 components: Optional[SharedComponents] = None,
+                 session: Optional[UserSession] = None,
+                 sessions: Optional[UserSessionPool] = None):
         """
         Initialize the application manager
         
         Args:
             initialize_dirs: Whether to create required directories
+            components: Component registry to use (defaults to the process-wide one)
+            session: Optional user session to bind this manager to
+            sessions: Session pool used to resolve users (defaults to the process-wide one)
         """
         self.journals_dir = JOURNALS_DIR
         self.uploads_dir = UPLOADS_DIR
         self.visualizations_dir = VISUALIZATIONS_DIR
-        self.current_user_id = None
+        self.components = components or shared_components
+        self.sessions = sessions or session_pool
         
         # Create required directories
         if initialize_dirs:
             self._initialize_directories()
         
         # Initialize components
-        self.journal_manager = JournalManager(self.journals_dir)
+        if session is not None:
+            self._bind_session(session)
+        else:
+            self.current_user_id = None
+            self.current_uploads_dir = self.uploads_dir
+            self.current_visualizations_dir = self.visualizations_dir
+            self.journal_manager = create_journal_manager(self.journals_dir)
+    
+    @property
+    def analyzer(self):
+        """Shared analyzer instance"""
+        return self.components.analyzer
+    
+    @property
+    def image_processor(self) -> ImageProcessor:
+        """Shared image processor instance"""
+        return self.components.image_processor
+    
+    @property
+    def audio_processor(self) -> AudioProcessor:
+        """Shared audio processor instance"""
+        return self.components.audio_processor
+    
+    @property
+    def async_journal(self) -> AsyncJournalManager:
+        """The current journal manager, for async callers"""
+        return AsyncJournalManager(self.journal_manager)
+    
+    def _bind_session(self, session: UserSession) -> None:
+        """Point the user-scoped attributes at a session"""
+        self.current_user_id = session.user_id
+        self.journal_manager = session.journal_manager
+        self.user_uploads_dir = session.uploads_dir
+        self.user_visualizations_dir = session.visualizations_dir
+        self.current_uploads_dir = session.uploads_dir
+        self.current_visualizations_dir = session.visualizations_dir
+    
+    def for_user(self, user_id: Optional[str]) -> "AppManager":
+        """
+        Get a manager bound to one user for the duration of a request
+        
+        The returned manager shares components with this one but has its
+        own user context, so concurrent requests for different users do
+        not interfere with each other.
+        
+        Args:
+            user_id: The user ID from the request state
+            
+        Returns:
+            A user-bound AppManager (or this manager if no user is given)
+        """
+        if not user_id:
+            return self
+        return AppManager(
+            initialize_dirs=False,
+            components=self.components,
+            session=self.sessions.get(user_id),
+            sessions=self.sessions
+        )
         
     def set_user_id(self, user_id: str) -> None:
         """
         Set the current user ID for user-specific journal storage
         
+        This mutates the manager in place and is kept for single-user
+        scripts; request handlers should use for_user() instead.
+        
         Args:
             user_id: The user ID to set
         """
-        self.current_user_id = user_id
-        
-        # Update the journal manager with the user-specific directory
-        self.journal_manager = JournalManager(self.journals_dir, user_id)
-        
-        # Create user-specific upload and visualization directories if needed
         if user_id:
-            self.user_uploads_dir = os.path.join("users", user_id, "uploads")
-            self.user_visualizations_dir = os.path.join("users", user_id, "visualizations")
-            os.makedirs(self.user_uploads_dir, exist_ok=True)
-            os.makedirs(self.user_visualizations_dir, exist_ok=True)
-            
-            # Update the current directories for user-specific operations
-            self.current_uploads_dir = self.user_uploads_dir
-            self.current_visualizations_dir = self.user_visualizations_dir
+            self._bind_session(self.sessions.get(user_id))
         else:
             # Fallback to default directories when no user is set
+            self.current_user_id = None
+            self.journal_manager = create_journal_manager(self.journals_dir)
             self.current_uploads_dir = self.uploads_dir
             self.current_visualizations_dir = self.visualizations_dir
-        
-        # Initialize analyzer in priority order
-        print("Initializing analyzer component...")
-        try:
-            if has_main_analyzer:
-                # Try the main analyzer first
-                self.analyzer = Analyzer()
-                print("Using main analyzer with full functionality")
-            elif has_simplified_analyzer:
-                # Try simplified analyzer if main fails
-                self.analyzer = SimplifiedAnalyzer()
-                print("Using simplified analyzer (main analyzer not available)")
-            elif has_fallback_analyzer:
-                # Use fallback if both main and simplified fail
-                self.analyzer = FallbackAnalyzer()
-                print("Using fallback analyzer (main and simplified not available)")
-            else:
-                # If all analyzers fail, raise an exception
-                raise Exception("No analyzer components available")
-        except Exception as e:
-            print(f"Error initializing analyzer component: {e}")
-            raise Exception("Failed to initialize analyzer component")
-            
-        self.image_processor = ImageProcessor()
-        self.audio_processor = AudioProcessor()
     
     def _initialize_directories(self):
         """Ensure all required directories exist"""
@@ -246,7 +357,7 @@ class AppManager:
         visualization_path = None
         if emotion_results.get("average_emotions"):
             vis_filename = f"emotions_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.png"
-            visualization_path = os.path.join(self.visualizations_dir, vis_filename)
+            visualization_path = os.path.join(self.current_visualizations_dir, vis_filename)
             self.image_processor.create_emotion_visualization(
                 emotion_results["average_emotions"], 
                 visualization_path
@@ -300,6 +411,133 @@ class AppManager:
             print(f"Error retrieving entries: {e}")
             return []
 
+    def browse_journal(self, cursor: str = None, limit: int = 20) -> Dict[str, Any]:
+        """
+        Get one page of the user's entries, newest first
+        
+        Only the date, primary emotion, tags and a short preview of each entry
+        are returned, so pages stay small however long the entries are.
+        
+        Args:
+            cursor: The next_cursor of the previous page, or None for the newest entries
+            limit: Maximum number of entries on the page
+            
+        Returns:
+            Dictionary with the page's "entries" and the "next_cursor" (None on the last page)
+        """
+        try:
+            page = self.journal_manager.list_entries(limit=limit, cursor=cursor, fields=BROWSE_FIELDS)
+        except ValueError:
+            return {"entries": [], "next_cursor": None}
+        except Exception as e:
+            print(f"Error listing entries: {e}")
+            return {"entries": [], "next_cursor": None}
+        return self._preview_page(page)
+
+    @staticmethod
+    def _preview_page(page: Dict[str, Any]) -> Dict[str, Any]:
+        """Reduce a page of projected entries to dates, emotions, tags and text previews"""
+        entries = []
+        for entry in page["entries"]:
+            text = (entry.get("content") or {}).get("text") or ""
+            entries.append({
+                "date": entry["date"],
+                "primary_emotion": (entry.get("emotion_analysis") or {}).get("primary_emotion"),
+                "tags": (entry.get("content") or {}).get("tags") or [],
+                "preview": text[:PREVIEW_CHARS] + ("…" if len(text) > PREVIEW_CHARS else "")
+            })
+        return {"entries": entries, "next_cursor": page["next_cursor"]}
+
+    def search_journal(self, query: str, start_date: str = None, end_date: str = None) -> List[Dict[str, Any]]:
+        """
+        Full-text search over the user's journal
+        
+        Args:
+            query: Search text; quoted parts are matched as phrases
+            start_date: Optional start date (format: YYYY-MM-DD)
+            end_date: Optional end date (format: YYYY-MM-DD)
+            
+        Returns:
+            List of matches with date, score and snippet, best match first
+        """
+        try:
+            start = datetime.datetime.strptime(start_date, "%Y-%m-%d") if start_date else None
+            end = datetime.datetime.strptime(end_date, "%Y-%m-%d") if end_date else None
+            return self.journal_manager.search_text(query, start_date=start, end_date=end)
+        except ValueError:
+            return []
+        except Exception as e:
+            print(f"Error searching entries: {e}")
+            return []
+
+    def get_journal_facets(self, start_date: str = None, end_date: str = None) -> Dict[str, Dict[str, int]]:
+        """
+        Count the user's entries per tag and per primary emotion
+        
+        Args:
+            start_date: Optional start date (format: YYYY-MM-DD)
+            end_date: Optional end date (format: YYYY-MM-DD)
+            
+        Returns:
+            Dictionary with "tags" and "emotions" counts
+        """
+        try:
+            start = datetime.datetime.strptime(start_date, "%Y-%m-%d") if start_date else None
+            end = datetime.datetime.strptime(end_date, "%Y-%m-%d") if end_date else None
+            return self.journal_manager.get_facet_counts(start_date=start, end_date=end)
+        except ValueError:
+            return {"tags": {}, "emotions": {}}
+        except Exception as e:
+            print(f"Error counting entries: {e}")
+            return {"tags": {}, "emotions": {}}
+
+    async def get_entries_by_date_async(self, date: str) -> List[Dict[str, Any]]:
+        """Like get_entries_by_date, without blocking the event loop"""
+        try:
+            entry_date = datetime.datetime.strptime(date, "%Y-%m-%d")
+            entry = await self.async_journal.get_entry(entry_date)
+            return [entry] if entry else []
+        except ValueError:
+            return []
+        except Exception as e:
+            print(f"Error retrieving entries: {e}")
+            return []
+
+    async def browse_journal_async(self, cursor: str = None, limit: int = 20) -> Dict[str, Any]:
+        """Like browse_journal, reading the page's entries concurrently"""
+        try:
+            page = await self.async_journal.list_entries(limit=limit, cursor=cursor, fields=BROWSE_FIELDS)
+        except ValueError:
+            return {"entries": [], "next_cursor": None}
+        except Exception as e:
+            print(f"Error listing entries: {e}")
+            return {"entries": [], "next_cursor": None}
+        return self._preview_page(page)
+
+    async def search_journal_async(self, query: str, start_date: str = None, end_date: str = None) -> List[Dict[str, Any]]:
+        """Like search_journal, without blocking the event loop"""
+        try:
+            start = datetime.datetime.strptime(start_date, "%Y-%m-%d") if start_date else None
+            end = datetime.datetime.strptime(end_date, "%Y-%m-%d") if end_date else None
+            return await self.async_journal.search_text(query, start_date=start, end_date=end)
+        except ValueError:
+            return []
+        except Exception as e:
+            print(f"Error searching entries: {e}")
+            return []
+
+    async def get_journal_facets_async(self, start_date: str = None, end_date: str = None) -> Dict[str, Dict[str, int]]:
+        """Like get_journal_facets, without blocking the event loop"""
+        try:
+            start = datetime.datetime.strptime(start_date, "%Y-%m-%d") if start_date else None
+            end = datetime.datetime.strptime(end_date, "%Y-%m-%d") if end_date else None
+            return await self.async_journal.get_facet_counts(start_date=start, end_date=end)
+        except ValueError:
+            return {"tags": {}, "emotions": {}}
+        except Exception as e:
+            print(f"Error counting entries: {e}")
+            return {"tags": {}, "emotions": {}}
+
     def get_weekly_summary(self, start_date: str = None) -> Dict[str, Any]:
         """
         Get a summary of the week's journal entries
@@ -323,7 +561,11 @@ class AppManager:
         end = start + datetime.timedelta(days=6)
         
         # Get entries for the week
-        entries = self.journal_manager.search_entries(start_date=start, end_date=end)
+        entries = list(self.journal_manager.iter_entries(
+            start_date=start,
+            end_date=end,
+            fields=["date", "content.text", "content.tags", "emotion_analysis", "metadata.word_count"]
+        ))
         
         if not entries:
             return {
@@ -333,14 +575,18 @@ class AppManager:
                 "summary": "No entries found for this week."
             }
         
+        # Counts come from the monthly rollups instead of the entries
+        stats = self.journal_manager.get_stats(start_date=start, end_date=end)
+        
         # Generate weekly summary
         try:
-            summary = self.analyzer.create_weekly_summary(entries)
+            summary = self.analyzer.create_weekly_summary(entries, stats=stats)
             return {
                 "success": True,
                 "start_date": start.strftime("%Y-%m-%d"),
                 "end_date": end.strftime("%Y-%m-%d"),
                 "entries_count": len(entries),
+                "statistics": stats,
                 "summary": summary
             }
         except Exception as e:
@@ -370,10 +616,12 @@ class AppManager:
             # Get recent journal entries to provide context
             today = datetime.datetime.now()
             week_ago = today - datetime.timedelta(days=7)
-            recent_entries = self.journal_manager.search_entries(
+            # Only the fields the assistant uses, so long chat histories aren't loaded
+            recent_entries = list(self.journal_manager.iter_entries(
                 start_date=week_ago, 
-                end_date=today
-            )
+                end_date=today,
+                fields=["date", "content.text", "emotion_analysis.primary_emotion"]
+            ))
             
             # Use the analyzer to generate a response
             if hasattr(self.analyzer, 'chat_response'):
@@ -390,39 +638,32 @@ class AppManager:
                     "timestamp": datetime.datetime.now().isoformat()
                 }
                 
-                # Get today's entry if it exists
-                today_entry = self.journal_manager.get_entry(today)
-                
-                if today_entry:
-                    # Update existing entry with new chat message
-                    existing_chat = today_entry['content'].get('chat_history', [])
-                    existing_chat.append(current_chat_message)
-                    
-                    # Update the entry with the new chat history
-                    self.journal_manager.update_entry(
-                        date=today,
-                        chat_history=existing_chat
-                    )
-                    print(f"Added chat to existing journal entry for {today.strftime('%Y-%m-%d')}")
-                else:
-                    # Create a minimal entry for today if none exists
-                    empty_analysis = {
-                        "primary_emotion": "neutral",
-                        "emotion_intensity": 5,
-                        "emotional_themes": ["chat"],
-                        "mood_summary": "Chat interaction with journal assistant",
-                        "suggested_actions": ["Consider writing a journal entry for today"]
-                    }
+                # Check and create under the journal's write lock, so two first chats
+                # of the day don't both create the entry and lose a message
+                with self.journal_manager.lock:
+                    if self.journal_manager.has_entry(today):
+                        # Append the message to today's chat log instead of rewriting the entry
+                        self.journal_manager.append_chat_message(current_chat_message, date=today)
+                        print(f"Added chat to existing journal entry for {today.strftime('%Y-%m-%d')}")
+                    else:
+                        # Create a minimal entry for today if none exists
+                        empty_analysis = {
+                            "primary_emotion": "neutral",
+                            "emotion_intensity": 5,
+                            "emotional_themes": ["chat"],
+                            "mood_summary": "Chat interaction with journal assistant",
+                            "suggested_actions": ["Consider writing a journal entry for today"]
+                        }
                     
-                    self.journal_manager.create_entry(
-                        text="",  # Empty text since this is just for the chat
-                        emotion_analysis=empty_analysis,
-                        date=today,
-                        tags=["chat"],
-                        category="chat",
-                        chat_history=[current_chat_message]
-                    )
-                    print(f"Created new chat-only journal entry for {today.strftime('%Y-%m-%d')}")
+                        self.journal_manager.create_entry(
+                            text="",  # Empty text since this is just for the chat
+                            emotion_analysis=empty_analysis,
+                            date=today,
+                            tags=["chat"],
+                            category="chat",
+                            chat_history=[current_chat_message]
+                        )
+                        print(f"Created new chat-only journal entry for {today.strftime('%Y-%m-%d')}")
             except Exception as chat_save_error:
                 print(f"Error saving chat to journal: {chat_save_error}")
                 # Continue even if saving fails
@@ -10,6 +10,8 @@ import datetime
 import json
 from typing import Dict, Any, List
 
+from src.utils.user_paths import ensure_dir, user_dir
+
 class MinimalAppManager:
     """Minimal implementation of the app manager with basic functionality"""
     
@@ -76,8 +78,7 @@ class MinimalAppManager:
         
         # Create user-specific uploads directory if needed
         if user_id:
-            self.user_uploads_dir = os.path.join("users", user_id, "uploads")
-            os.makedirs(self.user_uploads_dir, exist_ok=True)
+            self.user_uploads_dir = ensure_dir(os.path.join(user_dir(user_id), "uploads"))
                 
     def save_text_journal(self, text, date=None):
         """Save a text journal entry"""
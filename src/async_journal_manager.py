@@ -0,0 +1,198 @@
+"""
+Async Journal Manager Module
+Exposes a JournalManager to asyncio code (e.g. async Gradio handlers).
+
+Storage calls run in a bounded thread pool shared by the whole process,
+so slow disks tie up pool threads rather than the event loop, and the
+number of threads doing file I/O stays fixed however many requests are in
+flight. Work that waits on the Gemini API (analysis, chat, embeddings) runs
+in a separate pool, so slow model calls never hold up journal reads. Range
+queries resolve the matching dates from the index first and then read the
+entry files concurrently.
+"""
+
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from src.journal_manager import INDEX_FIELDS, JournalManager, project_entry
+
+# Threads doing journal file I/O for async callers, shared by all users
+IO_WORKERS = int(os.environ.get("BUJONOW_IO_WORKERS", "32"))
+# Entry files read at the same time by one range query
+READ_CONCURRENCY = 16
+
+# Threads running analyzer and LLM calls for async callers
+ANALYSIS_WORKERS = int(os.environ.get("BUJONOW_ANALYSIS_WORKERS", "16"))
+
+_io_executor = ThreadPoolExecutor(max_workers=IO_WORKERS, thread_name_prefix="journal-io")
+_analysis_executor = ThreadPoolExecutor(max_workers=ANALYSIS_WORKERS, thread_name_prefix="analysis")
+
+async def run_blocking(fn: Callable, *args, **kwargs) -> Any:
+    """
+    Run a blocking function in the shared I/O thread pool
+
+    Args:
+        fn: The function to call
+        *args: Positional arguments for fn
+        **kwargs: Keyword arguments for fn
+
+    Returns:
+        fn's return value
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_io_executor, partial(fn, *args, **kwargs))
+
+async def run_analysis(fn: Callable, *args, **kwargs) -> Any:
+    """
+    Run a blocking function that calls the analyzer or an LLM in the analysis pool
+
+    Args:
+        fn: The function to call
+        *args: Positional arguments for fn
+        **kwargs: Keyword arguments for fn
+
+    Returns:
+        fn's return value
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_analysis_executor, partial(fn, *args, **kwargs))
+
+class AsyncJournalManager:
+    """Awaitable wrapper around a JournalManager"""
+
+    def __init__(self, manager: JournalManager, read_concurrency: int = READ_CONCURRENCY):
+        """
+        Wrap a journal manager
+
+        Args:
+            manager: The journal manager doing the actual storage work
+            read_concurrency: Entry files read at the same time by one range query
+        """
+        self.manager = manager
+        self.read_concurrency = max(1, read_concurrency)
+
+    def _reads_in_parallel(self) -> bool:
+        # Only file-per-day journals with an index gain from concurrent reads
+        return self.manager.parallel_reads and self.manager.use_index
+
+    async def get_entry(self, date: datetime) -> Optional[Dict]:
+        """Retrieve the journal entry of a date"""
+        return await run_blocking(self.manager.get_entry, date)
+
+    async def has_entry(self, date: datetime) -> bool:
+        """Check whether an entry exists for a date"""
+        return await run_blocking(self.manager.has_entry, date)
+
+    async def get_entries(self, dates: Sequence[str]) -> List[Dict]:
+        """
+        Read the entries of several dates concurrently
+
+        Args:
+            dates: Dates (YYYY-MM-DD)
+
+        Returns:
+            The entries that exist, in the order of dates
+        """
+        semaphore = asyncio.Semaphore(self.read_concurrency)
+
+        async def read(date_str: str) -> Optional[Dict]:
+            async with semaphore:
+                return await self.get_entry(datetime.strptime(date_str, '%Y-%m-%d'))
+
+        entries = await asyncio.gather(*(read(date_str) for date_str in dates))
+        return [entry for entry in entries if entry is not None]
+
+    async def create_entry(self, *args, **kwargs) -> Dict:
+        """Create a journal entry (see JournalManager.create_entry)"""
+        return await run_blocking(self.manager.create_entry, *args, **kwargs)
+
+    async def record_entry(self, *args, **kwargs) -> Dict:
+        """Create or extend the day's entry (see JournalManager.record_entry)"""
+        return await run_blocking(self.manager.record_entry, *args, **kwargs)
+
+    async def update_entry(self, *args, **kwargs) -> Optional[Dict]:
+        """Update an existing entry (see JournalManager.update_entry)"""
+        return await run_blocking(self.manager.update_entry, *args, **kwargs)
+
+    async def append_chat_message(self, message: Dict, date: Optional[datetime] = None) -> None:
+        """Append one chat message to a day's chat"""
+        await run_blocking(self.manager.append_chat_message, message, date)
+
+    async def _matching_dates(self, **kwargs) -> List[str]:
+        """Resolve a range query to dates from the index, without reading entries"""
+        return await run_blocking(
+            lambda: [entry["date"] for entry in self.manager.iter_entries(fields=["date"], **kwargs)]
+        )
+
+    async def search_entries(self,
+                             start_date: Optional[datetime] = None,
+                             end_date: Optional[datetime] = None,
+                             tags: Optional[List[str]] = None,
+                             emotion: Optional[str] = None,
+                             tag_mode: str = "any") -> List[Dict]:
+        """
+        Search journal entries, reading the matching files concurrently
+
+        Args:
+            start_date: Start of the range (defaults to the first of this month)
+            end_date: End of the range (defaults to now)
+            tags: Only entries having any (or, with tag_mode="all", every one) of these tags
+            emotion: Only entries with this primary emotion
+            tag_mode: "any" or "all"
+
+        Returns:
+            Matching entries in date order
+        """
+        if not self._reads_in_parallel():
+            return await run_blocking(self.manager.search_entries, start_date, end_date, tags, emotion, tag_mode)
+        if not start_date:
+            start_date = datetime.now().replace(day=1)
+        if not end_date:
+            end_date = datetime.now()
+        dates = await self._matching_dates(start_date=start_date, end_date=end_date,
+                                           tags=tags, emotion=emotion, tag_mode=tag_mode)
+        return await self.get_entries(dates)
+
+    async def list_entries(self,
+                           limit: int = 20,
+                           cursor: Optional[str] = None,
+                           descending: bool = True,
+                           fields: Optional[Sequence[str]] = None,
+                           **filters) -> Dict[str, Any]:
+        """
+        Get one page of journal entries, reading the page's files concurrently
+
+        Args:
+            limit: Maximum number of entries on the page
+            cursor: The next_cursor of the previous page, or None for the first page
+            descending: Newest entries first (the default) or oldest first
+            fields: Optional dotted field paths to keep
+            **filters: start_date, end_date, tags, emotion and tag_mode, as in JournalManager.list_entries
+
+        Returns:
+            {"entries": [...], "next_cursor": cursor of the next page, or None on the last page}
+        """
+        index_only = fields is not None and all(field == "date" or field in INDEX_FIELDS for field in fields)
+        if index_only or not self._reads_in_parallel():
+            return await run_blocking(self.manager.list_entries, limit, cursor, descending, fields=fields, **filters)
+        page = await run_blocking(self.manager.list_entries, limit, cursor, descending, fields=["date"], **filters)
+        entries = await self.get_entries([entry["date"] for entry in page["entries"]])
+        if fields:
+            entries = [project_entry(entry, fields) for entry in entries]
+        return {"entries": entries, "next_cursor": page["next_cursor"]}
+
+    async def search_text(self, query: str, *args, **kwargs) -> List[Dict]:
+        """Full-text search (see JournalManager.search_text)"""
+        return await run_blocking(self.manager.search_text, query, *args, **kwargs)
+
+    async def get_facet_counts(self, *args, **kwargs) -> Dict[str, Dict[str, int]]:
+        """Count entries per tag and emotion (see JournalManager.get_facet_counts)"""
+        return await run_blocking(self.manager.get_facet_counts, *args, **kwargs)
+
+    async def get_stats(self, *args, **kwargs) -> Dict:
+        """Aggregate a date range (see JournalManager.get_stats)"""
+        return await run_blocking(self.manager.get_stats, *args, **kwargs)
@@ -0,0 +1,226 @@
+"""
+Change Log Module
+Records every change to a user's journal in an append-only log with a
+monotonic sequence number, so derived data (indexes, embeddings, backups,
+replicas) can be kept up to date by processing only the changes made since
+their last checkpoint instead of rescanning the journal.
+
+The log is the _changes.log file of the journal directory, one JSON record
+per line: {"seq", "date", "op", "fields", "timestamp"}. Consumers store their
+checkpoints in _checkpoints.json next to it.
+"""
+
+import os
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+
+from src.utils.file_io import atomic_write
+from src.utils.serialization import json_dumps, json_loads
+
+CHANGES_FILENAME = "_changes.log"
+CHECKPOINTS_FILENAME = "_checkpoints.json"
+
+# Bytes read from the end of the log to find the last sequence number
+_TAIL_BYTES = 64 * 1024
+# Below this span the binary search for a sequence number switches to a scan
+_SCAN_BYTES = 8 * 1024
+
+class ChangeLog:
+    """Append-only, sequence-numbered log of the changes to one journal"""
+
+    def __init__(self, journal_dir: str):
+        """
+        Initialize the change log of a journal directory
+
+        Appends must be made while holding the journal's file lock
+        (JournalManager.lock), which keeps sequence numbers unique across
+        processes and lets the appender repair a torn last record.
+
+        Args:
+            journal_dir: The user's journal directory
+        """
+        self.journal_dir = journal_dir
+        self.path = os.path.join(journal_dir, CHANGES_FILENAME)
+        self.checkpoints_path = os.path.join(journal_dir, CHECKPOINTS_FILENAME)
+        # (log size, last sequence number) as of our last look at the log
+        self._tail: Optional[tuple] = None
+        self._lock = threading.RLock()
+
+    def _read_tail(self, repair: bool = False) -> int:
+        """
+        Find the last sequence number
+
+        A torn last record is ignored, as it may be an append still in
+        progress in another process.
+
+        Args:
+            repair: Truncate a torn last record; only while holding the
+                journal's file lock, when no append can be in progress
+        """
+        try:
+            size = os.path.getsize(self.path)
+        except FileNotFoundError:
+            self._tail = (0, 0)
+            return 0
+        if self._tail and self._tail[0] == size and not repair:
+            return self._tail[1]
+
+        last_seq = 0
+        with open(self.path, 'rb+' if repair else 'rb') as f:
+            start = max(0, size - _TAIL_BYTES)
+            f.seek(start)
+            tail = f.read()
+            end = tail.rfind(b"\n") + 1
+            if end < len(tail) and repair:
+                # A crash interrupted the last append; drop the partial record
+                f.truncate(start + end)
+                size = start + end
+            for line in reversed(tail[:end].splitlines()):
+                try:
+                    last_seq = json_loads(line)["seq"]
+                    break
+                except (ValueError, KeyError, TypeError):
+                    continue
+        self._tail = (size, last_seq)
+        return last_seq
+
+    def last_seq(self) -> int:
+        """Get the sequence number of the latest change (0 if there is none)"""
+        with self._lock:
+            return self._read_tail()
+
+    def append(self, date_str: str, op: str, fields: Sequence[str], fsync: bool = True) -> int:
+        """
+        Append one change record
+
+        Args:
+            date_str: Date of the changed entry (YYYY-MM-DD)
+            op: Kind of change ("create", "update", "record", "chat" or "import")
+            fields: Dotted paths of the entry fields that changed
+            fsync: Whether to force the record to stable storage
+
+        Returns:
+            The record's sequence number
+        """
+        return self.append_many([(date_str, op, fields)], fsync)[-1]
+
+    def append_many(self, changes: Sequence[tuple], fsync: bool = True) -> List[int]:
+        """
+        Append several change records with one write
+
+        The caller must hold the journal's file lock.
+
+        Args:
+            changes: (date, op, fields) tuples
+            fsync: Whether to force the records to stable storage
+
+        Returns:
+            The records' sequence numbers
+        """
+        with self._lock:
+            seq = self._read_tail(repair=True)
+            timestamp = datetime.now().isoformat()
+            lines = []
+            seqs = []
+            for date_str, op, fields in changes:
+                seq += 1
+                seqs.append(seq)
+                lines.append(json_dumps({"seq": seq, "date": date_str, "op": op,
+                                         "fields": list(fields), "timestamp": timestamp}))
+            data = ("\n".join(lines) + "\n").encode('utf-8')
+            os.makedirs(self.journal_dir, exist_ok=True)
+            with open(self.path, 'ab') as f:
+                f.write(data)
+                f.flush()
+                if fsync:
+                    os.fsync(f.fileno())
+                size = f.tell()
+            self._tail = (size, seq)
+            return seqs
+
+    def _offset_after(self, f, size: int, since_seq: int) -> int:
+        """Binary search for a record boundary before the first record above since_seq"""
+        lo, hi = 0, size
+        while hi - lo > _SCAN_BYTES:
+            mid = (lo + hi) // 2
+            f.seek(mid)
+            f.readline()
+            start = f.tell()
+            line = f.readline()
+            if not line or start >= hi:
+                hi = mid
+                continue
+            try:
+                seq = json_loads(line)["seq"]
+            except (ValueError, KeyError, TypeError):
+                # Unreadable record; fall back to scanning this span
+                break
+            if seq <= since_seq:
+                lo = start + len(line)
+            else:
+                hi = mid
+        return lo
+
+    def read(self, since_seq: int = 0, limit: Optional[int] = None, until_seq: Optional[int] = None) -> List[Dict]:
+        """
+        Read the changes made after a sequence number
+
+        The start of the range is found by binary search, so the cost depends
+        on the number of changes returned, not on the length of the log.
+
+        Args:
+            since_seq: Return changes with a higher sequence number than this
+            limit: Optional maximum number of changes
+            until_seq: Optional highest sequence number to return
+
+        Returns:
+            Change records in sequence order
+        """
+        changes = []
+        try:
+            f = open(self.path, 'rb')
+        except FileNotFoundError:
+            return changes
+        with f:
+            size = os.fstat(f.fileno()).st_size
+            f.seek(self._offset_after(f, size, since_seq))
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # An append in progress
+                    break
+                try:
+                    change = json_loads(line)
+                except ValueError:
+                    print(f"Skipping unreadable change record in {self.path}")
+                    continue
+                if change.get("seq", 0) <= since_seq:
+                    continue
+                if until_seq is not None and change["seq"] > until_seq:
+                    break
+                changes.append(change)
+                if limit is not None and len(changes) >= limit:
+                    break
+        return changes
+
+    def checkpoints(self) -> Dict[str, int]:
+        """Get the checkpoints of all consumers"""
+        try:
+            with open(self.checkpoints_path, 'rb') as f:
+                return json_loads(f.read())
+        except FileNotFoundError:
+            return {}
+        except ValueError as e:
+            print(f"Error reading {self.checkpoints_path}: {str(e)}")
+            return {}
+
+    def get_checkpoint(self, consumer: str) -> int:
+        """Get the last sequence number a consumer has processed (0 if none)"""
+        return self.checkpoints().get(consumer, 0)
+
+    def set_checkpoint(self, consumer: str, seq: int) -> None:
+        """Store the last sequence number a consumer has processed"""
+        with self._lock:
+            checkpoints = self.checkpoints()
+            checkpoints[consumer] = seq
+            atomic_write(self.checkpoints_path, json_dumps(checkpoints))
@@ -0,0 +1,182 @@
+"""
+Embedding Cache Module
+Persists document embeddings on disk so the analyzer does not re-embed its
+knowledge base every time it is constructed.
+
+Each embedding model has its own cache: a NumPy .npy matrix with one
+(L2-normalized) row per document plus a JSON manifest listing the SHA-256
+hash of each row's text. Lookups are by (model, content hash), so only new
+or changed documents are sent to the embedding API. The matrix file name
+includes a digest of its rows and the manifest is replaced atomically after
+it, so readers in other processes always see a matching manifest and matrix.
+Writers hold the cache directory's lock file while they replace the cache and
+remove old matrices, so one process never deletes a matrix another is still
+writing.
+"""
+
+import hashlib
+import io
+import os
+import re
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+    from src.vector_index import normalize_rows
+except ImportError:
+    np = None
+
+from src.utils.file_io import atomic_write, get_file_lock
+from src.utils.serialization import json_dumps, json_loads
+
+DEFAULT_CACHE_DIR = os.environ.get("BUJONOW_EMBEDDING_CACHE", os.path.join("cache", "embeddings"))
+
+def content_hash(text: str) -> str:
+    """SHA-256 hex digest of a text, the cache key of its embedding"""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+class EmbeddingCache:
+    """On-disk cache of the embeddings one model produced for a set of texts"""
+
+    def __init__(self, model: str, cache_dir: str = DEFAULT_CACHE_DIR):
+        """
+        Initialize the cache of an embedding model
+
+        Args:
+            model: Embedding model name (e.g. "models/embedding-001")
+            cache_dir: Directory holding the cache files
+        """
+        self.model = model
+        self.cache_dir = cache_dir
+        self.prefix = re.sub(r'[^A-Za-z0-9._-]+', '_', model)
+        self.manifest_path = os.path.join(cache_dir, f"{self.prefix}.json")
+        self.lock = get_file_lock(os.path.join(cache_dir, ".lock"))
+
+    def load_matrix(self) -> Tuple[List[str], Optional["np.ndarray"]]:
+        """
+        Open the cached matrix
+
+        The matrix is memory-mapped read-only, so processes using the same
+        cache share its pages through the page cache instead of each holding
+        a copy.
+
+        Returns:
+            (content hash of each row, matrix), or ([], None) if there is no
+            usable cache
+        """
+        if np is None:
+            return [], None
+        # A writer may replace the manifest and remove its matrix between our
+        # two reads; the manifest read again then names the new matrix
+        for attempt in range(2):
+            try:
+                with open(self.manifest_path, 'rb') as f:
+                    manifest = json_loads(f.read())
+                if manifest.get("model") != self.model:
+                    return [], None
+                matrix = np.load(os.path.join(self.cache_dir, manifest["matrix"]), mmap_mode='r', allow_pickle=False)
+                break
+            except FileNotFoundError:
+                if attempt:
+                    return [], None
+            except (ValueError, KeyError, TypeError, OSError) as e:
+                print(f"Ignoring unreadable embedding cache {self.manifest_path}: {str(e)}")
+                return [], None
+        hashes = manifest.get("hashes", [])
+        if matrix.ndim != 2 or len(hashes) != matrix.shape[0]:
+            print(f"Ignoring embedding cache {self.manifest_path}: manifest does not match the matrix")
+            return [], None
+        return hashes, matrix
+
+    def load(self) -> Dict[str, "np.ndarray"]:
+        """
+        Read the cached embeddings
+
+        Returns:
+            Embedding vectors by content hash (empty if there is no usable cache)
+        """
+        hashes, matrix = self.load_matrix()
+        if matrix is None:
+            return {}
+        return {key: matrix[row] for row, key in enumerate(hashes)}
+
+    def save(self, hashes: Sequence[str], vectors: Sequence[Sequence[float]]) -> None:
+        """
+        Replace the cache contents
+
+        Rows are stored L2-normalized, as they are only compared by cosine
+        similarity, so the matrix can be searched without copying it.
+
+        Args:
+            hashes: Content hash of each vector, in the order to store them
+            vectors: Embedding vectors
+        """
+        if np is None or not len(vectors):
+            return
+        matrix = normalize_rows(np.array(vectors, dtype=np.float32))
+        digest = hashlib.sha256("".join(hashes).encode('ascii')).hexdigest()[:16]
+        matrix_name = f"{self.prefix}-{digest}.npy"
+
+        buffer = io.BytesIO()
+        np.save(buffer, matrix, allow_pickle=False)
+        with self.lock:
+            atomic_write(os.path.join(self.cache_dir, matrix_name), buffer.getvalue())
+            atomic_write(self.manifest_path, json_dumps({
+                "model": self.model,
+                "dimensions": int(matrix.shape[1]),
+                "matrix": matrix_name,
+                "hashes": list(hashes)
+            }))
+
+            # Remove the matrices of earlier versions of the cache (processes that
+            # still have one mapped keep reading it until they reload)
+            for name in os.listdir(self.cache_dir):
+                if name.startswith(f"{self.prefix}-") and name.endswith(".npy") and name != matrix_name:
+                    try:
+                        os.remove(os.path.join(self.cache_dir, name))
+                    except OSError:
+                        pass
+
+    def embed(self,
+              texts: Sequence[str],
+              embed_fn: Callable[[List[str]], List[Optional[Sequence[float]]]]) -> List[Optional[Sequence[float]]]:
+        """
+        Get the embeddings of texts, embedding only those not in the cache
+
+        The cache is rewritten to hold exactly the given texts, in their
+        order, whenever it holds anything else, so documents that were
+        removed or edited do not accumulate in it.
+
+        Args:
+            texts: Texts to embed
+            embed_fn: Embeds a list of texts, returning one vector (or None on
+                failure) per text
+
+        Returns:
+            One embedding per text, None where embedding failed
+        """
+        if np is None:
+            return embed_fn(list(texts))
+
+        hashes, matrix = self.load_matrix()
+        cached = {key: matrix[row] for row, key in enumerate(hashes)} if matrix is not None else {}
+        keys = [content_hash(text) for text in texts]
+        if hashes == keys:
+            return [cached[key] for key in keys]
+
+        missing = [i for i, key in enumerate(keys) if key not in cached]
+        if missing:
+            print(f"Embedding {len(missing)} of {len(texts)} documents ({len(texts) - len(missing)} cached)")
+            new_vectors = embed_fn([texts[i] for i in missing])
+            for i, vector in zip(missing, new_vectors):
+                if vector is not None:
+                    cached[keys[i]] = vector
+
+        stored = [key for key in keys if key in cached]
+        if stored == hashes:
+            return [cached.get(key) for key in keys]
+        try:
+            self.save(stored, [cached[key] for key in stored])
+        except (OSError, ValueError) as e:
+            print(f"Error writing embedding cache {self.manifest_path}: {str(e)}")
+        return [cached.get(key) for key in keys]
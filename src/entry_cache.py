@@ -0,0 +1,124 @@
+"""
+Entry Cache Module
+A bounded, process-wide LRU cache of parsed journal entries.
+
+Entries are keyed by (journal directory, date) so that all users share one
+memory budget. Each cached entry remembers the mtime and size of the file it
+was parsed from; a lookup with a different file signature is a miss, so edits
+made by other processes are never served stale.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+# Default memory budget for all cached entries, in bytes of serialized JSON
+DEFAULT_MAX_BYTES = int(os.environ.get("BUJONOW_ENTRY_CACHE_BYTES", str(64 * 1024 * 1024)))
+
+def clone_entry(value: Any) -> Any:
+    """Copy a JSON-like structure so callers can mutate it freely"""
+    if isinstance(value, dict):
+        return {key: clone_entry(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [clone_entry(item) for item in value]
+    return value
+
+class EntryCache:
+    """Thread-safe LRU cache of parsed entries under a global byte budget"""
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        Initialize the cache
+
+        Args:
+            max_bytes: Budget for the summed serialized size of cached entries
+        """
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, Tuple[Tuple, int, Dict]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable, signature: Tuple) -> Optional[Dict]:
+        """
+        Look up an entry
+
+        Args:
+            key: Cache key, usually (journal directory, date)
+            signature: (mtime_ns, size) of the entry file on disk
+
+        Returns:
+            A private copy of the cached entry, or None on a miss
+        """
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is None or cached[0] != signature:
+                if cached is not None:
+                    self._drop(key)
+                    self.invalidations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            entry = cached[2]
+        return clone_entry(entry)
+
+    def put(self, key: Hashable, signature: Tuple, entry: Dict, size: int) -> None:
+        """
+        Store an entry
+
+        Args:
+            key: Cache key, usually (journal directory, date)
+            signature: (mtime_ns, size) of the entry file on disk
+            entry: The parsed entry; the cache keeps its own copy
+            size: Approximate memory cost, usually the file size
+        """
+        if size > self.max_bytes:
+            return
+        entry = clone_entry(entry)
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (signature, size, entry)
+            self._bytes += size
+            while self._bytes > self.max_bytes and self._entries:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        """Forget an entry, e.g. after writing its file"""
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+                self.invalidations += 1
+
+    def _drop(self, key: Hashable) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def clear(self) -> None:
+        """Remove all entries (counters are kept)"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Get the cache counters and current usage"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes
+            }
+
+# Process-wide cache shared by all journal managers
+entry_cache = EntryCache()
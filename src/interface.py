@@ -5,6 +5,7 @@ Creates the web interface for the BujoNow application with graceful fallbacks
 for missing dependencies.
 """
 
+import asyncio
 import os
 import sys
 import datetime
@@ -12,6 +13,18 @@ import traceback
 import gradio as gr
 from typing import Dict, Any, List
 
+from src.utils.user_paths import user_dir
+
+try:
+    from src.async_journal_manager import run_analysis, run_blocking
+except Exception as e:
+    print(f"Warning: Could not import async journal manager: {e}")
+    
+    async def run_blocking(fn, *args, **kwargs):
+        return await asyncio.to_thread(fn, *args, **kwargs)
+    
+    run_analysis = run_blocking
+
 # First try to import core components that should always work
 try:
     # Basic imports
@@ -118,6 +131,50 @@ except Exception as e:
         print(f"Error creating emergency app manager: {e}")
         app_manager = None
 
+def get_user_app_manager(user_id):
+    """
+    Resolve the app manager for the user of the current request
+    
+    Args:
+        user_id: The user ID from the request's user_id_state
+        
+    Returns:
+        An app manager scoped to that user
+    """
+    if has_app_manager and hasattr(app_manager, 'for_user'):
+        return app_manager.for_user(user_id)
+    if has_app_manager and hasattr(app_manager, 'set_user_id'):
+        app_manager.set_user_id(user_id)
+    return app_manager
+
+async def get_user_app_manager_async(user_id):
+    """Resolve the app manager for a request's user without blocking the event loop"""
+    # Resolving a user only opens (or reuses) their session storage, so it runs in the I/O pool
+    return await run_blocking(get_user_app_manager, user_id)
+
+async def call_manager(manager, method: str, *args, **kwargs):
+    """
+    Call an app manager method from an async handler
+    
+    Uses the manager's <method>_async variant when it has one (journal reads,
+    which run in the storage thread pool), and otherwise runs the blocking
+    method in the analysis thread pool, since those methods call the analyzer
+    or Gemini and can take seconds. Handlers never block the event loop.
+    
+    Args:
+        manager: The request's app manager
+        method: Name of the blocking method
+        *args: Positional arguments for the method
+        **kwargs: Keyword arguments for the method
+        
+    Returns:
+        The method's return value
+    """
+    async_method = getattr(manager, f"{method}_async", None)
+    if async_method is not None:
+        return await async_method(*args, **kwargs)
+    return await run_analysis(getattr(manager, method), *args, **kwargs)
+
 def create_interface():
     """
     Create the main application interface with graceful fallbacks for errors
@@ -134,9 +191,8 @@ def create_interface():
             nonlocal current_user_id
             current_user_id = user_id
             
-            # Update the app manager with the new user
-            if has_app_manager and hasattr(app_manager, 'set_user_id'):
-                app_manager.set_user_id(user_id)
+            # Warm up the user's session so the first request is fast
+            get_user_app_manager(user_id)
             
             print(f"User {user_id} logged in successfully")
         
@@ -326,7 +382,7 @@ def create_interface():
                         with gr.Column():
                             output = gr.JSON(label="Result")
                     
-                    def save_entry(text, date, user_id):
+                    async def save_entry(text, date, user_id):
                         try:
                             if not user_id:
                                 return {
@@ -334,11 +390,10 @@ def create_interface():
                                     "error": "You must be logged in to save entries"
                                 }
                             
-                            # Update app manager to use the current user's journal directory
-                            if has_app_manager and hasattr(app_manager, 'set_user_id'):
-                                app_manager.set_user_id(user_id)
+                            # Resolve the app manager for this request's user
+                            manager = await get_user_app_manager_async(user_id)
                             
-                            return app_manager.save_text_journal(text, date)
+                            return await call_manager(manager, 'save_text_journal', text, date)
                         except Exception as e:
                             return {
                                 "success": False,
@@ -358,7 +413,7 @@ def create_interface():
                         view_button = gr.Button("View Entry")
                         view_output = gr.JSON(label="Entry")
                         
-                        def get_entry(date, user_id):
+                        async def get_entry(date, user_id):
                             try:
                                 if not user_id:
                                     return {
@@ -366,12 +421,11 @@ def create_interface():
                                         "error": "You must be logged in to view entries"
                                     }
                                 
-                                # Update app manager to use the current user's journal directory
-                                if has_app_manager and hasattr(app_manager, 'set_user_id'):
-                                    app_manager.set_user_id(user_id)
+                                # Resolve the app manager for this request's user
+                                manager = await get_user_app_manager_async(user_id)
                                 
-                                if hasattr(app_manager, 'get_entries_by_date'):
-                                    entries = app_manager.get_entries_by_date(date)
+                                if hasattr(manager, 'get_entries_by_date'):
+                                    entries = await call_manager(manager, 'get_entries_by_date', date)
                                     if entries and len(entries) > 0:
                                         return entries[0]
                                     return {"error": "No entry found for this date"}
@@ -388,6 +442,120 @@ def create_interface():
                             outputs=view_output
                         )
                     
+                    with gr.TabItem("Search", id="search_entries"):
+                        with gr.Row():
+                            search_query = gr.Textbox(label="Search", placeholder='e.g. walk "morning run"')
+                        with gr.Row():
+                            search_start = gr.Textbox(label="From (YYYY-MM-DD, optional)")
+                            search_end = gr.Textbox(label="To (YYYY-MM-DD, optional)")
+                        search_button = gr.Button("Search")
+                        with gr.Row():
+                            search_output = gr.JSON(label="Results")
+                            facet_output = gr.JSON(label="Entries by Tag and Emotion")
+                        
+                        async def search_entries(query, start, end, user_id):
+                            try:
+                                if not user_id:
+                                    return {
+                                        "success": False,
+                                        "error": "You must be logged in to search entries"
+                                    }, None
+                                
+                                # Resolve the app manager for this request's user
+                                manager = await get_user_app_manager_async(user_id)
+                                start = (start or "").strip() or None
+                                end = (end or "").strip() or None
+                                
+                                # Facets come from the tag and emotion posting lists, without reading entries
+                                facets = await call_manager(manager, 'get_journal_facets', start, end) if hasattr(manager, 'get_journal_facets') else None
+                                if not query or not query.strip():
+                                    return {"error": "Enter something to search for"}, facets
+                                
+                                if hasattr(manager, 'search_journal'):
+                                    results = await call_manager(manager, 'search_journal', query, start, end)
+                                    return (results if results else {"message": "No matching entries"}), facets
+                                else:
+                                    return {"error": "Search is not available in this mode"}, facets
+                            except Exception as e:
+                                return {
+                                    "error": f"Error searching entries: {type(e).__name__}: {e}"
+                                }, None
+                        
+                        search_button.click(
+                            fn=search_entries,
+                            inputs=[search_query, search_start, search_end, user_id_state],
+                            outputs=[search_output, facet_output]
+                        )
+                        search_query.submit(
+                            fn=search_entries,
+                            inputs=[search_query, search_start, search_end, user_id_state],
+                            outputs=[search_output, facet_output]
+                        )
+                    
+                    with gr.TabItem("Browse", id="browse_entries"):
+                        browse_button = gr.Button("Load Entries")
+                        browse_output = gr.Dataframe(
+                            headers=["Date", "Emotion", "Tags", "Preview"],
+                            datatype=["str", "str", "str", "str"],
+                            wrap=True
+                        )
+                        with gr.Row():
+                            prev_button = gr.Button("Previous", visible=False)
+                            next_button = gr.Button("Next", visible=False)
+                        # Cursors of the pages up to the one shown (None for the newest) and of the next
+                        # page; only the current page's rows are sent, so state stays a list of short cursors
+                        browse_history = gr.State([])
+                        browse_cursor = gr.State(None)
+                        
+                        async def show_page(history, user_id):
+                            hidden = gr.update(visible=False)
+                            try:
+                                if not user_id:
+                                    return [["", "", "", "You must be logged in to browse entries"]], [], None, hidden, hidden
+                                
+                                # Resolve the app manager for this request's user
+                                manager = await get_user_app_manager_async(user_id)
+                                if not hasattr(manager, 'browse_journal'):
+                                    return [["", "", "", "Browsing is not available in this mode"]], [], None, hidden, hidden
+                                
+                                page = await call_manager(manager, 'browse_journal', history[-1])
+                                rows = [
+                                    [entry["date"], entry["primary_emotion"] or "", ", ".join(entry["tags"]), entry["preview"]]
+                                    for entry in page["entries"]
+                                ]
+                                next_cursor = page["next_cursor"]
+                                return (rows, history, next_cursor,
+                                        gr.update(visible=len(history) > 1), gr.update(visible=next_cursor is not None))
+                            except Exception as e:
+                                return [["", "", "", f"Error listing entries: {type(e).__name__}: {e}"]], [], None, hidden, hidden
+                        
+                        async def start_browsing(user_id):
+                            return await show_page([None], user_id)
+                        
+                        async def next_page(history, cursor, user_id):
+                            return await show_page(history + [cursor], user_id)
+                        
+                        async def previous_page(history, user_id):
+                            return await show_page(history[:-1] or [None], user_id)
+                        
+                        # "Load Entries" starts over from the newest entry; Previous and Next replace the page shown
+                        browse_outputs = [browse_output, browse_history, browse_cursor, prev_button, next_button]
+                        browse_button.click(
+                            fn=start_browsing,
+                            inputs=[user_id_state],
+                            outputs=browse_outputs
+                        )
+                        next_button.click(
+                            fn=next_page,
+                            inputs=[browse_history, browse_cursor, user_id_state],
+                            outputs=browse_outputs
+                        )
+                        prev_button.click(
+                            fn=previous_page,
+                            inputs=[browse_history, user_id_state],
+                            outputs=browse_outputs
+                        )
+                    
                     with gr.TabItem("Weekly Summary", id="weekly_summary"):
                         with gr.Row():
                             with gr.Column():
@@ -400,7 +568,7 @@ def create_interface():
                             with gr.Column():
                                 summary_output = gr.JSON(label="Weekly Summary")
                         
-                        def get_summary(start, user_id):
+                        async def get_summary(start, user_id):
                             try:
                                 if not user_id:
                                     return {
@@ -408,12 +576,11 @@ def create_interface():
                                         "error": "You must be logged in to view summaries"
                                     }
                                 
-                                # Update app manager to use the current user's journal directory
-                                if has_app_manager and hasattr(app_manager, 'set_user_id'):
-                                    app_manager.set_user_id(user_id)
+                                # Resolve the app manager for this request's user
+                                manager = await get_user_app_manager_async(user_id)
                                 
-                                if hasattr(app_manager, 'get_weekly_summary'):
-                                    return app_manager.get_weekly_summary(start_date=start)
+                                if hasattr(manager, 'get_weekly_summary'):
+                                    return await call_manager(manager, 'get_weekly_summary', start_date=start)
                                 else:
                                     return {"error": "Weekly summary not available in this mode"}
                             except Exception as e:
@@ -445,7 +612,7 @@ def create_interface():
                         clear_button = gr.Button("Clear Chat")
                         load_history_button = gr.Button("Load Today's Chat History")
                         
-                        def chat_response(user_input, history, user_id):
+                        async def chat_response(user_input, history, user_id):
                             if not user_id:
                                 return history + [
                                     {"role": "user", "content": user_input},
@@ -456,13 +623,12 @@ def create_interface():
                                 return history
                             
                             try:
-                                # Update app manager to use the current user's journal directory
-                                if has_app_manager and hasattr(app_manager, 'set_user_id'):
-                                    app_manager.set_user_id(user_id)
+                                # Resolve the app manager for this request's user
+                                manager = await get_user_app_manager_async(user_id)
                                 
                                 # Get response from app manager
-                                if hasattr(app_manager, 'chat_with_journal'):
-                                    response = app_manager.chat_with_journal(user_input, history)
+                                if hasattr(manager, 'chat_with_journal'):
+                                    response = await call_manager(manager, 'chat_with_journal', user_input, history)
                                 else:
                                     response = "Chat functionality is not available in the current mode."
                                 
@@ -479,21 +645,20 @@ def create_interface():
                         def clear_chat_history():
                             return []
                         
-                        def load_todays_chat_history(user_id):
+                        async def load_todays_chat_history(user_id):
                             if not user_id:
                                 return []
                             
                             try:
-                                # Update app manager to use the current user's journal directory
-                                if has_app_manager and hasattr(app_manager, 'set_user_id'):
-                                    app_manager.set_user_id(user_id)
+                                # Resolve the app manager for this request's user
+                                manager = await get_user_app_manager_async(user_id)
                                 
                                 # Get today's date
                                 today = datetime.datetime.now()
                                 
                                 # Try to get today's entry
-                                if hasattr(app_manager, 'get_entries_by_date'):
-                                    entries = app_manager.get_entries_by_date(today.strftime("%Y-%m-%d"))
+                                if hasattr(manager, 'get_entries_by_date'):
+                                    entries = await call_manager(manager, 'get_entries_by_date', today.strftime("%Y-%m-%d"))
                                     if entries and len(entries) > 0:
                                         entry = entries[0]
                                         # Check if entry has chat history
@@ -530,14 +695,14 @@ def create_interface():
                                 gr.Markdown("## User Profile")
                                 user_profile_info = gr.JSON(label="User Information")
                         
-                        def get_user_profile(user_id):
+                        async def get_user_profile(user_id):
                             if not user_id:
                                 return {
                                     "logged_in": False,
                                     "message": "You must be logged in to view your profile"
                                 }
                             
-                            user_data = user_manager.get_user_data(user_id)
+                            user_data = await run_blocking(user_manager.get_user_data, user_id)
                             if user_data:
                                 # Don't include auth data in the profile
                                 profile_data = {k: v for k, v in user_data.items() if k != "auth"}
@@ -552,10 +717,13 @@ def create_interface():
                             outputs=user_profile_info
                         )
                         
+                        async def profile_on_select(tab_id, user_id):
+                            return await get_user_profile(user_id) if tab_id == "user_profile" else None
+                        
                         # Update profile on tab load
                         gr.on(
                             triggers=[tabs.select],
-                            fn=lambda tab_id, user_id: get_user_profile(user_id) if tab_id == "user_profile" else None,
+                            fn=profile_on_select,
                             inputs=[tabs, user_id_state],
                             outputs=user_profile_info
                         )
@@ -585,7 +753,7 @@ def create_interface():
                             if has_user_manager:
                                 user_journal_dir = user_manager.get_user_journal_manager_path(user_id)
                             else:
-                                user_journal_dir = os.path.join("users", user_id, "journals")
+                                user_journal_dir = os.path.join(user_dir(user_id), "journals")
                             
                             os.makedirs(user_journal_dir, exist_ok=True)
                             
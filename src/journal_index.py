@@ -0,0 +1,568 @@
+"""
+Journal Index Module
+Maintains a per-user on-disk index of journal entries so that date, tag and
+emotion queries can be answered without opening every entry file.
+
+The index is sharded by month: each YYYY-MM journal directory holds an
+_index.json file mapping the dates of that month to the entry path and a few
+summary fields. Saving an entry only rewrites the shard of its month; later
+saves of a day only append its new record to the month's _index.delta.jsonl
+(see shard_delta).
+
+For every loaded shard, sorted date lists per tag and per primary emotion are
+kept in memory, so tag and emotion filters are set operations and facet
+counts are list lengths.
+"""
+
+import os
+import re
+import threading
+from bisect import bisect_left, bisect_right
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+from src.journal_pack import PACK_FILENAME, packed_dates, read_day
+from src.shard_delta import DELTA_COMPACT_BYTES, append_delta, delta_path, delta_stat, read_delta, remove_delta
+from src.utils.file_io import atomic_write
+from src.utils.serialization import decode, json_dumps, json_loads
+
+INDEX_FILENAME = "_index.json"
+INDEX_VERSION = 1
+
+MONTH_DIR_PATTERN = re.compile(r"^\d{4}-\d{2}$")
+DAY_FILE_PATTERN = re.compile(r"^(\d{4}-\d{2}-\d{2})\.json$")
+
+# Per-day logs whose contents are merged into the entry view
+SEGMENT_LOG_SUFFIX = ".segments.jsonl"
+CHAT_LOG_SUFFIX = ".chat.jsonl"
+
+def list_month_dirs(journal_dir: str,
+                    start_key: Optional[str] = None,
+                    end_key: Optional[str] = None) -> List[str]:
+    """
+    List the YYYY-MM directories of a journal that overlap a date range
+
+    Args:
+        journal_dir: The journal directory
+        start_key: Inclusive lower bound (YYYY-MM-DD), or None for no bound
+        end_key: Inclusive upper bound (YYYY-MM-DD), or None for no bound
+
+    Returns:
+        Month directory names in ascending order
+    """
+    try:
+        names = os.listdir(journal_dir)
+    except FileNotFoundError:
+        return []
+    start_month = start_key[:7] if start_key else None
+    end_month = end_key[:7] if end_key else None
+    return sorted(
+        name for name in names
+        if MONTH_DIR_PATTERN.match(name)
+        and (start_month is None or name >= start_month)
+        and (end_month is None or name <= end_month)
+        and os.path.isdir(os.path.join(journal_dir, name))
+    )
+
+def list_day_files(journal_dir: str,
+                   month: str,
+                   start_key: Optional[str] = None,
+                   end_key: Optional[str] = None) -> List[Tuple[str, str]]:
+    """
+    List the days of a month that fall inside a date range
+
+    The decision is made from the file names (and, for a packed month, the
+    pack's table) alone, so no entry is parsed. Packed days are listed under
+    the name their day file would have.
+
+    Args:
+        journal_dir: The journal directory
+        month: Month directory name (YYYY-MM)
+        start_key: Inclusive lower bound (YYYY-MM-DD), or None for no bound
+        end_key: Inclusive upper bound (YYYY-MM-DD), or None for no bound
+
+    Returns:
+        (date, file name) tuples in date order
+    """
+    month_dir = os.path.join(journal_dir, month)
+    try:
+        names = os.listdir(month_dir)
+    except FileNotFoundError:
+        return []
+    days = {}
+    if PACK_FILENAME in names:
+        for date_str in packed_dates(month_dir):
+            days[date_str] = f"{date_str}.json"
+    for name in names:
+        match = DAY_FILE_PATTERN.match(name)
+        if match:
+            days[match.group(1)] = name
+    return sorted(
+        (date_str, name) for date_str, name in days.items()
+        if not (start_key and date_str < start_key) and not (end_key and date_str > end_key)
+    )
+
+def month_is_current(journal_dir: str,
+                     month: str,
+                     dates: Iterable[str],
+                     mtime_ns: int,
+                     ignore: Set[str] = frozenset(),
+                     log_suffixes: Tuple[str, ...] = (SEGMENT_LOG_SUFFIX,),
+                     exact: bool = True) -> bool:
+    """
+    Check data derived from a month directory (an index shard, a rollup)
+
+    The data is stale if a day on disk is missing from it (or, when exact, it
+    covers days that are not on disk), or if a day file, log or pack was
+    written after it, e.g. after a crash between saving an entry and updating
+    the data, or when files were restored or synced from elsewhere.
+
+    Args:
+        journal_dir: The journal directory
+        month: Month directory name (YYYY-MM)
+        dates: Dates the data covers
+        mtime_ns: When the data was last written
+        ignore: Dates whose data the caller is about to replace
+        log_suffixes: Per-day logs the data is derived from
+        exact: Whether covering days that are not on disk makes the data stale
+
+    Returns:
+        True if the data matches the month directory
+    """
+    month_dir = os.path.join(journal_dir, month)
+    on_disk = {date_str for date_str, _ in list_day_files(journal_dir, month)} - ignore
+    covered = set(dates) - ignore
+    if not on_disk <= covered or (exact and covered - on_disk):
+        return False
+    try:
+        names = os.listdir(month_dir)
+    except FileNotFoundError:
+        return not covered
+    for name in names:
+        if name[:10] in ignore:
+            continue
+        if DAY_FILE_PATTERN.match(name) or name.endswith(log_suffixes) or name == PACK_FILENAME:
+            try:
+                if os.stat(os.path.join(month_dir, name)).st_mtime_ns > mtime_ns:
+                    return False
+            except FileNotFoundError:
+                continue
+    return True
+
+TAG_MODES = ("any", "all")
+
+class MonthPostings(NamedTuple):
+    """Sorted date lists of one month, per tag and per lowercased primary emotion"""
+    dates: List[str]
+    tags: Dict[str, List[str]]
+    emotions: Dict[str, List[str]]
+
+def build_postings(records: Dict[str, Dict]) -> MonthPostings:
+    """
+    Build the posting lists of a month shard
+
+    Args:
+        records: The month's index records by date
+
+    Returns:
+        The month's posting lists
+    """
+    dates = sorted(records)
+    tags: Dict[str, List[str]] = {}
+    emotions: Dict[str, List[str]] = {}
+    for date_str in dates:
+        record = records[date_str]
+        for tag in dict.fromkeys(record.get("tags") or []):
+            tags.setdefault(tag, []).append(date_str)
+        emotion = record.get("primary_emotion")
+        if isinstance(emotion, str):
+            emotions.setdefault(emotion.lower(), []).append(date_str)
+    return MonthPostings(dates, tags, emotions)
+
+def _count_in_range(dates: List[str], start_key: Optional[str], end_key: Optional[str]) -> int:
+    lo = bisect_left(dates, start_key) if start_key else 0
+    hi = bisect_right(dates, end_key) if end_key else len(dates)
+    return max(0, hi - lo)
+
+class JournalIndex:
+    """Month-sharded index of a single user's journal entries"""
+
+    def __init__(self, journal_dir: str, load_entry: Optional[Callable[[str, str], Optional[Dict]]] = None):
+        """
+        Initialize the index for a journal directory
+
+        Args:
+            journal_dir: The user's journal directory (containing YYYY-MM folders)
+            load_entry: Function (file path, date) -> entry used to rebuild months,
+                so segments appended after the day file are indexed too (defaults
+                to reading the day file alone)
+        """
+        self.journal_dir = journal_dir
+        self.load_entry = load_entry or (lambda file_path, date_str: decode(read_day(file_path, date_str)[1]))
+        # month -> (shard mtime_ns, month directory mtime_ns when last checked,
+        #           delta bytes applied, {date: record})
+        self._shards: Dict[str, Tuple[int, int, int, Dict[str, Dict]]] = {}
+        # month -> (records the postings were built from, postings)
+        self._postings: Dict[str, Tuple[Dict[str, Dict], MonthPostings]] = {}
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def make_record(entry: Dict, rel_path: str) -> Dict:
+        """
+        Build the index record for an entry
+
+        Args:
+            entry: The journal entry
+            rel_path: Path of the entry file relative to the journal directory
+
+        Returns:
+            Index record with the fields used for filtering
+        """
+        emotion_analysis = entry.get("emotion_analysis") or {}
+        content = entry.get("content") or {}
+        metadata = entry.get("metadata") or {}
+        primary_emotion = emotion_analysis.get("primary_emotion") if isinstance(emotion_analysis, dict) else None
+        return {
+            "path": rel_path,
+            "primary_emotion": primary_emotion,
+            "tags": list(content.get("tags") or []),
+            "word_count": metadata.get("word_count", 0),
+            "last_modified": metadata.get("last_modified")
+        }
+
+    def months(self, start_key: Optional[str] = None, end_key: Optional[str] = None) -> List[str]:
+        """List the month directories overlapping a date range in ascending order"""
+        return list_month_dirs(self.journal_dir, start_key, end_key)
+
+    def _shard_path(self, month: str) -> str:
+        return os.path.join(self.journal_dir, month, INDEX_FILENAME)
+
+    def _delta_path(self, month: str) -> str:
+        return delta_path(self._shard_path(month))
+
+    def _load_shard(self, month: str, updating: Set[str] = frozenset()) -> Dict[str, Dict]:
+        """
+        Load a month shard with its delta, rebuilding it if it is missing, unreadable or stale
+
+        Lines appended to the delta since the last load are applied on top.
+        The month directory is only compared with the shard when its mtime
+        changed since the last check (a file was added, removed or replaced),
+        so repeated loads cost three stat calls.
+
+        Args:
+            month: Month directory name (YYYY-MM)
+            updating: Dates the caller is about to update in the shard, whose
+                files may already be newer than it
+        """
+        shard_path = self._shard_path(month)
+        with self._lock:
+            try:
+                mtime_ns = os.stat(shard_path).st_mtime_ns
+                dir_mtime_ns = os.stat(os.path.dirname(shard_path)).st_mtime_ns
+            except FileNotFoundError:
+                return self.rebuild_month(month)
+            delta_size, delta_mtime_ns = delta_stat(self._delta_path(month))
+
+            cached = self._shards.get(month)
+            if cached and cached[0] == mtime_ns and cached[1] == dir_mtime_ns and cached[2] == delta_size:
+                return cached[3]
+
+            if cached and cached[0] == mtime_ns and cached[2] <= delta_size:
+                offset, records = cached[2], cached[3]
+            else:
+                cached = None
+                try:
+                    with open(shard_path, 'rb') as f:
+                        data = json_loads(f.read())
+                    records = data.get("entries", {})
+                    offset = min(data.get("delta_offset", 0), delta_size)
+                except (ValueError, OSError) as e:
+                    print(f"Error reading index {shard_path}: {str(e)}")
+                    return self.rebuild_month(month)
+
+            if delta_size > offset:
+                changes, offset = read_delta(self._delta_path(month), offset)
+                if changes:
+                    records = dict(records)
+                    for change in changes:
+                        records[change["date"]] = change["record"]
+
+            if not (cached and cached[1] == dir_mtime_ns) and \
+                    not month_is_current(self.journal_dir, month, records, max(mtime_ns, delta_mtime_ns), updating):
+                print(f"Index {shard_path} is out of date, rebuilding")
+                return self.rebuild_month(month)
+
+            self._shards[month] = (mtime_ns, dir_mtime_ns, offset, records)
+            return records
+
+    def _store_shard(self, month: str, records: Dict[str, Dict], delta_offset: Optional[int] = None) -> None:
+        """
+        Persist a month shard and refresh the in-memory copy
+
+        Args:
+            month: Month directory name (YYYY-MM)
+            records: The month's records
+            delta_offset: Bytes of the delta the records include, or None if
+                they include all of it (the delta is then removed)
+        """
+        shard_path = self._shard_path(month)
+        os.makedirs(os.path.dirname(shard_path), exist_ok=True)
+        # The index can be rebuilt from the entries, so skip the fsync
+        atomic_write(
+            shard_path,
+            json_dumps({"version": INDEX_VERSION, "entries": records, "delta_offset": delta_offset or 0}),
+            fsync=False
+        )
+        if delta_offset is None:
+            remove_delta(self._delta_path(month))
+        # Written under the lock after the entries, so the directory is known to match
+        self._shards[month] = (os.stat(shard_path).st_mtime_ns,
+                               os.stat(os.path.dirname(shard_path)).st_mtime_ns, delta_offset or 0, records)
+
+    def rebuild_month(self, month: str) -> Dict[str, Dict]:
+        """
+        Rebuild the shard of one month from the entry files on disk
+
+        Args:
+            month: Month directory name (YYYY-MM)
+
+        Returns:
+            The rebuilt records of that month
+        """
+        month_dir = os.path.join(self.journal_dir, month)
+        records = {}
+        with self._lock:
+            if not os.path.isdir(month_dir):
+                return records
+
+            # The entries include the segments the delta was appended for
+            delta_offset = delta_stat(self._delta_path(month))[0]
+            for date_str, name in list_day_files(self.journal_dir, month):
+                file_path = os.path.join(month_dir, name)
+                try:
+                    entry = self.load_entry(file_path, date_str)
+                except Exception as e:
+                    print(f"Error reading entry {file_path}: {str(e)}")
+                    continue
+                if entry is None:
+                    continue
+                records[date_str] = self.make_record(entry, f"{month}/{name}")
+
+            self._store_shard(month, records, delta_offset)
+        return records
+
+    def rebuild(self) -> int:
+        """
+        Rebuild the whole index from the entry files on disk
+
+        Returns:
+            Number of indexed entries
+        """
+        with self._lock:
+            self._shards.clear()
+            self._postings.clear()
+            return sum(len(self.rebuild_month(month)) for month in self.months())
+
+    def update(self, entry: Dict, rel_path: str) -> None:
+        """
+        Add or replace the record of an entry
+
+        Args:
+            entry: The saved journal entry
+            rel_path: Path of the entry file relative to the journal directory
+        """
+        self.update_many([(entry, rel_path)])
+
+    def update_many(self, items: List[Tuple[Dict, str]]) -> None:
+        """
+        Add or replace the records of several entries, writing each month shard once
+
+        Args:
+            items: (entry, path relative to the journal directory) pairs
+        """
+        by_month: Dict[str, List[Tuple[Dict, str]]] = {}
+        for entry, rel_path in items:
+            by_month.setdefault(entry["date"][:7], []).append((entry, rel_path))
+        with self._lock:
+            for month, month_items in by_month.items():
+                records = dict(self._load_shard(month, {entry["date"] for entry, _ in month_items}))
+                for entry, rel_path in month_items:
+                    records[entry["date"]] = self.make_record(entry, rel_path)
+                self._store_shard(month, records)
+
+    def replace_month(self, month: str, items: List[Tuple[Dict, str]]) -> None:
+        """
+        Store a month shard built from all of the month's entries
+
+        Used when the caller has every entry of the month at hand (packing a
+        month), so the shard is written without loading the old one.
+
+        Args:
+            month: Month directory name (YYYY-MM)
+            items: (entry, path relative to the journal directory) pairs
+        """
+        with self._lock:
+            self._store_shard(month, {entry["date"]: self.make_record(entry, rel_path) for entry, rel_path in items})
+
+    def append(self, entry: Dict, rel_path: str) -> None:
+        """
+        Replace the record of an entry by appending it to the month's delta
+
+        Used for later saves of a day, so the cost does not depend on the size
+        of the month; the delta is folded into the shard once it grows past
+        DELTA_COMPACT_BYTES. Callers must serialize writes (JournalManager
+        holds its write lock).
+
+        Args:
+            entry: The merged view of the saved entry
+            rel_path: Path of the entry file relative to the journal directory
+        """
+        month = entry["date"][:7]
+        record = self.make_record(entry, rel_path)
+        with self._lock:
+            start, end = append_delta(self._delta_path(month), [{"date": entry["date"], "record": record}])
+            cached = self._shards.get(month)
+            if cached and cached[2] == start:
+                records = dict(cached[3])
+                records[entry["date"]] = record
+                self._shards[month] = (cached[0], cached[1], end, records)
+            if end >= DELTA_COMPACT_BYTES:
+                self._store_shard(month, dict(self._load_shard(month)))
+
+    def remove(self, date_str: str) -> None:
+        """Remove the record of a date from the index"""
+        month = date_str[:7]
+        with self._lock:
+            records = dict(self._load_shard(month, {date_str}))
+            if records.pop(date_str, None) is not None:
+                self._store_shard(month, records)
+
+    def get(self, date_str: str) -> Optional[Dict]:
+        """Get the index record for a date, if any"""
+        if not os.path.isdir(os.path.join(self.journal_dir, date_str[:7])):
+            return None
+        return self._load_shard(date_str[:7]).get(date_str)
+
+    def records(self,
+                start_key: Optional[str] = None,
+                end_key: Optional[str] = None) -> Iterator[Tuple[str, Dict]]:
+        """
+        Iterate over index records in date order
+
+        Args:
+            start_key: Inclusive lower bound (YYYY-MM-DD)
+            end_key: Inclusive upper bound (YYYY-MM-DD)
+
+        Yields:
+            (date, record) tuples
+        """
+        for month in self.months(start_key, end_key):
+            records = self._load_shard(month)
+            for date_str in sorted(records):
+                if start_key and date_str < start_key:
+                    continue
+                if end_key and date_str > end_key:
+                    break
+                yield date_str, records[date_str]
+
+    def postings(self, month: str) -> MonthPostings:
+        """Get the posting lists of a month, rebuilding them when its shard changed"""
+        with self._lock:
+            records = self._load_shard(month)
+            cached = self._postings.get(month)
+            if cached is None or cached[0] is not records:
+                cached = (records, build_postings(records))
+                self._postings[month] = cached
+            return cached[1]
+
+    def _match_month(self,
+                     postings: MonthPostings,
+                     tags: Optional[List[str]],
+                     emotion: Optional[str],
+                     tag_mode: str) -> List[str]:
+        """Intersect the posting lists of a month; returns matching dates in order"""
+        if not tags and not emotion:
+            return postings.dates
+        sets: List[Set[str]] = []
+        if tags:
+            tag_lists = [postings.tags.get(tag, []) for tag in dict.fromkeys(tags)]
+            if tag_mode == "all":
+                sets.extend(set(dates) for dates in tag_lists)
+            else:
+                sets.append(set().union(*tag_lists))
+        if emotion:
+            sets.append(set(postings.emotions.get(emotion.lower(), [])))
+        sets.sort(key=len)
+        return sorted(sets[0].intersection(*sets[1:]))
+
+    def query(self,
+              start_key: Optional[str] = None,
+              end_key: Optional[str] = None,
+              tags: Optional[List[str]] = None,
+              emotion: Optional[str] = None,
+              tag_mode: str = "any",
+              descending: bool = False) -> Iterator[Tuple[str, Dict]]:
+        """
+        Iterate over the records matching a date range, tags and emotion
+
+        Args:
+            start_key: Inclusive lower bound (YYYY-MM-DD)
+            end_key: Inclusive upper bound (YYYY-MM-DD)
+            tags: Match entries having any (or all) of these tags
+            emotion: Match entries with this primary emotion (case-insensitive)
+            tag_mode: "any" to match entries with at least one of the tags,
+                "all" to match entries with every tag
+            descending: Yield the newest records first
+
+        Yields:
+            (date, record) tuples
+        """
+        if tag_mode not in TAG_MODES:
+            raise ValueError(f"Unknown tag mode: {tag_mode} (expected 'any' or 'all')")
+        months = self.months(start_key, end_key)
+        for month in reversed(months) if descending else months:
+            with self._lock:
+                records = self._load_shard(month)
+                dates = self._match_month(self.postings(month), tags, emotion, tag_mode)
+            for date_str in reversed(dates) if descending else dates:
+                if (start_key and date_str < start_key) or (end_key and date_str > end_key):
+                    continue
+                yield date_str, records[date_str]
+
+    def facets(self,
+               start_key: Optional[str] = None,
+               end_key: Optional[str] = None,
+               tags: Optional[List[str]] = None,
+               emotion: Optional[str] = None,
+               tag_mode: str = "any") -> Dict[str, Dict[str, int]]:
+        """
+        Count the matching entries per tag and per primary emotion
+
+        Args:
+            start_key: Inclusive lower bound (YYYY-MM-DD)
+            end_key: Inclusive upper bound (YYYY-MM-DD)
+            tags: Only count entries having any (or all) of these tags
+            emotion: Only count entries with this primary emotion
+            tag_mode: "any" or "all", as in query
+
+        Returns:
+            {"tags": {tag: count}, "emotions": {lowercased emotion: count}}
+        """
+        tag_counts: Dict[str, int] = {}
+        emotion_counts: Dict[str, int] = {}
+        if tags or emotion:
+            for _, record in self.query(start_key, end_key, tags, emotion, tag_mode):
+                for tag in dict.fromkeys(record.get("tags") or []):
+                    tag_counts[tag] = tag_counts.get(tag, 0) + 1
+                primary_emotion = record.get("primary_emotion")
+                if isinstance(primary_emotion, str):
+                    emotion_counts[primary_emotion.lower()] = emotion_counts.get(primary_emotion.lower(), 0) + 1
+        else:
+            # Without filters the counts are just posting list lengths
+            for month in self.months(start_key, end_key):
+                postings = self.postings(month)
+                for counts, lists in ((tag_counts, postings.tags), (emotion_counts, postings.emotions)):
+                    for key, dates in lists.items():
+                        count = _count_in_range(dates, start_key, end_key)
+                        if count:
+                            counts[key] = counts.get(key, 0) + count
+        return {"tags": tag_counts, "emotions": emotion_counts}
@@ -3,34 +3,276 @@ Journal Manager Module
 Handles creating, saving, and managing journal entries with bullet journal features.
 """
 
-import json
 import os
-from datetime import datetime
-from typing import Dict, List, Optional
-from pathlib import Path
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from itertools import islice
+from typing import Any, BinaryIO, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from src.change_log import ChangeLog
+from src.entry_cache import EntryCache, entry_cache
+from src.journal_index import DAY_FILE_PATTERN, TAG_MODES, JournalIndex, list_day_files, list_month_dirs
+from src.journal_pack import has_day, pack_path, read_day, read_table, write_pack
+from src.journal_rollup import JournalRollup, summarize_stats
+from src.text_index import TextIndex, chat_message_text, entry_texts, make_snippet, parse_query
+from src.utils.file_io import atomic_write, fsync_paths, get_file_lock, open_stream
+from src.utils.serialization import Codec, decode, get_codec, json_dumps, json_loads
+from src.utils.user_paths import USERS_DIR, ensure_dir, user_dir
+
+# Chat log tuning: fsync after this many appends or seconds, and fold the log
+# into the entry once it grows past this many bytes
+CHAT_FSYNC_EVERY = 16
+CHAT_FSYNC_INTERVAL = 2.0
+CHAT_COMPACT_BYTES = 64 * 1024
+
+# Fold a day's segment log into its entry once it holds this many segments
+SEGMENT_COMPACT_COUNT = 32
+
+# Per-day append-only logs kept next to the entry files
+LOG_SUFFIXES = (".chat.jsonl", ".segments.jsonl")
+
+# Entry fields reported as changed when a whole entry is written
+ENTRY_FIELDS = ["content.text", "content.tasks", "content.goals", "content.tags",
+                "content.chat_history", "content.ai_summary", "emotion_analysis"]
+
+# Changes passed to a consume_changes handler per call
+CHANGE_BATCH_SIZE = 500
+
+# Months that ended more than this many days ago are packed by pack_cold_months
+PACK_AFTER_DAYS = 90
+
+# Entries written per batch (one lock hold, one index update per month) on import
+IMPORT_BATCH_SIZE = 500
+
+# Single background worker that folds chat and segment logs into their entries
+_compaction_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="chat-compaction")
+
+# Projectable fields that the entry index stores, with their index record key
+INDEX_FIELDS = {
+    "emotion_analysis.primary_emotion": "primary_emotion",
+    "content.tags": "tags",
+    "metadata.word_count": "word_count",
+    "metadata.last_modified": "last_modified"
+}
+
+def _set_path(target: Dict, path: Sequence[str], value: Any) -> None:
+    for key in path[:-1]:
+        target = target.setdefault(key, {})
+    target[path[-1]] = value
+
+def project_entry(entry: Dict, fields: Sequence[str]) -> Dict:
+    """
+    Keep only the given fields of an entry
+    
+    Args:
+        entry: A full journal entry
+        fields: Dotted field paths, e.g. ["date", "emotion_analysis.primary_emotion"]
+        
+    Returns:
+        A new dictionary with the same nesting, holding only the requested fields
+    """
+    projected = {}
+    for field in fields:
+        path = field.split(".")
+        value = entry
+        for key in path:
+            if not isinstance(value, dict) or key not in value:
+                break
+            value = value[key]
+        else:
+            _set_path(projected, path, value)
+    return projected
+
+def entry_matches(entry: Dict,
+                  tags: Optional[List[str]] = None,
+                  emotion: Optional[str] = None,
+                  tag_mode: str = "any") -> bool:
+    """
+    Test an entry against tag and emotion filters
+    
+    Args:
+        entry: A journal entry
+        tags: Tags to look for
+        emotion: Primary emotion to look for (case-insensitive)
+        tag_mode: "any" to require one of the tags, "all" to require every tag
+        
+    Returns:
+        True if the entry passes the filters
+    """
+    if tag_mode not in TAG_MODES:
+        raise ValueError(f"Unknown tag mode: {tag_mode} (expected 'any' or 'all')")
+    if tags:
+        entry_tags = (entry.get('content') or {}).get('tags') or []
+        check = all if tag_mode == "all" else any
+        if not check(tag in entry_tags for tag in tags):
+            return False
+    if emotion:
+        primary_emotion = (entry.get('emotion_analysis') or {}).get('primary_emotion')
+        if not isinstance(primary_emotion, str) or primary_emotion.lower() != emotion.lower():
+            return False
+    return True
+
+def _dedupe(items: List[Any]) -> List[Any]:
+    """Drop repeated items (compared by value), keeping the first occurrence"""
+    seen = set()
+    unique = []
+    for item in items:
+        key = json_dumps(item)
+        if key not in seen:
+            seen.add(key)
+            unique.append(item)
+    return unique
+
+def _segment_info(segment_id: str, timestamp: str, emotion_analysis: Dict, text: str) -> Dict:
+    """Describe one save of a day for the entry's metadata"""
+    return {
+        "id": segment_id,
+        "timestamp": timestamp,
+        "emotion_analysis": emotion_analysis or {},
+        "word_count": len((text or "").split())
+    }
+
+def merge_segment(entry: Dict, segment: Dict) -> Dict:
+    """
+    Fold one saved segment into the merged view of a day, in place
+    
+    New text goes before the existing text, the segment's analysis is merged
+    over the previous one, and tags, tasks and goals are deduplicated.
+    Segments already listed in the entry's metadata are skipped, so a log
+    that survived a crash during compaction is not applied twice.
+    
+    Args:
+        entry: The day's entry (merged view so far)
+        segment: A record from the day's segment log
+        
+    Returns:
+        The updated entry
+    """
+    metadata = entry.setdefault('metadata', {})
+    segments = metadata.setdefault('segments', [])
+    if any(info.get('id') == segment.get('id') for info in segments):
+        return entry
+    
+    content = entry.setdefault('content', {})
+    text = (segment.get('text') or "").replace("\n", "\\n").replace('[', '').replace(']', '')
+    content['text'] = text + " \n " + (content.get('text') or "")
+    
+    emotion_analysis = dict(entry.get('emotion_analysis') or {})
+    emotion_analysis.update(segment.get('emotion_analysis') or {})
+    entry['emotion_analysis'] = emotion_analysis
+    
+    content['tasks'] = _dedupe(list(segment.get('tasks') or []) + list(content.get('tasks') or []))
+    content['goals'] = _dedupe(list(segment.get('goals') or []) + list(content.get('goals') or []))
+    content['tags'] = list(dict.fromkeys(list(segment.get('tags') or []) + list(content.get('tags') or [])))
+    content['chat_history'] = list(content.get('chat_history') or []) + list(segment.get('chat_history') or [])
+    if segment.get('ai_summary'):
+        content['ai_summary'] = segment['ai_summary']
+    
+    metadata['word_count'] = len(content['text'].split())
+    metadata['has_tasks'] = bool(content['tasks'])
+    metadata['has_goals'] = bool(content['goals'])
+    metadata['has_chat_history'] = bool(content['chat_history'])
+    metadata['has_ai_summary'] = bool(content.get('ai_summary'))
+    metadata['last_modified'] = segment.get('timestamp')
+    segments.append(_segment_info(segment.get('id'), segment.get('timestamp'),
+                                  segment.get('emotion_analysis'), segment.get('text')))
+    return entry
+
+class ConcurrentModificationError(Exception):
+    """Raised when an entry changed since the version the caller read"""
+
+def _date_key_bounds(start_date: datetime, end_date: datetime) -> Tuple[str, str]:
+    """
+    Convert a datetime range into inclusive YYYY-MM-DD bounds
+
+    Entries are dated at midnight, so a start time later than midnight
+    excludes the entry of that day.
+    """
+    start_day = start_date.date()
+    if start_date.time() != datetime.min.time():
+        start_day += timedelta(days=1)
+    return start_day.isoformat(), end_date.date().isoformat()
 
 class JournalManager:
-    def __init__(self, journal_dir: str = "journals", user_id: Optional[str] = None):
-        """Initialize the journal manager"""
+    # Entries are separate files, so several can be read at the same time
+    parallel_reads = True
+
+    def __init__(self,
+                 journal_dir: str = "journals",
+                 user_id: Optional[str] = None,
+                 use_index: bool = True,
+                 storage_format: Optional[str] = None,
+                 users_dir: str = USERS_DIR):
+        """
+        Initialize the journal manager
+        
+        Args:
+            journal_dir: Journal directory name
+            user_id: Optional user ID for user-specific storage
+            use_index: Answer queries from the entry index; when False, queries
+                scan only the month directories and day files inside the range
+            storage_format: Codec for new entry writes ("json", "json-pretty" or
+                "msgpack"; defaults to BUJONOW_ENTRY_FORMAT). Existing files in
+                any format are read transparently.
+            users_dir: Root directory holding all user data (used with user_id)
+        """
         self.base_journal_dir = journal_dir
         self.user_id = user_id
+        self.use_index = use_index
+        self.codec: Codec = get_codec(storage_format)
         
         # If user_id is provided, use a user-specific directory
         if user_id:
-            self.journal_dir = os.path.join("users", user_id, journal_dir)
+            self.journal_dir = os.path.join(user_dir(user_id, users_dir), journal_dir)
         else:
             self.journal_dir = journal_dir
             
+        self.cache: EntryCache = entry_cache
+        self._cache_scope = os.path.abspath(self.journal_dir)
+        # Serializes writes to this journal across threads and worker processes
+        self.lock = get_file_lock(os.path.join(self.journal_dir, ".lock"))
+        # chat log path -> (appends since last fsync, time of last fsync)
+        self._chat_pending: Dict[str, Tuple[int, float]] = {}
+        # segment log path -> number of segments in it
+        self._segment_counts: Dict[str, int] = {}
+            
         self._ensure_journal_dir()
+        self.changes = ChangeLog(self.journal_dir)
+        self._init_storage()
 
     def _ensure_journal_dir(self):
         """Ensure the journal directory exists"""
-        Path(self.journal_dir).mkdir(parents=True, exist_ok=True)
+        ensure_dir(self.journal_dir)
+
+    def _init_storage(self):
+        """Set up the storage structures of this backend"""
+        self.index = JournalIndex(
+            self.journal_dir,
+            lambda file_path, date_str: self._load_entry_file(file_path, date_str, merge_chat=False, cache_fill=False)
+        )
+        self.text_index = TextIndex(
+            self.journal_dir,
+            lambda file_path, date_str: self._load_entry_file(file_path, date_str, cache_fill=False)
+        )
+        self.rollup = JournalRollup(
+            self.journal_dir,
+            lambda file_path, date_str: self._load_entry_file(file_path, date_str, merge_chat=False, cache_fill=False)
+        )
 
     def _get_journal_path(self, date: datetime) -> str:
         """Get the path for a journal file based on date"""
         return os.path.join(self.journal_dir, f"{date.strftime('%Y-%m')}", f"{date.strftime('%Y-%m-%d')}.json")
 
+    def _get_segment_log_path(self, date: datetime) -> str:
+        """Get the path of the append-only log of saves made after the entry was created"""
+        return os.path.join(self.journal_dir, f"{date.strftime('%Y-%m')}", f"{date.strftime('%Y-%m-%d')}.segments.jsonl")
+
+    def _get_chat_log_path(self, date: datetime) -> str:
+        """Get the path of the append-only chat log for a date"""
+        return os.path.join(self.journal_dir, f"{date.strftime('%Y-%m')}", f"{date.strftime('%Y-%m-%d')}.chat.jsonl")
+
     def create_entry(self, 
                     text: str, 
                     emotion_analysis: Dict,
@@ -65,9 +307,10 @@ class JournalManager:
             date = datetime.now()
 
         # Create entry structure
+        now = datetime.now().isoformat()
         entry = {
             "date": date.strftime("%Y-%m-%d"),
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": now,
             "category": category,
             "content": {
                 "text": text,
@@ -79,17 +322,20 @@ class JournalManager:
             },
             "emotion_analysis": emotion_analysis,
             "metadata": {
-                "last_modified": datetime.now().isoformat(),
+                "last_modified": now,
                 "word_count": len(text.split()),
                 "has_tasks": bool(tasks),
                 "has_goals": bool(goals),
                 "has_chat_history": bool(chat_history),
-                "has_ai_summary": bool(ai_summary)
+                "has_ai_summary": bool(ai_summary),
+                "segments": [_segment_info(uuid.uuid4().hex, now, emotion_analysis, text)]
             }
         }
 
         # Save the entry
-        self._save_entry(entry, date)
+        with self.lock:
+            self._record_changes([(entry["date"], "create", ENTRY_FIELDS)])
+            self._save_entry(entry, date)
         return entry
 
     def _save_entry(self, entry: Dict, date: datetime):
@@ -99,19 +345,626 @@ class JournalManager:
         # Ensure the directory exists
         os.makedirs(os.path.dirname(file_path), exist_ok=True)
         
-        # Save the entry
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(entry, f, indent=2, ensure_ascii=False)
+        cache_key = (self._cache_scope, entry["date"])
+        with self.lock:
+            # Write to a temporary file and rename, so a crash never truncates the entry
+            self.cache.invalidate(cache_key)
+            atomic_write(file_path, self.codec.encode(entry))
+            
+            # Keep the index in step with the entry file
+            self.index.update(entry, os.path.relpath(file_path, self.journal_dir).replace(os.sep, '/'))
+            self.text_index.update(entry)
+            self.rollup.update(entry)
+            
+            # Our own write is the freshest copy; cache it under the new file signature
+            # (the segment log it includes is removed below)
+            st = os.stat(file_path)
+            self.cache.put(cache_key, (st.st_mtime_ns, st.st_size, 0), entry, st.st_size)
+            
+            # Entries are always saved from the merged view, so the logs are now folded in
+            self._remove_chat_log(date)
+            self._remove_segment_log(date)
 
-    def get_entry(self, date: datetime) -> Optional[Dict]:
-        """Retrieve a journal entry for a specific date"""
-        file_path = self._get_journal_path(date)
+    def _load_entry_file(self,
+                         file_path: str,
+                         date_str: str,
+                         merge_chat: bool = True,
+                         cache_fill: bool = True) -> Optional[Dict]:
+        """
+        Load an entry file through the entry cache
+        
+        Args:
+            file_path: Path of the entry file
+            date_str: Date of the entry (YYYY-MM-DD)
+            merge_chat: Whether to merge the day's chat log into the entry
+            cache_fill: Whether to add the entry to the cache on a miss
+            
+        Returns:
+            The parsed entry, or None if the file does not exist
+        """
+        month_dir = os.path.dirname(file_path)
+        signature = self._entry_signature(file_path, date_str)
+        if signature is None:
+            return None
+        
+        # The cache holds the day with its segments merged, keyed on the segment log's size too
+        cache_key = (self._cache_scope, date_str)
+        entry = self.cache.get(cache_key, signature)
+        if entry is None:
+            loaded = read_day(file_path, date_str)
+            if loaded is None:
+                return None
+            file_signature, raw = loaded
+            entry = decode(raw)
+            for segment in self._read_log(os.path.join(month_dir, f"{date_str}.segments.jsonl")):
+                merge_segment(entry, segment)
+            if cache_fill:
+                self.cache.put(cache_key, file_signature + signature[2:], entry, len(raw) + signature[2])
+        
+        if not merge_chat:
+            return entry
+        return self._merge_chat_log(entry, os.path.join(month_dir, f"{date_str}.chat.jsonl"))
+
+    def _entry_signature(self, file_path: str, date_str: str) -> Optional[Tuple[int, int, int]]:
+        """
+        Get the cache signature of a day: (mtime_ns, size) of its day file (or
+        its month's pack) and the size of its segment log
+        
+        Returns:
+            The signature, or None if the day has neither a day file nor a pack
+        """
+        month_dir = os.path.dirname(file_path)
+        try:
+            st = os.stat(file_path)
+        except FileNotFoundError:
+            # Days of a packed month are read from the pack unless saved again since
+            try:
+                st = os.stat(pack_path(month_dir))
+            except FileNotFoundError:
+                return None
+        try:
+            segments_size = os.path.getsize(os.path.join(month_dir, f"{date_str}.segments.jsonl"))
+        except FileNotFoundError:
+            segments_size = 0
+        return st.st_mtime_ns, st.st_size, segments_size
+
+    def _read_log(self, log_path: str) -> List[Dict]:
+        """Read the records of a chat or segment log, skipping a torn last line"""
+        messages = []
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            with open(log_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        messages.append(json_loads(line))
+                    except ValueError:
+                        print(f"Skipping unreadable log line in {log_path}")
         except FileNotFoundError:
+            pass
+        return messages
+
+    def _merge_chat_log(self, entry: Dict, log_path: str) -> Dict:
+        """Append the messages of a day's chat log to the entry view"""
+        messages = self._read_log(log_path)
+        if not messages:
+            return entry
+        
+        chat_history = entry.setdefault('content', {}).setdefault('chat_history', [])
+        # A crash between saving a compacted entry and removing its log leaves
+        # messages that are already in the entry; don't show them twice
+        if chat_history[-len(messages):] != messages:
+            chat_history.extend(messages)
+        entry.setdefault('metadata', {})['has_chat_history'] = True
+        return entry
+
+    def _remove_chat_log(self, date: datetime) -> None:
+        """Delete a day's chat log once its messages are stored in the entry"""
+        log_path = self._get_chat_log_path(date)
+        with self.lock:
+            self._chat_pending.pop(log_path, None)
+            try:
+                os.remove(log_path)
+            except FileNotFoundError:
+                pass
+
+    def _remove_segment_log(self, date: datetime) -> None:
+        """Delete a day's segment log once its segments are stored in the entry"""
+        log_path = self._get_segment_log_path(date)
+        with self.lock:
+            self._segment_counts.pop(log_path, None)
+            try:
+                os.remove(log_path)
+            except FileNotFoundError:
+                pass
+
+    def _append_segment(self, date: datetime, segment: Dict) -> Dict:
+        """
+        Append a save to a day's segment log and refresh the indexes
+        
+        The merged view of the day is taken from the entry cache and the
+        segment is merged into it, and the indexes and rollup get the day's
+        new record through their month deltas, so a save costs the size of
+        the segment rather than of the day or the month.
+        
+        Args:
+            date: Day of the entry (which must exist)
+            segment: The segment record
+            
+        Returns:
+            The merged view of the day
+        """
+        log_path = self._get_segment_log_path(date)
+        file_path = self._get_journal_path(date)
+        date_str = date.strftime('%Y-%m-%d')
+        cache_key = (self._cache_scope, date_str)
+        with self.lock:
+            signature = self._entry_signature(file_path, date_str)
+            entry = self.cache.get(cache_key, signature) if signature else None
+            if entry is None:
+                entry = self._load_entry_file(file_path, date_str, merge_chat=False)
+            
+            with open(log_path, 'a', encoding='utf-8') as f:
+                f.write(json_dumps(segment) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+                segments_size = f.tell()
+            merge_segment(entry, segment)
+            if signature is not None:
+                self.cache.put(cache_key, signature[:2] + (segments_size,), entry, signature[1] + segments_size)
+            
+            self.index.append(entry, os.path.relpath(file_path, self.journal_dir).replace(os.sep, '/'))
+            self.text_index.add_texts(date_str, [segment.get("text") or "", " ".join(segment.get("tags") or [])] +
+                                      [text for message in segment.get("chat_history") or []
+                                       for text in chat_message_text(message)])
+            self.rollup.append(entry)
+            
+            count = self._segment_counts.get(log_path)
+            if count is None:
+                # First save of the day seen by this process; count the lines once
+                with open(log_path, 'rb') as f:
+                    count = sum(1 for line in f if line.strip())
+            else:
+                count += 1
+            self._segment_counts[log_path] = count
+            entry = self._merge_chat_log(entry, self._get_chat_log_path(date))
+        
+        if count >= SEGMENT_COMPACT_COUNT:
+            _compaction_executor.submit(self._compact_in_background, date)
+        return entry
+
+    def append_chat_message(self, message: Dict, date: Optional[datetime] = None) -> None:
+        """
+        Append one chat message to a day's chat log
+        
+        The message is written as one JSON line, so the cost does not depend on
+        how long the day's chat already is. Logs are fsynced in batches and
+        folded into the entry in the background once they grow large.
+        
+        Args:
+            message: Chat message dictionary
+            date: Day of the chat (defaults to now)
+        """
+        if date is None:
+            date = datetime.now()
+        log_path = self._get_chat_log_path(date)
+        line = json_dumps(message) + "\n"
+        
+        with self.lock:
+            # Synced with the chat log's own batched fsyncs
+            self._record_changes([(date.strftime('%Y-%m-%d'), "chat", ["content.chat_history"])], fsync=False)
+            os.makedirs(os.path.dirname(log_path), exist_ok=True)
+            with open(log_path, 'a', encoding='utf-8') as f:
+                f.write(line)
+                f.flush()
+                pending, last_sync = self._chat_pending.get(log_path, (0, time.monotonic()))
+                pending += 1
+                if pending >= CHAT_FSYNC_EVERY or time.monotonic() - last_sync >= CHAT_FSYNC_INTERVAL:
+                    os.fsync(f.fileno())
+                    pending, last_sync = 0, time.monotonic()
+                self._chat_pending[log_path] = (pending, last_sync)
+                size = f.tell()
+            self.text_index.add_texts(date.strftime('%Y-%m-%d'), chat_message_text(message))
+        
+        if size >= CHAT_COMPACT_BYTES:
+            _compaction_executor.submit(self._compact_in_background, date)
+
+    def flush_chat_logs(self) -> None:
+        """Fsync every chat log with appends that are not yet on stable storage"""
+        with self.lock:
+            for log_path, (pending, _) in list(self._chat_pending.items()):
+                if not pending:
+                    continue
+                try:
+                    with open(log_path, 'a', encoding='utf-8') as f:
+                        os.fsync(f.fileno())
+                except FileNotFoundError:
+                    pass
+                self._chat_pending[log_path] = (0, time.monotonic())
+
+    def close(self) -> None:
+        """
+        Release what this manager holds open, e.g. when its session is evicted
+        
+        Pending chat appends are fsynced. The manager stays usable and
+        reopens what it needs on the next call.
+        """
+        self.flush_chat_logs()
+
+    def compact_chat_log(self, date: datetime) -> bool:
+        """
+        Fold a day's chat and segment logs into its entry file
+        
+        Args:
+            date: Day whose logs should be compacted
+            
+        Returns:
+            True if a log was compacted
+        """
+        with self.lock:
+            if not os.path.exists(self._get_chat_log_path(date)) and \
+                    not os.path.exists(self._get_segment_log_path(date)):
+                return False
+            entry = self.get_entry(date)
+            if entry is None:
+                return False
+            entry['metadata']['last_modified'] = datetime.now().isoformat()
+            self._save_entry(entry, date)
+            return True
+
+    def _compact_in_background(self, date: datetime) -> None:
+        try:
+            self.compact_chat_log(date)
+        except Exception as e:
+            print(f"Error compacting logs for {date.strftime('%Y-%m-%d')}: {str(e)}")
+
+    def _read_entry_file(self, file_path: str) -> Optional[Dict]:
+        """Read an entry file, logging and skipping unreadable ones"""
+        try:
+            date_str = os.path.splitext(os.path.basename(file_path))[0]
+            return self._load_entry_file(file_path, date_str)
+        except Exception as e:
+            print(f"Error reading entry {file_path}: {str(e)}")
             return None
 
+    def cache_stats(self) -> Dict[str, int]:
+        """
+        Get the entry cache counters (shared by all journal managers)
+        
+        Returns:
+            Dictionary with hits, misses, evictions, invalidations and usage
+        """
+        return self.cache.stats()
+
+    def _scan_entries(self,
+                      start_key: Optional[str] = None,
+                      end_key: Optional[str] = None) -> List[Dict]:
+        """
+        Read the entries of a date range without the index
+        
+        Month directories and day files outside the range are skipped based on
+        their names, so only files inside the range are parsed.
+        """
+        entries = []
+        for month in list_month_dirs(self.journal_dir, start_key, end_key):
+            for _, name in list_day_files(self.journal_dir, month, start_key, end_key):
+                entry = self._read_entry_file(os.path.join(self.journal_dir, month, name))
+                if entry is not None:
+                    entries.append(entry)
+        return entries
+
+    def rebuild_index(self) -> int:
+        """
+        Rebuild the entry and text indexes and the monthly rollups from the files on disk
+        
+        Returns:
+            Number of indexed entries
+        """
+        self.text_index.rebuild()
+        self.rollup.rebuild()
+        return self.index.rebuild()
+
+    def migrate_format(self, storage_format: Optional[str] = None) -> int:
+        """
+        Rewrite every entry file with a codec
+        
+        Files already in the target encoding are left untouched. File names
+        stay the same, so the index and chat logs remain valid.
+        
+        Args:
+            storage_format: Target codec (defaults to this manager's codec)
+            
+        Returns:
+            Number of rewritten entry files
+        """
+        codec = get_codec(storage_format) if storage_format else self.codec
+        rewritten = 0
+        with self.lock:
+            for month in list_month_dirs(self.journal_dir):
+                try:
+                    packed = read_table(pack_path(os.path.join(self.journal_dir, month)))
+                except Exception as e:
+                    print(f"Error reading pack of {month}: {str(e)}")
+                    packed = None
+                if packed and packed[1].get("format") != codec.name:
+                    rewritten += self._pack_month(month, codec)
+                    continue
+                for date_str, name in list_day_files(self.journal_dir, month):
+                    file_path = os.path.join(self.journal_dir, month, name)
+                    if not os.path.exists(file_path):
+                        # Packed days are rewritten by repacking the month
+                        continue
+                    try:
+                        with open(file_path, 'rb') as f:
+                            raw = f.read()
+                        data = codec.encode(decode(raw))
+                    except Exception as e:
+                        print(f"Error migrating entry {file_path}: {str(e)}")
+                        continue
+                    if data == raw:
+                        continue
+                    self.cache.invalidate((self._cache_scope, date_str))
+                    atomic_write(file_path, data)
+                    rewritten += 1
+        return rewritten
+
+    def _record_changes(self, changes: List[Tuple[str, str, List[str]]], fsync: bool = True) -> None:
+        """
+        Append (date, op, fields) records to the change log
+        
+        Callers log a change under the write lock just before making it, in
+        the same locked section, so a crash in between leaves a change record
+        for an unchanged day (harmless to idempotent consumers) instead of a
+        change without a record.
+        """
+        with self.lock:
+            self.changes.append_many(changes, fsync=fsync)
+
+    def _completed_seq(self) -> int:
+        """
+        Get the last sequence number whose change has been made
+        
+        Changes are logged and made in one locked section, so once the write
+        lock is free every logged change has been saved.
+        """
+        with self.lock:
+            return self.changes.last_seq()
+
+    def get_changes(self, since_seq: int = 0, limit: Optional[int] = None) -> List[Dict]:
+        """
+        Get the changes made to the journal after a sequence number
+        
+        Every create, update, record, chat message and import appends a
+        record {"seq", "date", "op", "fields", "timestamp"} to the journal's
+        change log. Sequence numbers increase by one per change, so a replica
+        or derived index can catch up from the last number it has seen.
+        
+        Args:
+            since_seq: Return changes with a higher sequence number than this
+            limit: Optional maximum number of changes
+            
+        Returns:
+            Change records in sequence order
+        """
+        return self.changes.read(since_seq, limit, self._completed_seq())
+
+    def consume_changes(self,
+                        consumer: str,
+                        handler: Callable[[List[Dict]], None],
+                        batch_size: int = CHANGE_BATCH_SIZE) -> int:
+        """
+        Pass the changes a consumer has not processed yet to a handler
+        
+        The consumer's checkpoint is advanced after each batch the handler
+        returns from, so a batch that raises is delivered again on the next
+        call. Handlers should therefore be idempotent, e.g. re-read the
+        changed dates rather than apply deltas.
+        
+        Args:
+            consumer: Name under which the checkpoint is stored
+            handler: Function called with each batch of change records
+            batch_size: Maximum number of changes per batch
+            
+        Returns:
+            Number of changes processed
+        """
+        checkpoint = self.changes.get_checkpoint(consumer)
+        last_seq = self._completed_seq()
+        if checkpoint > last_seq:
+            # The change log was removed or replaced; start over
+            print(f"Checkpoint of {consumer} is ahead of the change log; replaying all changes")
+            checkpoint = 0
+        processed = 0
+        while True:
+            changes = self.changes.read(checkpoint, batch_size, last_seq)
+            if not changes:
+                return processed
+            handler(changes)
+            checkpoint = changes[-1]["seq"]
+            self.changes.set_checkpoint(consumer, checkpoint)
+            processed += len(changes)
+
+    def pack_cold_months(self, min_age_days: int = PACK_AFTER_DAYS) -> int:
+        """
+        Pack every month that ended more than min_age_days ago
+        
+        The day files and logs of each such month are folded into a single
+        compressed pack file (see journal_pack). Months that are already
+        packed are only repacked when entries were saved to them since.
+        
+        Args:
+            min_age_days: Minimum number of days since the end of a month
+            
+        Returns:
+            Number of entries packed
+        """
+        # A month is cold when its last day is before the cutoff
+        cutoff_month = (datetime.now() - timedelta(days=min_age_days)).strftime('%Y-%m')
+        packed = 0
+        for month in list_month_dirs(self.journal_dir):
+            if month >= cutoff_month:
+                continue
+            # Days with a day file or a log (logs without an entry are left alone)
+            loose = {name[:10] for name in os.listdir(os.path.join(self.journal_dir, month))
+                     if DAY_FILE_PATTERN.match(name) or name.endswith(LOG_SUFFIXES)}
+            if loose & {date_str for date_str, _ in list_day_files(self.journal_dir, month)}:
+                packed += self._pack_month(month)
+        return packed
+
+    def _pack_month(self, month: str, codec: Optional[Codec] = None) -> int:
+        """
+        Write all entries of a month into its pack and remove their day files and logs
+        
+        Args:
+            month: Month directory name (YYYY-MM)
+            codec: Codec to encode the packed entries with (defaults to this manager's codec)
+            
+        Returns:
+            Number of entries packed
+        """
+        codec = codec or self.codec
+        month_dir = os.path.join(self.journal_dir, month)
+        with self.lock:
+            entries = {}
+            merged = []
+            for date_str, name in list_day_files(self.journal_dir, month):
+                file_path = os.path.join(month_dir, name)
+                try:
+                    # The merged view, so the day's chat and segment logs are folded in
+                    entry = self._load_entry_file(file_path, date_str, cache_fill=False)
+                except Exception as e:
+                    print(f"Error reading entry {file_path}: {str(e)}")
+                    return 0
+                if entry is not None:
+                    entries[date_str] = codec.encode(entry)
+                    merged.append((entry, f"{month}/{name}"))
+            if not entries:
+                return 0
+            
+            # The pack must be durable before the files it replaces are removed
+            write_pack(pack_path(month_dir), entries, codec.name)
+            for date_str in entries:
+                date = datetime.strptime(date_str, '%Y-%m-%d')
+                self.cache.invalidate((self._cache_scope, date_str))
+                try:
+                    os.remove(self._get_journal_path(date))
+                except FileNotFoundError:
+                    pass
+                self._remove_chat_log(date)
+                self._remove_segment_log(date)
+            
+            # Store the month's shards again so they are newer than the pack and
+            # the first read does not take them for stale and decode the whole pack
+            self.index.replace_month(month, merged)
+            self.text_index.replace_month(month, [entry for entry, _ in merged])
+            self.rollup.replace_month(month, [entry for entry, _ in merged])
+            return len(entries)
+
+    def export_stream(self,
+                      target: Union[str, BinaryIO],
+                      compression: Optional[str] = None,
+                      start_date: Optional[datetime] = None,
+                      end_date: Optional[datetime] = None) -> int:
+        """
+        Write entries as NDJSON, one merged entry per line, in date order
+        
+        Entries are streamed, so memory use does not depend on the size of
+        the journal.
+        
+        Args:
+            target: Output path or binary file
+            compression: None, "gzip" or "zstd" (guessed from a .gz/.zst path)
+            start_date: Optional start of the range (unbounded if omitted)
+            end_date: Optional end of the range (unbounded if omitted)
+            
+        Returns:
+            Number of exported entries
+        """
+        count = 0
+        with open_stream(target, "wb", compression) as stream:
+            for entry in self.iter_entries(start_date=start_date, end_date=end_date):
+                stream.write(json_dumps(entry).encode('utf-8') + b"\n")
+                count += 1
+        return count
+
+    def import_stream(self,
+                      source: Union[str, BinaryIO],
+                      compression: Optional[str] = None,
+                      batch_size: int = IMPORT_BATCH_SIZE) -> int:
+        """
+        Read entries from NDJSON (as written by export_stream) into this journal
+        
+        Existing entries for the same dates are replaced. Entries are written
+        in batches, each synced to disk and indexed once per month.
+        
+        Args:
+            source: Input path or binary file
+            compression: None, "gzip" or "zstd" (guessed from a .gz/.zst path)
+            batch_size: Entries per batch
+            
+        Returns:
+            Number of imported entries
+        """
+        count = 0
+        batch = []
+        with open_stream(source, "rb", compression) as stream:
+            for line_number, line in enumerate(stream, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json_loads(line)
+                    if not DAY_FILE_PATTERN.match(f"{entry['date']}.json"):
+                        raise ValueError(f"invalid date {entry['date']!r}")
+                except (ValueError, KeyError, TypeError) as e:
+                    print(f"Skipping unreadable entry on line {line_number}: {str(e)}")
+                    continue
+                batch.append(entry)
+                if len(batch) >= batch_size:
+                    count += self._import_logged_batch(batch)
+                    batch = []
+        if batch:
+            count += self._import_logged_batch(batch)
+        return count
+
+    def _import_logged_batch(self, entries: List[Dict]) -> int:
+        """Log and write a batch of imported entries in one locked section"""
+        with self.lock:
+            self._record_changes([(entry["date"], "import", ENTRY_FIELDS) for entry in entries])
+            return self._import_batch(entries)
+
+    def _import_batch(self, entries: List[Dict]) -> int:
+        """Write a batch of imported entries and update the indexes once per month"""
+        written = []
+        paths = []
+        with self.lock:
+            for entry in entries:
+                date = datetime.strptime(entry["date"], '%Y-%m-%d')
+                file_path = self._get_journal_path(date)
+                self.cache.invalidate((self._cache_scope, entry["date"]))
+                # Synced below for the whole batch
+                atomic_write(file_path, self.codec.encode(entry), fsync=False)
+                self._remove_chat_log(date)
+                self._remove_segment_log(date)
+                paths.append(file_path)
+                written.append((entry, os.path.relpath(file_path, self.journal_dir).replace(os.sep, '/')))
+            fsync_paths(paths)
+            
+            self.index.update_many(written)
+            self.text_index.update_many(entries)
+            self.rollup.update_many(entries)
+        return len(written)
+
+    def has_entry(self, date: datetime) -> bool:
+        """Check whether an entry exists for a date without reading it"""
+        return has_day(self._get_journal_path(date), date.strftime('%Y-%m-%d'))
+
+    def get_entry(self, date: datetime) -> Optional[Dict]:
+        """Retrieve a journal entry for a specific date"""
+        file_path = self._get_journal_path(date)
+        return self._load_entry_file(file_path, date.strftime('%Y-%m-%d'))
+
     def update_entry(self, 
                     date: datetime,
                     text: Optional[str] = None,
@@ -120,49 +973,82 @@ class JournalManager:
                     goals: Optional[List[Dict]] = None,
                     tags: Optional[List[str]] = None,
                     chat_history: Optional[List[Dict]] = None,
-                    ai_summary: Optional[str] = None) -> Optional[Dict]:
-        """Update an existing journal entry"""
-        entry = self.get_entry(date)
-        if not entry:
-            return None
+                    ai_summary: Optional[str] = None,
+                    expected_last_modified: Optional[str] = None) -> Optional[Dict]:
+        """
+        Update an existing journal entry
+        
+        The read-modify-write runs under the journal's write lock. Pass the
+        metadata.last_modified value of the version you edited as
+        expected_last_modified to fail with ConcurrentModificationError instead
+        of overwriting a change saved in the meantime (e.g. from another tab).
+        """
+        with self.lock:
+            entry = self.get_entry(date)
+            if not entry:
+                return None
 
-        if text:
-            entry['content']['text'] = text
-            entry['metadata']['word_count'] = len(text.split())
+            if expected_last_modified is not None and entry['metadata'].get('last_modified') != expected_last_modified:
+                raise ConcurrentModificationError(
+                    f"Entry for {date.strftime('%Y-%m-%d')} was modified at "
+                    f"{entry['metadata'].get('last_modified')}, expected {expected_last_modified}"
+                )
 
-        if emotion_analysis:
-            entry['emotion_analysis'] = emotion_analysis
+            if text:
+                entry['content']['text'] = text
+                entry['metadata']['word_count'] = len(text.split())
 
-        if tasks is not None:
-            entry['content']['tasks'] = tasks
-            entry['metadata']['has_tasks'] = bool(tasks)
+            if emotion_analysis:
+                entry['emotion_analysis'] = emotion_analysis
 
-        if goals is not None:
-            entry['content']['goals'] = goals
-            entry['metadata']['has_goals'] = bool(goals)
+            if tasks is not None:
+                entry['content']['tasks'] = tasks
+                entry['metadata']['has_tasks'] = bool(tasks)
 
-        if tags is not None:
-            entry['content']['tags'] = tags
+            if goals is not None:
+                entry['content']['goals'] = goals
+                entry['metadata']['has_goals'] = bool(goals)
 
-        if chat_history is not None:
-            entry['content']['chat_history'] = chat_history
-            entry['metadata']['has_chat_history'] = bool(chat_history)
+            if tags is not None:
+                entry['content']['tags'] = tags
 
-        if ai_summary is not None:
-            entry['content']['ai_summary'] = ai_summary
-            entry['metadata']['has_ai_summary'] = bool(ai_summary)
+            if chat_history is not None:
+                entry['content']['chat_history'] = chat_history
+                entry['metadata']['has_chat_history'] = bool(chat_history)
 
-        entry['metadata']['last_modified'] = datetime.now().isoformat()
-        
-        self._save_entry(entry, date)
-        return entry
+            if ai_summary is not None:
+                entry['content']['ai_summary'] = ai_summary
+                entry['metadata']['has_ai_summary'] = bool(ai_summary)
+
+            entry['metadata']['last_modified'] = datetime.now().isoformat()
+            
+            applied = (("content.text", bool(text)), ("emotion_analysis", bool(emotion_analysis)),
+                       ("content.tasks", tasks is not None), ("content.goals", goals is not None),
+                       ("content.tags", tags is not None), ("content.chat_history", chat_history is not None),
+                       ("content.ai_summary", ai_summary is not None))
+            self._record_changes([(entry["date"], "update", [field for field, changed in applied if changed])])
+            self._save_entry(entry, date)
+            return entry
 
     def search_entries(self, 
                       start_date: Optional[datetime] = None,
                       end_date: Optional[datetime] = None,
                       tags: Optional[List[str]] = None,
-                      emotion: Optional[str] = None) -> List[Dict]:
-        """Search journal entries based on criteria"""
+                      emotion: Optional[str] = None,
+                      tag_mode: str = "any") -> List[Dict]:
+        """
+        Search journal entries based on criteria
+        
+        Args:
+            start_date: Start of the range (defaults to the first of this month)
+            end_date: End of the range (defaults to now)
+            tags: Only entries having any (or, with tag_mode="all", every one) of these tags
+            emotion: Only entries with this primary emotion
+            tag_mode: "any" or "all"
+            
+        Returns:
+            Matching entries in date order
+        """
         entries = []
         
         # If no dates specified, use the current month
@@ -171,30 +1057,19 @@ class JournalManager:
         if not end_date:
             end_date = datetime.now()
 
-        # Walk through the journal directory
-        for root, _, files in os.walk(self.journal_dir):
-            for file in files:
-                if not file.endswith('.json'):
-                    continue
-                
-                file_path = os.path.join(root, file)
-                try:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        entry = json.load(f)
-                        
-                    entry_date = datetime.strptime(entry['date'], '%Y-%m-%d')
-                    
-                    # Check if entry matches criteria
-                    if start_date <= entry_date <= end_date:
-                        if tags and not any(tag in entry['content']['tags'] for tag in tags):
-                            continue
-                        if emotion and entry['emotion_analysis']['primary_emotion'].lower() != emotion.lower():
-                            continue
-                        entries.append(entry)
-                except Exception as e:
-                    print(f"Error reading entry {file_path}: {str(e)}")
+        start_key, end_key = _date_key_bounds(start_date, end_date)
+        
+        if not self.use_index:
+            return [entry for entry in self._scan_entries(start_key, end_key)
+                    if entry_matches(entry, tags, emotion, tag_mode)]
 
-        return sorted(entries, key=lambda x: x['date']) 
+        # Tags and emotion are resolved from posting lists; only matching files are opened
+        for _, record in self.index.query(start_key, end_key, tags=tags, emotion=emotion, tag_mode=tag_mode):
+            entry = self._read_entry_file(os.path.join(self.journal_dir, record["path"]))
+            if entry is not None:
+                entries.append(entry)
+
+        return entries
 
     def get_all_entries(self) -> List[Dict]:
         """
@@ -203,24 +1078,282 @@ class JournalManager:
         Returns:
             List[Dict]: A list of all journal entries sorted by date
         """
+        if not self.use_index:
+            return self._scan_entries()
+        
         entries = []
         
-        # Walk through the journal directory
-        for root, _, files in os.walk(self.journal_dir):
-            for file in files:
-                if not file.endswith('.json'):
+        # The index yields records in date order
+        for _, record in self.index.records():
+            entry = self._read_entry_file(os.path.join(self.journal_dir, record["path"]))
+            if entry is not None:
+                entries.append(entry)
+
+        return entries
+
+    def iter_entries(self,
+                     start_date: Optional[datetime] = None,
+                     end_date: Optional[datetime] = None,
+                     fields: Optional[Sequence[str]] = None,
+                     tags: Optional[List[str]] = None,
+                     emotion: Optional[str] = None,
+                     tag_mode: str = "any",
+                     descending: bool = False,
+                     limit: Optional[int] = None) -> Iterator[Dict]:
+        """
+        Stream journal entries in date order
+        
+        Unlike search_entries, nothing is collected into a list, and with a
+        field projection only the requested fields are kept. Projections made
+        only of date and index fields (primary emotion, tags, word count,
+        last_modified) are answered from the index without opening entry files.
+        
+        Args:
+            start_date: Optional start of the range (unbounded if omitted)
+            end_date: Optional end of the range (unbounded if omitted)
+            fields: Optional dotted field paths to keep, e.g.
+                ["date", "emotion_analysis.primary_emotion"]
+            tags: Only entries having any (or, with tag_mode="all", every one) of these tags
+            emotion: Only entries with this primary emotion
+            tag_mode: "any" or "all"
+            descending: Yield the newest entries first
+            limit: Optional maximum number of entries to yield
+            
+        Yields:
+            Entries (or projected entries) in date order
+        """
+        if limit is not None:
+            yield from islice(self.iter_entries(start_date, end_date, fields, tags, emotion, tag_mode, descending), limit)
+            return
+        
+        start_key = _date_key_bounds(start_date, start_date)[0] if start_date else None
+        end_key = end_date.date().isoformat() if end_date else None
+        
+        if not self.use_index:
+            scanned = self._scan_entries(start_key, end_key)
+            for entry in reversed(scanned) if descending else scanned:
+                if not entry_matches(entry, tags, emotion, tag_mode):
                     continue
-                
-                file_path = os.path.join(root, file)
-                try:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        entry = json.load(f)
-                        entries.append(entry)
-                except Exception as e:
-                    print(f"Error reading entry {file_path}: {str(e)}")
+                yield project_entry(entry, fields) if fields else entry
+            return
+        
+        from_index = fields is not None and all(field == "date" or field in INDEX_FIELDS for field in fields)
+        needs_chat = fields is None or any(field == "content" or field.startswith("content.chat_history") for field in fields)
+        
+        for date_str, record in self.index.query(start_key, end_key, tags=tags, emotion=emotion,
+                                                 tag_mode=tag_mode, descending=descending):
+            if from_index:
+                projected = {}
+                for field in fields:
+                    value = date_str if field == "date" else record.get(INDEX_FIELDS[field])
+                    _set_path(projected, field.split("."), value)
+                yield projected
+                continue
+            
+            file_path = os.path.join(self.journal_dir, record["path"])
+            try:
+                # Streaming reads don't fill the cache, so a full scan can't evict hot entries
+                entry = self._load_entry_file(file_path, date_str, merge_chat=needs_chat, cache_fill=False)
+            except Exception as e:
+                print(f"Error reading entry {file_path}: {str(e)}")
+                continue
+            if entry is not None:
+                yield project_entry(entry, fields) if fields else entry
+
+    def list_entries(self,
+                     limit: int = 20,
+                     cursor: Optional[str] = None,
+                     descending: bool = True,
+                     start_date: Optional[datetime] = None,
+                     end_date: Optional[datetime] = None,
+                     fields: Optional[Sequence[str]] = None,
+                     tags: Optional[List[str]] = None,
+                     emotion: Optional[str] = None,
+                     tag_mode: str = "any") -> Dict[str, Any]:
+        """
+        Get one page of journal entries
+        
+        Pages are keyed on entry dates rather than offsets, so fetching a page
+        only reads the entries on it, and saving new entries between requests
+        does not shift later pages.
+        
+        Args:
+            limit: Maximum number of entries on the page
+            cursor: The next_cursor of the previous page, or None for the first page
+            descending: Newest entries first (the default) or oldest first
+            start_date: Optional start of the range (unbounded if omitted)
+            end_date: Optional end of the range (unbounded if omitted)
+            fields: Optional dotted field paths to keep (see iter_entries)
+            tags: Only entries having any (or, with tag_mode="all", every one) of these tags
+            emotion: Only entries with this primary emotion
+            tag_mode: "any" or "all"
+            
+        Returns:
+            {"entries": [...], "next_cursor": cursor of the next page, or None on the last page}
+            
+        Raises:
+            ValueError: If the cursor or limit is invalid
+        """
+        if limit < 1:
+            raise ValueError(f"Page limit must be positive, got {limit}")
+        if cursor:
+            if not DAY_FILE_PATTERN.match(cursor + ".json"):
+                raise ValueError(f"Invalid page cursor: {cursor}")
+            # The cursor is the last date already returned; continue past it
+            cursor_date = datetime.strptime(cursor, '%Y-%m-%d')
+            if descending:
+                before = cursor_date - timedelta(days=1)
+                end_date = min(end_date, before) if end_date else before
+            else:
+                after = cursor_date + timedelta(days=1)
+                start_date = max(start_date, after) if start_date else after
+        
+        # Request the date as well, since it becomes the cursor
+        query_fields = list(dict.fromkeys(["date", *fields])) if fields else None
+        # Fetch one extra entry to tell whether another page follows
+        entries = list(self.iter_entries(start_date, end_date, fields=query_fields, tags=tags, emotion=emotion,
+                                         tag_mode=tag_mode, descending=descending, limit=limit + 1))
+        next_cursor = None
+        if len(entries) > limit:
+            entries = entries[:limit]
+            next_cursor = entries[-1]["date"]
+        
+        if fields and "date" not in fields:
+            entries = [project_entry(entry, fields) for entry in entries]
+        return {"entries": entries, "next_cursor": next_cursor}
+
+    def search_text(self,
+                    query: str,
+                    start_date: Optional[datetime] = None,
+                    end_date: Optional[datetime] = None,
+                    limit: int = 20) -> List[Dict]:
+        """
+        Full-text search over entry text, tags and chat messages
+        
+        Results are ranked with BM25. Quoted parts of the query are phrases
+        that must appear verbatim, e.g. 'walk "morning run"'.
+        
+        Args:
+            query: Query text
+            start_date: Optional start of the range (unbounded if omitted)
+            end_date: Optional end of the range (unbounded if omitted)
+            limit: Maximum number of results
+            
+        Returns:
+            List of {"date", "score", "snippet", "primary_emotion"} dictionaries, best match first
+        """
+        start_key = _date_key_bounds(start_date, start_date)[0] if start_date else None
+        end_key = end_date.date().isoformat() if end_date else None
+        ranked = self.text_index.search(query, start_key, end_key, limit)
+        return self._search_results(ranked, parse_query(query)[0])
+    
+    def _search_results(self, ranked: List[Tuple[str, float]], terms: List[str]) -> List[Dict]:
+        """Attach snippets and primary emotions to ranked (date, score) pairs"""
+        results = []
+        for date_str, score in ranked:
+            entry = self.get_entry(datetime.strptime(date_str, '%Y-%m-%d'))
+            if entry is None:
+                continue
+            results.append({
+                "date": date_str,
+                "score": score,
+                "snippet": make_snippet(" ".join(text for text in entry_texts(entry) if text), terms),
+                "primary_emotion": (entry.get('emotion_analysis') or {}).get('primary_emotion')
+            })
+        return results
+
+    def count_entries(self,
+                      start_date: Optional[datetime] = None,
+                      end_date: Optional[datetime] = None,
+                      tags: Optional[List[str]] = None,
+                      emotion: Optional[str] = None,
+                      tag_mode: str = "any") -> int:
+        """Count the entries matching the same criteria as search_entries"""
+        if not start_date:
+            start_date = datetime.now().replace(day=1)
+        if not end_date:
+            end_date = datetime.now()
+        start_key, end_key = _date_key_bounds(start_date, end_date)
+        return sum(1 for _ in self.index.query(start_key, end_key, tags=tags, emotion=emotion, tag_mode=tag_mode))
+
+    def get_emotion_counts(self,
+                           start_date: Optional[datetime] = None,
+                           end_date: Optional[datetime] = None) -> Dict[str, int]:
+        """
+        Count entries per primary emotion in a date range
+        
+        Args:
+            start_date: Start of the range (defaults to the first of this month)
+            end_date: End of the range (defaults to now)
+            
+        Returns:
+            Dictionary mapping lowercased emotion to number of entries
+        """
+        if not start_date:
+            start_date = datetime.now().replace(day=1)
+        if not end_date:
+            end_date = datetime.now()
+        start_key, end_key = _date_key_bounds(start_date, end_date)
+        return self.index.facets(start_key, end_key)["emotions"]
+
+    def get_stats(self,
+                  start_date: Optional[datetime] = None,
+                  end_date: Optional[datetime] = None) -> Dict[str, Any]:
+        """
+        Aggregate statistics for a date range, read from the monthly rollups
+        
+        Args:
+            start_date: Optional start of the range (unbounded if omitted)
+            end_date: Optional end of the range (unbounded if omitted)
+            
+        Returns:
+            Dictionary with entries, emotions, intensity_sum/intensity_count,
+            average_intensity, primary_emotion, themes, top_themes, word_count,
+            and tasks/goals totals with completed counts
+        """
+        start_key = _date_key_bounds(start_date, start_date)[0] if start_date else None
+        end_key = end_date.date().isoformat() if end_date else None
+        return self.rollup.stats(start_key, end_key)
 
-        # Sort entries by date
-        return sorted(entries, key=lambda x: x['date']) 
+    def get_monthly_stats(self,
+                          start_date: Optional[datetime] = None,
+                          end_date: Optional[datetime] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Aggregate statistics per month, e.g. for trend charts
+        
+        Args:
+            start_date: Optional start of the range (unbounded if omitted)
+            end_date: Optional end of the range (unbounded if omitted)
+            
+        Returns:
+            Statistics (as in get_stats) keyed by month (YYYY-MM)
+        """
+        start_key = _date_key_bounds(start_date, start_date)[0] if start_date else None
+        end_key = end_date.date().isoformat() if end_date else None
+        return {month: summarize_stats(stats) for month, stats in self.rollup.months(start_key, end_key).items()}
+
+    def get_facet_counts(self,
+                         start_date: Optional[datetime] = None,
+                         end_date: Optional[datetime] = None,
+                         tags: Optional[List[str]] = None,
+                         emotion: Optional[str] = None,
+                         tag_mode: str = "any") -> Dict[str, Dict[str, int]]:
+        """
+        Count entries per tag and per primary emotion, e.g. for filter menus
+        
+        Args:
+            start_date: Optional start of the range (unbounded if omitted)
+            end_date: Optional end of the range (unbounded if omitted)
+            tags: Only count entries having any (or all) of these tags
+            emotion: Only count entries with this primary emotion
+            tag_mode: "any" or "all"
+            
+        Returns:
+            {"tags": {tag: count}, "emotions": {lowercased emotion: count}}
+        """
+        start_key = _date_key_bounds(start_date, start_date)[0] if start_date else None
+        end_key = end_date.date().isoformat() if end_date else None
+        return self.index.facets(start_key, end_key, tags=tags, emotion=emotion, tag_mode=tag_mode)
 
     def record_entry(self, 
                     text: str, 
@@ -235,6 +1368,10 @@ class JournalManager:
         """
         Create a new entry if there were no entry on that day, and update the entry if there was prior entries created before.
         
+        Later saves of a day are appended to the day's segment log, so a save
+        costs the size of the new segment rather than of the whole day. Reads
+        return the merged view (see merge_segment).
+        
         Args:
             text: The main journal text
             emotion_analysis: Dict containing emotion analysis
@@ -249,41 +1386,60 @@ class JournalManager:
         if date is None:
             date = datetime.now()
             
-        entry = self.get_entry(date)
-        if not entry:
-            created_entry = self.create_entry(
-                text=text,
-                emotion_analysis=emotion_analysis,
-                date=date,
-                tasks=tasks,
-                goals=goals,
-                tags=tags,
-                category=category,
-                chat_history=chat_history,
-                ai_summary=ai_summary
-            )
-            return created_entry
-        else:
-            # Merge emotion analysis
-            updated_emotion_analysis = entry["emotion_analysis"].copy()
-            updated_emotion_analysis.update(emotion_analysis)
-            
-            # Merge chat history if provided
-            updated_chat_history = entry['content'].get('chat_history', [])
-            if chat_history:
-                updated_chat_history += chat_history
-            
-            # Update AI summary if provided, otherwise keep existing
-            updated_ai_summary = ai_summary if ai_summary else entry['content'].get('ai_summary', [])
-            
-            updated_entry = self.update_entry( 
-                date=date,
-                text=text.replace("\n","\\n").replace('[', '').replace(']', '') + " \n " + entry['content']['text'],
-                emotion_analysis=updated_emotion_analysis,
-                tasks=tasks + entry['content']["tasks"],
-                goals=goals + entry['content']["goals"],
-                tags=tags + entry['content']["tags"],
-                chat_history=updated_chat_history,
-                ai_summary=updated_ai_summary
-            )
-            return updated_entry 
\ No newline at end of file
+        # Check and append under the write lock so concurrent saves don't lose data
+        with self.lock:
+            if not self.has_entry(date):
+                created_entry = self.create_entry(
+                    text=text,
+                    emotion_analysis=emotion_analysis,
+                    date=date,
+                    tasks=tasks,
+                    goals=goals,
+                    tags=tags,
+                    category=category,
+                    chat_history=chat_history,
+                    ai_summary=ai_summary
+                )
+                return created_entry
+            else:
+                segment = {
+                    "id": uuid.uuid4().hex,
+                    "timestamp": datetime.now().isoformat(),
+                    "text": text,
+                    "emotion_analysis": emotion_analysis or {},
+                    "tasks": tasks or [],
+                    "goals": goals or [],
+                    "tags": tags or [],
+                    "chat_history": chat_history or [],
+                    "ai_summary": ai_summary or []
+                }
+                self._record_changes([(date.strftime('%Y-%m-%d'), "record", ["content.text"] + [
+                    f"content.{key}" if key != "emotion_analysis" else key
+                    for key in ("emotion_analysis", "tasks", "goals", "tags", "chat_history", "ai_summary")
+                    if segment[key]
+                ])])
+                return self._append_segment(date, segment)
+
+def create_journal_manager(journal_dir: str = "journals",
+                           user_id: Optional[str] = None,
+                           backend: Optional[str] = None,
+                           users_dir: str = USERS_DIR) -> JournalManager:
+    """
+    Create a journal manager for the configured storage backend
+    
+    Args:
+        journal_dir: Journal directory name
+        user_id: Optional user ID for user-specific storage
+        backend: "json" or "sqlite" (defaults to BUJONOW_STORAGE_BACKEND, then "json")
+        users_dir: Root directory holding all user data
+        
+    Returns:
+        A JournalManager for the selected backend
+    """
+    backend = (backend or os.environ.get("BUJONOW_STORAGE_BACKEND") or "json").lower()
+    if backend == "sqlite":
+        from src.sqlite_journal_manager import SQLiteJournalManager
+        return SQLiteJournalManager(journal_dir, user_id, users_dir=users_dir)
+    if backend != "json":
+        raise ValueError(f"Unknown journal storage backend: {backend}")
+    return JournalManager(journal_dir, user_id, users_dir=users_dir)
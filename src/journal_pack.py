@@ -0,0 +1,188 @@
+"""
+Journal Pack Module
+Stores the entries of a cold month in a single compressed pack file instead
+of one file per day.
+
+A pack is a header, one zlib-compressed blob per entry, a compressed table
+mapping each date to the offset and length of its blob, and a fixed-size
+footer pointing at the table. Reading one entry costs a seek and the
+decompression of that entry only.
+
+Packs are never modified in place. Entries saved after a month was packed
+are written as ordinary day files next to the pack and take precedence over
+it, until the month is packed again.
+"""
+
+import os
+import struct
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from src.utils.file_io import atomic_write
+from src.utils.serialization import json_dumps, json_loads
+
+PACK_FILENAME = "_entries.pack"
+PACK_MAGIC = b"BJPK"
+PACK_VERSION = 1
+COMPRESSION_LEVEL = 6
+
+# Footer: table offset, table length, magic
+_FOOTER = struct.Struct("<QI4s")
+_HEADER = PACK_MAGIC + bytes([PACK_VERSION])
+
+# Pack tables kept in memory, keyed by path and validated by file signature
+MAX_CACHED_TABLES = 1024
+_tables: "OrderedDict[str, Tuple[Tuple[int, int], Dict]]" = OrderedDict()
+_tables_lock = threading.Lock()
+
+def pack_path(month_dir: str) -> str:
+    """Get the pack file path of a month directory"""
+    return os.path.join(month_dir, PACK_FILENAME)
+
+def write_pack(path: str, entries: Dict[str, bytes], storage_format: str) -> int:
+    """
+    Write a pack file atomically
+
+    Args:
+        path: Pack file path
+        entries: Encoded entries keyed by date (YYYY-MM-DD)
+        storage_format: Name of the codec the entries are encoded with
+
+    Returns:
+        Size of the pack in bytes
+    """
+    parts = [_HEADER]
+    offset = len(_HEADER)
+    table = {}
+    for date_str in sorted(entries):
+        blob = zlib.compress(entries[date_str], COMPRESSION_LEVEL)
+        table[date_str] = [offset, len(blob)]
+        parts.append(blob)
+        offset += len(blob)
+    table_blob = zlib.compress(json_dumps({"format": storage_format, "entries": table}).encode('utf-8'))
+    parts.append(table_blob)
+    parts.append(_FOOTER.pack(offset, len(table_blob), PACK_MAGIC))
+    data = b"".join(parts)
+    atomic_write(path, data)
+    return len(data)
+
+def _cached_table(path: str, signature: Tuple[int, int]) -> Optional[Dict]:
+    with _tables_lock:
+        cached = _tables.get(path)
+        if cached and cached[0] == signature:
+            _tables.move_to_end(path)
+            return cached[1]
+    return None
+
+def _load_table(f, path: str, signature: Tuple[int, int]) -> Dict:
+    """Read the table of an open pack file and cache it under the file's signature"""
+    f.seek(0)
+    if f.read(len(_HEADER)) != _HEADER or signature[1] < len(_HEADER) + _FOOTER.size:
+        raise ValueError(f"Not a journal pack: {path}")
+    f.seek(-_FOOTER.size, os.SEEK_END)
+    table_offset, table_length, magic = _FOOTER.unpack(f.read(_FOOTER.size))
+    if magic != PACK_MAGIC:
+        raise ValueError(f"Truncated journal pack: {path}")
+    f.seek(table_offset)
+    table = json_loads(zlib.decompress(f.read(table_length)))
+
+    with _tables_lock:
+        _tables[path] = (signature, table)
+        _tables.move_to_end(path)
+        while len(_tables) > MAX_CACHED_TABLES:
+            _tables.popitem(last=False)
+    return table
+
+def read_table(path: str) -> Optional[Tuple[Tuple[int, int], Dict]]:
+    """
+    Read the table of a pack file
+
+    Args:
+        path: Pack file path
+
+    Returns:
+        (file signature, {"format": codec name, "entries": {date: [offset, length]}}),
+        or None if there is no pack
+
+    Raises:
+        ValueError: If the file is not a valid pack
+    """
+    try:
+        f = open(path, 'rb')
+    except FileNotFoundError:
+        return None
+    with f:
+        st = os.fstat(f.fileno())
+        signature = (st.st_mtime_ns, st.st_size)
+        table = _cached_table(path, signature)
+        if table is None:
+            table = _load_table(f, path, signature)
+        return signature, table
+
+def packed_dates(month_dir: str) -> List[str]:
+    """List the dates stored in a month's pack, in date order"""
+    try:
+        packed = read_table(pack_path(month_dir))
+    except (ValueError, OSError, zlib.error) as e:
+        print(f"Error reading pack in {month_dir}: {str(e)}")
+        return []
+    return sorted(packed[1]["entries"]) if packed else []
+
+def read_packed(path: str, date_str: str) -> Optional[Tuple[Tuple[int, int], bytes]]:
+    """
+    Read one encoded entry from a pack file
+
+    Only the entry's own blob is read and decompressed. The table and the blob
+    are read through the same file handle, so a concurrent repack is never
+    seen half old, half new.
+
+    Args:
+        path: Pack file path
+        date_str: Date of the entry (YYYY-MM-DD)
+
+    Returns:
+        (pack file signature, encoded entry), or None if the pack does not hold the date
+    """
+    try:
+        f = open(path, 'rb')
+    except FileNotFoundError:
+        return None
+    with f:
+        st = os.fstat(f.fileno())
+        signature = (st.st_mtime_ns, st.st_size)
+        table = _cached_table(path, signature)
+        if table is None:
+            table = _load_table(f, path, signature)
+        location = table["entries"].get(date_str)
+        if location is None:
+            return None
+        offset, length = location
+        f.seek(offset)
+        return signature, zlib.decompress(f.read(length))
+
+def read_day(file_path: str, date_str: str) -> Optional[Tuple[Tuple[int, int], bytes]]:
+    """
+    Read an encoded entry from its day file, or from its month's pack
+
+    Args:
+        file_path: Path the entry's day file has (or would have)
+        date_str: Date of the entry (YYYY-MM-DD)
+
+    Returns:
+        (signature of the file read, encoded entry), or None if there is no entry
+    """
+    try:
+        with open(file_path, 'rb') as f:
+            st = os.fstat(f.fileno())
+            return (st.st_mtime_ns, st.st_size), f.read()
+    except FileNotFoundError:
+        return read_packed(pack_path(os.path.dirname(file_path)), date_str)
+
+def has_day(file_path: str, date_str: str) -> bool:
+    """Check whether an entry exists as a day file or in its month's pack"""
+    if os.path.exists(file_path):
+        return True
+    packed = read_table(pack_path(os.path.dirname(file_path)))
+    return packed is not None and date_str in packed[1]["entries"]
@@ -0,0 +1,395 @@
+"""
+Journal Rollup Module
+Maintains per-month aggregates of a user's journal so that weekly, monthly
+and yearly statistics are read from a few small files instead of being
+recomputed from every entry.
+
+Each YYYY-MM journal directory holds a _rollup.json file with the month's
+totals and the contribution of every day, so ranges that cut through a month
+only sum that month's days. Later saves of a day append the day's new
+contribution to _rollup.delta.jsonl instead (see shard_delta).
+"""
+
+import os
+import threading
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from src.journal_index import list_day_files, list_month_dirs, month_is_current
+from src.shard_delta import DELTA_COMPACT_BYTES, append_delta, delta_path, delta_stat, read_delta, remove_delta
+from src.utils.file_io import atomic_write
+from src.utils.serialization import json_dumps, json_loads
+
+ROLLUP_FILENAME = "_rollup.json"
+ROLLUP_VERSION = 1
+
+# Task and goal statuses that count as completed
+DONE_STATUSES = {"done", "completed", "complete"}
+
+def empty_stats() -> Dict:
+    """Get the aggregate of no entries"""
+    return {
+        "entries": 0,
+        "emotions": {},
+        "intensity_sum": 0,
+        "intensity_count": 0,
+        "themes": {},
+        "word_count": 0,
+        "tasks": {"total": 0, "done": 0},
+        "goals": {"total": 0, "done": 0}
+    }
+
+def emotion_key(emotion) -> Optional[str]:
+    """
+    Normalize a primary emotion the way rollups and facets count it
+
+    Args:
+        emotion: The entry's primary_emotion value
+
+    Returns:
+        The lowercased emotion, or None if it is missing or not a string
+    """
+    if isinstance(emotion, str) and emotion:
+        return emotion.lower()
+    return None
+
+def _is_done(item: Dict, progress_key: Optional[str] = None) -> bool:
+    if not isinstance(item, dict):
+        return False
+    if str(item.get("status", "")).lower() in DONE_STATUSES:
+        return True
+    if progress_key:
+        try:
+            return float(item.get(progress_key) or 0) >= 100
+        except (TypeError, ValueError):
+            return False
+    return False
+
+def entry_contribution(entry: Dict) -> Dict:
+    """
+    Compute what one entry adds to the aggregates
+
+    Args:
+        entry: A journal entry
+
+    Returns:
+        The entry's aggregate, in the same shape as empty_stats()
+    """
+    stats = empty_stats()
+    stats["entries"] = 1
+    emotion_analysis = entry.get("emotion_analysis") or {}
+    content = entry.get("content") or {}
+    metadata = entry.get("metadata") or {}
+
+    if isinstance(emotion_analysis, dict):
+        emotion = emotion_key(emotion_analysis.get("primary_emotion"))
+        if emotion:
+            stats["emotions"][emotion] = 1
+        intensity = emotion_analysis.get("emotion_intensity")
+        if isinstance(intensity, (int, float)) and not isinstance(intensity, bool):
+            stats["intensity_sum"] = intensity
+            stats["intensity_count"] = 1
+        themes = list(emotion_analysis.get("emotional_themes") or []) + list(emotion_analysis.get("themes") or [])
+        for theme in dict.fromkeys(theme for theme in themes if isinstance(theme, str)):
+            stats["themes"][theme] = 1
+
+    word_count = metadata.get("word_count")
+    if not isinstance(word_count, int):
+        word_count = len((content.get("text") or "").split())
+    stats["word_count"] = word_count
+
+    tasks = content.get("tasks") or []
+    goals = content.get("goals") or []
+    stats["tasks"] = {"total": len(tasks), "done": sum(1 for task in tasks if _is_done(task))}
+    stats["goals"] = {"total": len(goals), "done": sum(1 for goal in goals if _is_done(goal, "progress"))}
+    return stats
+
+def merge_stats(total: Dict, other: Dict) -> Dict:
+    """
+    Add one aggregate into another, in place
+
+    Args:
+        total: Aggregate to add to
+        other: Aggregate to add
+
+    Returns:
+        The updated total
+    """
+    for key in ("entries", "intensity_sum", "intensity_count", "word_count"):
+        total[key] += other.get(key, 0)
+    for key in ("emotions", "themes"):
+        for name, count in (other.get(key) or {}).items():
+            total[key][name] = total[key].get(name, 0) + count
+    for key in ("tasks", "goals"):
+        for part in ("total", "done"):
+            total[key][part] += (other.get(key) or {}).get(part, 0)
+    return total
+
+def summarize_stats(stats: Dict) -> Dict:
+    """
+    Add derived figures to an aggregate
+
+    Args:
+        stats: An aggregate
+
+    Returns:
+        The aggregate plus average_intensity, primary_emotion and top_themes
+    """
+    summary = dict(stats)
+    summary["average_intensity"] = (
+        round(stats["intensity_sum"] / stats["intensity_count"], 2) if stats["intensity_count"] else None
+    )
+    summary["primary_emotion"] = max(stats["emotions"], key=stats["emotions"].get) if stats["emotions"] else None
+    summary["top_themes"] = [theme for theme, _ in sorted(stats["themes"].items(), key=lambda item: -item[1])[:5]]
+    return summary
+
+class JournalRollup:
+    """Month-sharded aggregates of a single user's journal"""
+
+    def __init__(self, journal_dir: str, load_entry: Callable[[str, str], Optional[Dict]]):
+        """
+        Initialize the rollups for a journal directory
+
+        Args:
+            journal_dir: The user's journal directory (containing YYYY-MM folders)
+            load_entry: Function (file path, date) -> entry used to rebuild months
+        """
+        self.journal_dir = journal_dir
+        self.load_entry = load_entry
+        # month -> (file mtime_ns, month directory mtime_ns when last checked,
+        #           delta bytes applied, {"totals": ..., "days": {date: contribution}})
+        self._months: Dict[str, Tuple[int, int, int, Dict]] = {}
+        self._lock = threading.RLock()
+
+    def _rollup_path(self, month: str) -> str:
+        return os.path.join(self.journal_dir, month, ROLLUP_FILENAME)
+
+    def _delta_path(self, month: str) -> str:
+        return delta_path(self._rollup_path(month))
+
+    @staticmethod
+    def _with_totals(days: Dict[str, Dict]) -> Dict:
+        """Build a month's rollup from the contributions of its days"""
+        totals = empty_stats()
+        for contribution in days.values():
+            merge_stats(totals, contribution)
+        return {"totals": totals, "days": days}
+
+    def _load(self, month: str, updating: Set[str] = frozenset()) -> Dict:
+        """
+        Load a month's rollup with its delta, rebuilding it if it is missing, unreadable or stale
+
+        As with the entry index, the month directory is only compared with
+        the rollup when its mtime changed since the last check.
+
+        Args:
+            month: Month directory name (YYYY-MM)
+            updating: Dates the caller is about to update in the rollup, whose
+                files may already be newer than it
+        """
+        rollup_path = self._rollup_path(month)
+        with self._lock:
+            try:
+                mtime_ns = os.stat(rollup_path).st_mtime_ns
+                dir_mtime_ns = os.stat(os.path.dirname(rollup_path)).st_mtime_ns
+            except FileNotFoundError:
+                return self.rebuild_month(month)
+            delta_size, delta_mtime_ns = delta_stat(self._delta_path(month))
+
+            cached = self._months.get(month)
+            if cached and cached[0] == mtime_ns and cached[1] == dir_mtime_ns and cached[2] == delta_size:
+                return cached[3]
+
+            if cached and cached[0] == mtime_ns and cached[2] <= delta_size:
+                offset, data = cached[2], cached[3]
+            else:
+                cached = None
+                try:
+                    with open(rollup_path, 'rb') as f:
+                        stored = json_loads(f.read())
+                    data = {"totals": stored["totals"], "days": stored["days"]}
+                    offset = min(stored.get("delta_offset", 0), delta_size)
+                except (ValueError, KeyError, OSError) as e:
+                    print(f"Error reading rollup {rollup_path}: {str(e)}")
+                    return self.rebuild_month(month)
+
+            if delta_size > offset:
+                changes, offset = read_delta(self._delta_path(month), offset)
+                if changes:
+                    days = dict(data["days"])
+                    for change in changes:
+                        days[change["date"]] = change["day"]
+                    data = self._with_totals(days)
+
+            if not (cached and cached[1] == dir_mtime_ns) and \
+                    not month_is_current(self.journal_dir, month, data["days"], max(mtime_ns, delta_mtime_ns), updating):
+                print(f"Rollup {rollup_path} is out of date, rebuilding")
+                return self.rebuild_month(month)
+
+            self._months[month] = (mtime_ns, dir_mtime_ns, offset, data)
+            return data
+
+    def _store(self, month: str, days: Dict[str, Dict], delta_offset: Optional[int] = None) -> Dict:
+        """
+        Recompute a month's totals from its days and persist them
+
+        Args:
+            month: Month directory name (YYYY-MM)
+            days: Contributions by date
+            delta_offset: Bytes of the delta the days include, or None if they
+                include all of it (the delta is then removed)
+        """
+        data = self._with_totals(days)
+        rollup_path = self._rollup_path(month)
+        # Rollups can be rebuilt from the entries, so skip the fsync
+        atomic_write(rollup_path, json_dumps({"version": ROLLUP_VERSION, **data, "delta_offset": delta_offset or 0}),
+                     fsync=False)
+        if delta_offset is None:
+            remove_delta(self._delta_path(month))
+        # Written under the lock from the entries, so the directory is known to match
+        self._months[month] = (os.stat(rollup_path).st_mtime_ns,
+                               os.stat(os.path.dirname(rollup_path)).st_mtime_ns, delta_offset or 0, data)
+        return data
+
+    def rebuild_month(self, month: str) -> Dict:
+        """
+        Rebuild one month's rollup from the entries on disk
+
+        Args:
+            month: Month directory name (YYYY-MM)
+
+        Returns:
+            The month's rollup
+        """
+        days = {}
+        with self._lock:
+            if not os.path.isdir(os.path.join(self.journal_dir, month)):
+                self._months.pop(month, None)
+                return {"totals": empty_stats(), "days": days}
+            # The entries include the segments the delta was appended for
+            delta_offset = delta_stat(self._delta_path(month))[0]
+            for date_str, name in list_day_files(self.journal_dir, month):
+                file_path = os.path.join(self.journal_dir, month, name)
+                try:
+                    entry = self.load_entry(file_path, date_str)
+                except Exception as e:
+                    print(f"Error reading entry {file_path}: {str(e)}")
+                    continue
+                if entry is not None:
+                    days[date_str] = entry_contribution(entry)
+            return self._store(month, days, delta_offset)
+
+    def rebuild(self) -> int:
+        """
+        Rebuild all rollups from the entries on disk
+
+        Returns:
+            Number of entries aggregated
+        """
+        with self._lock:
+            self._months.clear()
+            return sum(self.rebuild_month(month)["totals"]["entries"] for month in list_month_dirs(self.journal_dir))
+
+    def update(self, entry: Dict) -> None:
+        """
+        Replace the contribution of a saved entry
+
+        Args:
+            entry: The saved journal entry
+        """
+        self.update_many([entry])
+
+    def update_many(self, entries: List[Dict]) -> None:
+        """
+        Replace the contributions of several entries, writing each month once
+
+        Args:
+            entries: The saved journal entries
+        """
+        by_month: Dict[str, List[Dict]] = {}
+        for entry in entries:
+            by_month.setdefault(entry["date"][:7], []).append(entry)
+        with self._lock:
+            for month, month_entries in by_month.items():
+                days = dict(self._load(month, {entry["date"] for entry in month_entries})["days"])
+                for entry in month_entries:
+                    days[entry["date"]] = entry_contribution(entry)
+                self._store(month, days)
+
+    def replace_month(self, month: str, entries: List[Dict]) -> None:
+        """
+        Store a month's rollup built from all of the month's entries
+
+        Args:
+            month: Month directory name (YYYY-MM)
+            entries: Every journal entry of the month
+        """
+        with self._lock:
+            self._store(month, {entry["date"]: entry_contribution(entry) for entry in entries})
+
+    def append(self, entry: Dict) -> None:
+        """
+        Replace the contribution of an entry by appending it to the month's delta
+
+        Used for later saves of a day, so nothing but the new contribution is
+        written; the delta is folded into the rollup once it grows past
+        DELTA_COMPACT_BYTES. Callers must serialize writes (JournalManager
+        holds its write lock).
+
+        Args:
+            entry: The merged view of the saved entry
+        """
+        month = entry["date"][:7]
+        contribution = entry_contribution(entry)
+        with self._lock:
+            start, end = append_delta(self._delta_path(month), [{"date": entry["date"], "day": contribution}])
+            cached = self._months.get(month)
+            if cached and cached[2] == start:
+                days = dict(cached[3]["days"])
+                days[entry["date"]] = contribution
+                self._months[month] = (cached[0], cached[1], end, self._with_totals(days))
+            if end >= DELTA_COMPACT_BYTES:
+                self._store(month, dict(self._load(month)["days"]))
+
+    def stats(self, start_key: Optional[str] = None, end_key: Optional[str] = None) -> Dict:
+        """
+        Aggregate a date range
+
+        Months inside the range contribute their stored totals; only the
+        months at the edges of the range are summed day by day.
+
+        Args:
+            start_key: Inclusive lower bound (YYYY-MM-DD), or None for no bound
+            end_key: Inclusive upper bound (YYYY-MM-DD), or None for no bound
+
+        Returns:
+            The range's aggregate, with derived figures (see summarize_stats)
+        """
+        total = empty_stats()
+        for month_stats in self.months(start_key, end_key).values():
+            merge_stats(total, month_stats)
+        return summarize_stats(total)
+
+    def months(self, start_key: Optional[str] = None, end_key: Optional[str] = None) -> Dict[str, Dict]:
+        """
+        Aggregate a date range per month
+
+        Args:
+            start_key: Inclusive lower bound (YYYY-MM-DD), or None for no bound
+            end_key: Inclusive upper bound (YYYY-MM-DD), or None for no bound
+
+        Returns:
+            Aggregates keyed by month (YYYY-MM), in month order
+        """
+        result = {}
+        for month in list_month_dirs(self.journal_dir, start_key, end_key):
+            data = self._load(month)
+            whole_month = (not start_key or start_key <= f"{month}-01") and (not end_key or end_key >= f"{month}-31")
+            if whole_month:
+                result[month] = merge_stats(empty_stats(), data["totals"])
+                continue
+            partial = empty_stats()
+            for date_str, contribution in data["days"].items():
+                if (not start_key or date_str >= start_key) and (not end_key or date_str <= end_key):
+                    merge_stats(partial, contribution)
+            result[month] = partial
+        return result
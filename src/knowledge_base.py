@@ -0,0 +1,177 @@
+"""
+Knowledge Base Module
+Loads the documents the analyzer retrieves context from (RAG) and their
+embedding matrix.
+
+Documents live in a directory of files, read in name order:
+- .jsonl: one {"title", "content"} object per line ("title" is optional)
+- .md / .txt: one document per section, titled by its heading (files
+  without headings are one document titled by the file name)
+
+Embeddings are precomputed into the on-disk embedding cache (see
+EmbeddingCache) with one row per document in document order. The cached
+matrix is memory-mapped and searched in place, so every worker process
+shares one copy through the page cache.
+"""
+
+import os
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+
+from src.embedding_cache import DEFAULT_CACHE_DIR, EmbeddingCache, content_hash
+from src.utils.serialization import json_loads
+
+try:
+    from src.vector_index import VectorIndex
+except ImportError:
+    # numpy is not installed; documents can be loaded but not searched
+    VectorIndex = None
+
+KNOWLEDGE_DIR = os.environ.get("BUJONOW_KNOWLEDGE_DIR", str(Path(__file__).parent.parent / "knowledge"))
+
+_HEADING = re.compile(r'^#{1,6}\s+(.*?)\s*#*\s*$')
+
+def _read_jsonl(path: str) -> List[Dict[str, str]]:
+    """Read the documents of a JSONL file, skipping unreadable lines"""
+    documents = []
+    with open(path, 'rb') as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json_loads(line)
+                content = record["content"] if isinstance(record, dict) else record
+            except (ValueError, KeyError) as e:
+                print(f"Skipping line {number} of {path}: {str(e)}")
+                continue
+            if isinstance(content, str) and content.strip():
+                title = record.get("title", "") if isinstance(record, dict) else ""
+                documents.append({"title": title or "", "content": content.strip()})
+    return documents
+
+def _read_markdown(path: str) -> List[Dict[str, str]]:
+    """Split a markdown or text file into one document per headed section"""
+    documents = []
+    title = Path(path).stem.replace("_", " ").replace("-", " ")
+    lines: List[str] = []
+
+    def flush():
+        content = "\n".join(lines).strip()
+        if content:
+            documents.append({"title": title, "content": content})
+
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            heading = _HEADING.match(line)
+            if heading:
+                flush()
+                title = heading.group(1)
+                lines = []
+            else:
+                lines.append(line.rstrip("\n"))
+    flush()
+    return documents
+
+def load_documents(directory: str = KNOWLEDGE_DIR) -> List[Dict[str, str]]:
+    """
+    Read every document of a knowledge base directory
+
+    Args:
+        directory: The knowledge base directory
+
+    Returns:
+        {"title", "content"} documents in file name order (empty if the
+        directory does not exist)
+    """
+    if not os.path.isdir(directory):
+        print(f"Knowledge base directory {directory} not found")
+        return []
+    documents = []
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name)
+        try:
+            if name.endswith(".jsonl"):
+                documents.extend(_read_jsonl(path))
+            elif name.endswith((".md", ".txt")):
+                documents.extend(_read_markdown(path))
+        except OSError as e:
+            print(f"Error reading {path}: {str(e)}")
+    return documents
+
+class KnowledgeBase:
+    """The documents of a knowledge base directory and their embeddings"""
+
+    def __init__(self, directory: str = KNOWLEDGE_DIR, cache_dir: Optional[str] = None):
+        """
+        Load a knowledge base
+
+        Args:
+            directory: The knowledge base directory
+            cache_dir: Directory of its embedding cache (defaults to a folder
+                named after the knowledge base in the embedding cache)
+        """
+        self.directory = directory
+        self.cache_dir = cache_dir or os.path.join(DEFAULT_CACHE_DIR, os.path.basename(os.path.abspath(directory)))
+        self.documents = load_documents(directory)
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def vector_index(self,
+                     model: str,
+                     embed_fn: Callable[[List[str]], List[Optional[Sequence[float]]]]) -> Optional["VectorIndex"]:
+        """
+        Get a search index over the documents' embeddings
+
+        Documents missing from the embedding cache are embedded with embed_fn
+        and the cache is rewritten first. When the cache covers the documents
+        in order, its memory-mapped matrix is used without copying.
+
+        Args:
+            model: Embedding model name
+            embed_fn: Embeds a list of texts, returning one vector (or None on
+                failure) per text
+
+        Returns:
+            The index over the documents that have an embedding, or None if
+            none do (or numpy is not installed)
+        """
+        if VectorIndex is None or not self.documents:
+            return None
+        cache = EmbeddingCache(model, self.cache_dir)
+        texts = [doc["content"] for doc in self.documents]
+        keys = [content_hash(text) for text in texts]
+
+        hashes, matrix = cache.load_matrix()
+        if hashes != keys:
+            cache.embed(texts, embed_fn)
+            hashes, matrix = cache.load_matrix()
+        if matrix is None:
+            return None
+        if hashes == keys:
+            return VectorIndex.from_normalized(matrix, self.documents)
+
+        # Some documents could not be embedded; index the others
+        rows = {key: row for row, key in enumerate(hashes)}
+        present = [i for i, key in enumerate(keys) if key in rows]
+        if not present:
+            return None
+        return VectorIndex.from_normalized(matrix[[rows[keys[i]] for i in present]],
+                                           [self.documents[i] for i in present])
+
+@lru_cache(maxsize=None)
+def shared_knowledge_base(directory: str = KNOWLEDGE_DIR) -> KnowledgeBase:
+    """
+    Get the process-wide KnowledgeBase of a directory
+
+    Documents are read once per process; restart the app to pick up edits.
+
+    Args:
+        directory: The knowledge base directory
+
+    Returns:
+        The knowledge base
+    """
+    return KnowledgeBase(directory)
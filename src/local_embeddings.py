@@ -0,0 +1,127 @@
+"""
+Local Embeddings Module
+Embeds text on the local machine, for RAG retrieval without the Gemini
+embedding API.
+
+A TF-IDF vectorizer followed by a truncated SVD (latent semantic analysis)
+is fitted on the knowledge base documents and pickled into the knowledge
+base's cache directory, so later processes load it instead of refitting.
+Embedding a query takes well under a millisecond and needs no network.
+"""
+
+import hashlib
+import os
+import pickle
+from typing import List, Optional, Sequence
+
+import numpy as np
+from sklearn.decomposition import TruncatedSVD
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from src.embedding_cache import content_hash
+from src.utils.file_io import atomic_write
+
+# Length of the local embeddings (capped by the size of the knowledge base)
+LOCAL_EMBEDDING_DIMENSIONS = 256
+LOCAL_MODEL_PREFIX = "local-tfidf-svd"
+
+class LocalEmbeddingClient:
+    """Embeds texts with a TF-IDF + SVD model fitted on a set of documents"""
+
+    def __init__(self, vectorizer: TfidfVectorizer, svd: Optional[TruncatedSVD], model: str):
+        """
+        Wrap a fitted model (use load_or_fit to get one)
+
+        Args:
+            vectorizer: Fitted TF-IDF vectorizer
+            svd: Fitted SVD, or None for raw TF-IDF vectors (tiny corpora)
+            model: Model name; embeddings are only comparable within one name
+        """
+        self.vectorizer = vectorizer
+        self.svd = svd
+        self.model = model
+
+    @classmethod
+    def fit(cls, texts: Sequence[str], dimensions: int = LOCAL_EMBEDDING_DIMENSIONS,
+            model: str = LOCAL_MODEL_PREFIX) -> "LocalEmbeddingClient":
+        """
+        Fit a model on documents
+
+        Args:
+            texts: Document texts
+            dimensions: Embedding length
+            model: Model name
+
+        Returns:
+            The fitted client
+        """
+        vectorizer = TfidfVectorizer(sublinear_tf=True, stop_words="english", ngram_range=(1, 2))
+        tfidf = vectorizer.fit_transform(texts)
+        components = min(dimensions, tfidf.shape[0] - 1, tfidf.shape[1] - 1)
+        svd = None
+        if components >= 2:
+            svd = TruncatedSVD(n_components=components, random_state=0)
+            svd.fit(tfidf)
+        return cls(vectorizer, svd, model)
+
+    @classmethod
+    def load_or_fit(cls, texts: Sequence[str], cache_dir: str,
+                    dimensions: int = LOCAL_EMBEDDING_DIMENSIONS) -> "LocalEmbeddingClient":
+        """
+        Load the model fitted on these documents, fitting and saving it if needed
+
+        The model name includes a fingerprint of the documents, so editing
+        them refits the model and its embeddings are cached separately.
+
+        Args:
+            texts: Document texts
+            cache_dir: Directory holding the pickled model
+            dimensions: Embedding length
+
+        Returns:
+            The client
+        """
+        fingerprint = hashlib.sha256(f"{dimensions}:".encode('ascii') +
+                                     "".join(content_hash(text) for text in texts).encode('ascii')).hexdigest()[:16]
+        model = f"{LOCAL_MODEL_PREFIX}-{fingerprint}"
+        path = os.path.join(cache_dir, f"{model}.pkl")
+        try:
+            with open(path, 'rb') as f:
+                vectorizer, svd = pickle.load(f)
+            return cls(vectorizer, svd, model)
+        except FileNotFoundError:
+            pass
+        except (pickle.UnpicklingError, ValueError, EOFError, AttributeError, ImportError) as e:
+            print(f"Refitting local embedding model: {str(e)}")
+
+        client = cls.fit(texts, dimensions, model)
+        try:
+            atomic_write(path, pickle.dumps((client.vectorizer, client.svd), protocol=pickle.HIGHEST_PROTOCOL))
+            # Remove the models (and their embedding caches) of earlier versions of the documents
+            for name in os.listdir(cache_dir):
+                if name.startswith(f"{LOCAL_MODEL_PREFIX}-") and not name.startswith(model):
+                    os.remove(os.path.join(cache_dir, name))
+        except OSError as e:
+            print(f"Error saving local embedding model {path}: {str(e)}")
+        return client
+
+    def embed(self, texts: List[str], task_type: str = "retrieval_document") -> List[Optional[List[float]]]:
+        """
+        Embed texts
+
+        Args:
+            texts: Texts to embed
+            task_type: Ignored; documents and queries are embedded alike
+
+        Returns:
+            One embedding per text
+        """
+        if not texts:
+            return []
+        vectors = self.vectorizer.transform(texts)
+        vectors = self.svd.transform(vectors) if self.svd is not None else vectors.toarray()
+        return list(np.asarray(vectors, dtype=np.float32))
+
+    def embed_one(self, text: str, task_type: str = "retrieval_query") -> Optional[List[float]]:
+        """Embed a single text (by default as a search query)"""
+        return self.embed([text], task_type)[0]
@@ -0,0 +1,97 @@
+"""
+Shard Delta Module
+Append-only logs of small updates to a month shard of the journal indexes.
+
+Frequent updates (a chat message, a later save of a day) append one JSON
+line to the month's delta file instead of rewriting the whole shard, so they
+cost the size of the update rather than of the month. Readers apply the
+delta on top of the shard; the writer folds it into the shard once it grows
+past DELTA_COMPACT_BYTES, or whenever it rewrites the shard anyway.
+
+Shards record how many bytes of their delta they already include
+("delta_offset"), so a shard rebuilt from the entry files while the delta
+exists only applies the lines appended after the rebuild started.
+"""
+
+import os
+from typing import Dict, List, Sequence, Tuple
+
+from src.utils.serialization import json_dumps, json_loads
+
+# Fold a delta into its shard once it grows past this many bytes
+DELTA_COMPACT_BYTES = 64 * 1024
+
+def delta_path(shard_path: str) -> str:
+    """Get the delta file path of a shard (e.g. _text.json -> _text.delta.jsonl)"""
+    return os.path.splitext(shard_path)[0] + ".delta.jsonl"
+
+def delta_stat(path: str) -> Tuple[int, int]:
+    """Get the (size, mtime_ns) of a delta file, or (0, 0) if there is none"""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return 0, 0
+    return st.st_size, st.st_mtime_ns
+
+def append_delta(path: str, records: Sequence[Dict]) -> Tuple[int, int]:
+    """
+    Append records to a delta file
+
+    Deltas can be rebuilt from the entries, so they are not fsynced. Callers
+    must serialize appends (JournalManager holds its write lock).
+
+    Args:
+        path: Delta file path
+        records: JSON records, one line each
+
+    Returns:
+        (size before, size after) of the delta file
+    """
+    data = "".join(json_dumps(record) + "\n" for record in records).encode('utf-8')
+    with open(path, 'ab+') as f:
+        start = f.seek(0, os.SEEK_END)
+        if start:
+            # A crash interrupted the last append; keep the new records on their own line
+            f.seek(start - 1)
+            if f.read(1) != b"\n":
+                data = b"\n" + data
+        f.write(data)
+        f.flush()
+        return start, f.tell()
+
+def read_delta(path: str, offset: int = 0) -> Tuple[List[Dict], int]:
+    """
+    Read the records of a delta file from an offset
+
+    Args:
+        path: Delta file path
+        offset: Byte offset to start from (a record boundary)
+
+    Returns:
+        (records, offset after the last complete record); a torn last line
+        is left for the next read
+    """
+    try:
+        f = open(path, 'rb')
+    except FileNotFoundError:
+        return [], 0
+    with f:
+        f.seek(offset)
+        data = f.read()
+    end = data.rfind(b"\n") + 1
+    records = []
+    for line in data[:end].splitlines():
+        if not line.strip():
+            continue
+        try:
+            records.append(json_loads(line))
+        except ValueError:
+            print(f"Skipping unreadable delta record in {path}")
+    return records, offset + end
+
+def remove_delta(path: str) -> None:
+    """Delete a delta file once it is folded into its shard"""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,585 @@
+"""
+SQLite Journal Manager Module
+Stores a user's journal in a single SQLite database instead of one JSON file
+per day. Entries, tags, tasks, goals and chat messages live in their own
+tables, so date ranges, tag filters and counts are answered by indexed SQL.
+
+Select it with BUJONOW_STORAGE_BACKEND=sqlite (see create_journal_manager).
+"""
+
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from src.journal_index import TAG_MODES
+from src.journal_manager import ENTRY_FIELDS, PACK_AFTER_DAYS, JournalManager, _date_key_bounds, merge_segment, project_entry
+from src.journal_rollup import DONE_STATUSES, empty_stats, merge_stats, summarize_stats
+from src.text_index import chat_message_text, entry_texts, parse_query
+from src.utils.serialization import json_dumps, json_loads
+
+DB_FILENAME = "journal.sqlite3"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    date TEXT PRIMARY KEY,
+    timestamp TEXT,
+    category TEXT,
+    text TEXT NOT NULL DEFAULT '',
+    primary_emotion TEXT,
+    emotion_key TEXT,
+    emotion_analysis TEXT,
+    ai_summary TEXT,
+    metadata TEXT,
+    word_count INTEGER NOT NULL DEFAULT 0,
+    last_modified TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_entries_emotion ON entries(emotion_key, date);
+
+CREATE TABLE IF NOT EXISTS tags (
+    date TEXT NOT NULL REFERENCES entries(date) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    tag TEXT NOT NULL,
+    PRIMARY KEY (date, position)
+);
+CREATE INDEX IF NOT EXISTS idx_tags_tag ON tags(tag, date);
+
+CREATE TABLE IF NOT EXISTS tasks (
+    date TEXT NOT NULL REFERENCES entries(date) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    status TEXT,
+    data TEXT NOT NULL,
+    PRIMARY KEY (date, position)
+);
+
+CREATE TABLE IF NOT EXISTS goals (
+    date TEXT NOT NULL REFERENCES entries(date) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (date, position)
+);
+
+CREATE TABLE IF NOT EXISTS chat_messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    date TEXT NOT NULL REFERENCES entries(date) ON DELETE CASCADE,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_chat_date ON chat_messages(date, id);
+"""
+
+# Full-text index over entry text, tags and chat messages (needs FTS5)
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS entries_fts USING fts5(
+    date UNINDEXED, body, tokenize='unicode61 remove_diacritics 0'
+)
+"""
+
+# SQLite limits the number of host parameters per statement
+_IN_CHUNK = 500
+
+def _dumps(value) -> str:
+    return json_dumps(value)
+
+class SQLiteJournalManager(JournalManager):
+    """JournalManager backed by a single per-user SQLite database"""
+
+    # Range queries are single SELECTs; splitting them into concurrent reads gains nothing
+    parallel_reads = False
+
+    def _init_storage(self):
+        """Open the database and create the schema if needed"""
+        self.db_path = os.path.join(self.journal_dir, DB_FILENAME)
+        self._local = threading.local()
+        conn = self._connection()
+        conn.executescript(SCHEMA)
+        try:
+            conn.execute(FTS_SCHEMA)
+            self.fts_enabled = True
+        except sqlite3.OperationalError as e:
+            print(f"Full-text search disabled, SQLite FTS5 unavailable: {str(e)}")
+            self.fts_enabled = False
+        if self.fts_enabled and conn.execute("SELECT 1 FROM entries_fts LIMIT 1").fetchone() is None:
+            # Databases created before the full-text index existed
+            self._rebuild_fts()
+
+    def _rebuild_fts(self) -> None:
+        """Refill the full-text index from the entries table"""
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM entries_fts")
+            cursor = conn.execute("SELECT * FROM entries ORDER BY date")
+            while True:
+                rows = cursor.fetchmany(_IN_CHUNK)
+                if not rows:
+                    break
+                conn.executemany(
+                    "INSERT INTO entries_fts (date, body) VALUES (?, ?)",
+                    [(entry["date"], "\n".join(entry_texts(entry))) for entry in self._load_entries(rows)]
+                )
+
+    def _connection(self) -> sqlite3.Connection:
+        """Get this thread's connection to the database"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+            self._local.depth = 0
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        """Run a block in a write transaction; nested blocks join the outer one"""
+        conn = self._connection()
+        if self._local.depth == 0:
+            conn.execute("BEGIN IMMEDIATE")
+            self._local.pending_changes = []
+        self._local.depth += 1
+        try:
+            yield conn
+        except BaseException:
+            self._local.depth -= 1
+            if self._local.depth == 0:
+                conn.execute("ROLLBACK")
+                self._local.pending_changes = []
+            raise
+        else:
+            self._local.depth -= 1
+            if self._local.depth == 0:
+                pending, self._local.pending_changes = self._local.pending_changes, []
+                # Log the changes ahead of the commit, in one locked section with it
+                with self.lock:
+                    if pending:
+                        super()._record_changes(pending)
+                    conn.execute("COMMIT")
+
+    def _record_changes(self, changes: List[Tuple[str, str, List[str]]], fsync: bool = True) -> None:
+        """Log changes when the transaction that makes them commits"""
+        self._connection()
+        if self._local.depth > 0:
+            self._local.pending_changes.extend(changes)
+        else:
+            super()._record_changes(changes, fsync)
+
+    def close(self) -> None:
+        """Close this thread's database connection"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+        super().close()
+
+    def _save_entry(self, entry: Dict, date: datetime):
+        """Save a journal entry and its child rows in one transaction"""
+        content = entry.get("content", {})
+        emotion_analysis = entry.get("emotion_analysis") or {}
+        metadata = entry.get("metadata", {})
+        primary_emotion = emotion_analysis.get("primary_emotion") if isinstance(emotion_analysis, dict) else None
+        date_str = entry["date"]
+
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM entries WHERE date = ?", (date_str,))
+            conn.execute(
+                "INSERT INTO entries (date, timestamp, category, text, primary_emotion, emotion_key, "
+                "emotion_analysis, ai_summary, metadata, word_count, last_modified) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    date_str,
+                    entry.get("timestamp"),
+                    entry.get("category"),
+                    content.get("text", ""),
+                    primary_emotion,
+                    primary_emotion.lower() if isinstance(primary_emotion, str) else None,
+                    _dumps(emotion_analysis),
+                    _dumps(content.get("ai_summary", [])),
+                    _dumps(metadata),
+                    metadata.get("word_count", 0),
+                    metadata.get("last_modified")
+                )
+            )
+            conn.executemany(
+                "INSERT INTO tags (date, position, tag) VALUES (?, ?, ?)",
+                [(date_str, i, tag) for i, tag in enumerate(content.get("tags") or [])]
+            )
+            conn.executemany(
+                "INSERT INTO tasks (date, position, status, data) VALUES (?, ?, ?, ?)",
+                [
+                    (date_str, i, task.get("status") if isinstance(task, dict) else None, _dumps(task))
+                    for i, task in enumerate(content.get("tasks") or [])
+                ]
+            )
+            conn.executemany(
+                "INSERT INTO goals (date, position, data) VALUES (?, ?, ?)",
+                [(date_str, i, _dumps(goal)) for i, goal in enumerate(content.get("goals") or [])]
+            )
+            conn.executemany(
+                "INSERT INTO chat_messages (date, data) VALUES (?, ?)",
+                [(date_str, _dumps(message)) for message in content.get("chat_history") or []]
+            )
+            if self.fts_enabled:
+                conn.execute("DELETE FROM entries_fts WHERE date = ?", (date_str,))
+                conn.execute("INSERT INTO entries_fts (date, body) VALUES (?, ?)",
+                             (date_str, "\n".join(entry_texts(entry))))
+
+    def _load_entries(self, rows: List[sqlite3.Row]) -> List[Dict]:
+        """Assemble entry dictionaries for entry rows, in row order"""
+        if not rows:
+            return []
+        conn = self._connection()
+        dates = [row["date"] for row in rows]
+        children = {date_str: {"tags": [], "tasks": [], "goals": [], "chat_history": []} for date_str in dates}
+
+        for start in range(0, len(dates), _IN_CHUNK):
+            chunk = dates[start:start + _IN_CHUNK]
+            marks = ",".join("?" * len(chunk))
+            for row in conn.execute(f"SELECT date, tag FROM tags WHERE date IN ({marks}) ORDER BY date, position", chunk):
+                children[row["date"]]["tags"].append(row["tag"])
+            for row in conn.execute(f"SELECT date, data FROM tasks WHERE date IN ({marks}) ORDER BY date, position", chunk):
+                children[row["date"]]["tasks"].append(json_loads(row["data"]))
+            for row in conn.execute(f"SELECT date, data FROM goals WHERE date IN ({marks}) ORDER BY date, position", chunk):
+                children[row["date"]]["goals"].append(json_loads(row["data"]))
+            for row in conn.execute(f"SELECT date, data FROM chat_messages WHERE date IN ({marks}) ORDER BY date, id", chunk):
+                children[row["date"]]["chat_history"].append(json_loads(row["data"]))
+
+        entries = []
+        for row in rows:
+            child = children[row["date"]]
+            entries.append({
+                "date": row["date"],
+                "timestamp": row["timestamp"],
+                "category": row["category"],
+                "content": {
+                    "text": row["text"],
+                    "tasks": child["tasks"],
+                    "goals": child["goals"],
+                    "tags": child["tags"],
+                    "chat_history": child["chat_history"],
+                    "ai_summary": json_loads(row["ai_summary"]) if row["ai_summary"] else []
+                },
+                "emotion_analysis": json_loads(row["emotion_analysis"]) if row["emotion_analysis"] else {},
+                "metadata": json_loads(row["metadata"]) if row["metadata"] else {}
+            })
+        return entries
+
+    def get_entry(self, date: datetime) -> Optional[Dict]:
+        """Retrieve a journal entry for a specific date"""
+        rows = self._connection().execute(
+            "SELECT * FROM entries WHERE date = ?", (date.strftime("%Y-%m-%d"),)
+        ).fetchall()
+        entries = self._load_entries(rows)
+        return entries[0] if entries else None
+
+    def has_entry(self, date: datetime) -> bool:
+        """Check whether an entry exists for a date"""
+        return self._connection().execute(
+            "SELECT 1 FROM entries WHERE date = ?", (date.strftime("%Y-%m-%d"),)
+        ).fetchone() is not None
+
+    def append_chat_message(self, message: Dict, date: Optional[datetime] = None) -> None:
+        """Append one chat message to an existing day's entry"""
+        if date is None:
+            date = datetime.now()
+        date_str = date.strftime("%Y-%m-%d")
+        with self._transaction() as conn:
+            if conn.execute("SELECT 1 FROM entries WHERE date = ?", (date_str,)).fetchone() is None:
+                raise ValueError(f"No journal entry for {date_str}")
+            conn.execute("INSERT INTO chat_messages (date, data) VALUES (?, ?)", (date_str, _dumps(message)))
+            if self.fts_enabled:
+                conn.execute("UPDATE entries_fts SET body = body || ? WHERE date = ?",
+                             ("\n" + "\n".join(chat_message_text(message)), date_str))
+        self._record_changes([(date_str, "chat", ["content.chat_history"])])
+
+    def flush_chat_logs(self) -> None:
+        """Chat messages are committed with each append; nothing to flush"""
+
+    def compact_chat_log(self, date: datetime) -> bool:
+        """Chat messages already live in their own table; nothing to compact"""
+        return False
+
+    def _append_segment(self, date: datetime, segment: Dict) -> Dict:
+        """Fold a later save of the day into its rows; only that day's rows are rewritten"""
+        with self._transaction():
+            entry = merge_segment(self.get_entry(date), segment)
+            self._save_entry(entry, date)
+            return entry
+
+    def _import_batch(self, entries: List[Dict]) -> int:
+        """Write a batch of imported entries in a single transaction"""
+        with self._transaction():
+            for entry in entries:
+                self._save_entry(entry, datetime.strptime(entry["date"], '%Y-%m-%d'))
+        return len(entries)
+
+    def _import_logged_batch(self, entries: List[Dict]) -> int:
+        """Log and write a batch of imported entries in a single transaction"""
+        with self._transaction():
+            self._record_changes([(entry["date"], "import", ENTRY_FIELDS) for entry in entries])
+            return self._import_batch(entries)
+
+    def create_entry(self, *args, **kwargs) -> Dict:
+        """Create a journal entry inside a single transaction"""
+        with self._transaction():
+            return super().create_entry(*args, **kwargs)
+
+    def record_entry(self, *args, **kwargs) -> Dict:
+        """Create or merge the day's entry inside a single transaction"""
+        with self._transaction():
+            return super().record_entry(*args, **kwargs)
+
+    def update_entry(self, *args, **kwargs) -> Optional[Dict]:
+        """Update an existing journal entry inside a single transaction"""
+        with self._transaction():
+            return super().update_entry(*args, **kwargs)
+
+    def _filter_sql(self,
+                    start_date: Optional[datetime],
+                    end_date: Optional[datetime],
+                    tags: Optional[List[str]],
+                    emotion: Optional[str],
+                    default_range: bool = True,
+                    tag_mode: str = "any") -> Tuple[str, List]:
+        """Build the WHERE clause shared by search and count queries"""
+        if tag_mode not in TAG_MODES:
+            raise ValueError(f"Unknown tag mode: {tag_mode} (expected 'any' or 'all')")
+        if default_range:
+            if not start_date:
+                start_date = datetime.now().replace(day=1)
+            if not end_date:
+                end_date = datetime.now()
+
+        clauses = ["1 = 1"]
+        params: List = []
+        if start_date:
+            clauses.append("date >= ?")
+            params.append(_date_key_bounds(start_date, start_date)[0])
+        if end_date:
+            clauses.append("date <= ?")
+            params.append(end_date.date().isoformat())
+        if tags:
+            tags = list(dict.fromkeys(tags))
+            subquery = f"SELECT date FROM tags WHERE tag IN ({','.join('?' * len(tags))})"
+            if tag_mode == "all":
+                subquery += " GROUP BY date HAVING COUNT(DISTINCT tag) = ?"
+            clauses.append(f"date IN ({subquery})")
+            params.extend(tags)
+            if tag_mode == "all":
+                params.append(len(tags))
+        if emotion:
+            clauses.append("emotion_key = ?")
+            params.append(emotion.lower())
+        return " AND ".join(clauses), params
+
+    def search_entries(self,
+                      start_date: Optional[datetime] = None,
+                      end_date: Optional[datetime] = None,
+                      tags: Optional[List[str]] = None,
+                      emotion: Optional[str] = None,
+                      tag_mode: str = "any") -> List[Dict]:
+        """Search journal entries based on criteria"""
+        where, params = self._filter_sql(start_date, end_date, tags, emotion, tag_mode=tag_mode)
+        rows = self._connection().execute(
+            f"SELECT * FROM entries WHERE {where} ORDER BY date", params
+        ).fetchall()
+        return self._load_entries(rows)
+
+    def iter_entries(self,
+                     start_date: Optional[datetime] = None,
+                     end_date: Optional[datetime] = None,
+                     fields: Optional[Sequence[str]] = None,
+                     tags: Optional[List[str]] = None,
+                     emotion: Optional[str] = None,
+                     tag_mode: str = "any",
+                     descending: bool = False,
+                     limit: Optional[int] = None) -> Iterator[Dict]:
+        """Stream journal entries in date order, optionally projected to some fields"""
+        where, params = self._filter_sql(start_date, end_date, tags, emotion, default_range=False, tag_mode=tag_mode)
+        sql = f"SELECT * FROM entries WHERE {where} ORDER BY date {'DESC' if descending else 'ASC'}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        cursor = self._connection().execute(sql, params)
+        while True:
+            rows = cursor.fetchmany(_IN_CHUNK)
+            if not rows:
+                break
+            for entry in self._load_entries(rows):
+                yield project_entry(entry, fields) if fields else entry
+
+    def get_all_entries(self) -> List[Dict]:
+        """Retrieve all journal entries in chronological order"""
+        rows = self._connection().execute("SELECT * FROM entries ORDER BY date").fetchall()
+        return self._load_entries(rows)
+
+    def count_entries(self,
+                      start_date: Optional[datetime] = None,
+                      end_date: Optional[datetime] = None,
+                      tags: Optional[List[str]] = None,
+                      emotion: Optional[str] = None,
+                      tag_mode: str = "any") -> int:
+        """Count the entries matching the same criteria as search_entries"""
+        where, params = self._filter_sql(start_date, end_date, tags, emotion, tag_mode=tag_mode)
+        return self._connection().execute(f"SELECT COUNT(*) FROM entries WHERE {where}", params).fetchone()[0]
+
+    def get_emotion_counts(self,
+                           start_date: Optional[datetime] = None,
+                           end_date: Optional[datetime] = None) -> Dict[str, int]:
+        """Count entries per primary emotion in a date range"""
+        where, params = self._filter_sql(start_date, end_date, None, None)
+        rows = self._connection().execute(
+            f"SELECT emotion_key, COUNT(*) AS n FROM entries WHERE {where} AND emotion_key IS NOT NULL "
+            "GROUP BY emotion_key",
+            params
+        ).fetchall()
+        return {row["emotion_key"]: row["n"] for row in rows}
+
+    def _aggregate(self, where: str, params: List, by_month: bool) -> Dict[str, Dict]:
+        """Compute rollup-shaped aggregates with SQL, per month or for the whole range ("")"""
+        conn = self._connection()
+        group = "substr(e.date, 1, 7)" if by_month else "''"
+        done = ",".join("?" * len(DONE_STATUSES))
+        done_params = sorted(DONE_STATUSES)
+        in_range = f"SELECT date FROM entries WHERE {where}"
+        result: Dict[str, Dict] = {}
+
+        def bucket(key: str) -> Dict:
+            return result.setdefault(key, empty_stats())
+
+        for row in conn.execute(
+            f"SELECT {group} AS k, COUNT(*) AS n, SUM(e.word_count) AS words, "
+            "SUM(CASE WHEN json_type(e.emotion_analysis, '$.emotion_intensity') IN ('integer', 'real') "
+            "THEN json_extract(e.emotion_analysis, '$.emotion_intensity') END) AS intensity_sum, "
+            "COUNT(CASE WHEN json_type(e.emotion_analysis, '$.emotion_intensity') IN ('integer', 'real') "
+            "THEN 1 END) AS intensity_count "
+            f"FROM entries e WHERE e.date IN ({in_range}) GROUP BY k",
+            params
+        ):
+            stats = bucket(row["k"])
+            stats["entries"] = row["n"]
+            stats["word_count"] = row["words"] or 0
+            stats["intensity_sum"] = row["intensity_sum"] or 0
+            stats["intensity_count"] = row["intensity_count"]
+
+        for row in conn.execute(
+            f"SELECT {group} AS k, e.emotion_key AS name, COUNT(*) AS n FROM entries e "
+            f"WHERE e.date IN ({in_range}) AND e.emotion_key IS NOT NULL GROUP BY k, name",
+            params
+        ):
+            bucket(row["k"])["emotions"][row["name"]] = row["n"]
+
+        themes = " UNION ".join(
+            f"SELECT e.date AS date, j.value AS theme FROM entries e, json_each(e.emotion_analysis, '{path}') j "
+            f"WHERE e.date IN ({in_range}) AND j.type = 'text'"
+            for path in ("$.emotional_themes", "$.themes")
+        )
+        theme_group = "substr(date, 1, 7)" if by_month else "''"
+        for row in conn.execute(
+            f"SELECT {theme_group} AS k, theme, COUNT(DISTINCT date) AS n FROM ({themes}) GROUP BY k, theme",
+            params + params
+        ):
+            bucket(row["k"])["themes"][row["theme"]] = row["n"]
+
+        for row in conn.execute(
+            f"SELECT {group} AS k, COUNT(*) AS total, SUM(LOWER(e.status) IN ({done})) AS done "
+            f"FROM tasks e WHERE e.date IN ({in_range}) GROUP BY k",
+            done_params + params
+        ):
+            bucket(row["k"])["tasks"] = {"total": row["total"], "done": row["done"] or 0}
+
+        for row in conn.execute(
+            f"SELECT {group} AS k, COUNT(*) AS total, "
+            f"SUM(LOWER(json_extract(e.data, '$.status')) IN ({done}) "
+            "OR CAST(json_extract(e.data, '$.progress') AS REAL) >= 100) AS done "
+            f"FROM goals e WHERE e.date IN ({in_range}) GROUP BY k",
+            done_params + params
+        ):
+            bucket(row["k"])["goals"] = {"total": row["total"], "done": row["done"] or 0}
+
+        return result
+
+    def get_stats(self,
+                  start_date: Optional[datetime] = None,
+                  end_date: Optional[datetime] = None) -> Dict:
+        """Aggregate statistics for a date range with SQL aggregates"""
+        where, params = self._filter_sql(start_date, end_date, None, None, default_range=False)
+        return summarize_stats(merge_stats(empty_stats(), self._aggregate(where, params, False).get("", {})))
+
+    def get_monthly_stats(self,
+                          start_date: Optional[datetime] = None,
+                          end_date: Optional[datetime] = None) -> Dict[str, Dict]:
+        """Aggregate statistics per month with SQL aggregates"""
+        where, params = self._filter_sql(start_date, end_date, None, None, default_range=False)
+        monthly = self._aggregate(where, params, True)
+        return {month: summarize_stats(monthly[month]) for month in sorted(monthly)}
+
+    def get_facet_counts(self,
+                         start_date: Optional[datetime] = None,
+                         end_date: Optional[datetime] = None,
+                         tags: Optional[List[str]] = None,
+                         emotion: Optional[str] = None,
+                         tag_mode: str = "any") -> Dict[str, Dict[str, int]]:
+        """Count entries per tag and per primary emotion with GROUP BY queries"""
+        where, params = self._filter_sql(start_date, end_date, tags, emotion, default_range=False, tag_mode=tag_mode)
+        conn = self._connection()
+        tag_rows = conn.execute(
+            f"SELECT tag, COUNT(DISTINCT date) AS n FROM tags WHERE date IN (SELECT date FROM entries WHERE {where}) "
+            "GROUP BY tag",
+            params
+        ).fetchall()
+        emotion_rows = conn.execute(
+            f"SELECT emotion_key, COUNT(*) AS n FROM entries WHERE {where} AND emotion_key IS NOT NULL "
+            "GROUP BY emotion_key",
+            params
+        ).fetchall()
+        return {
+            "tags": {row["tag"]: row["n"] for row in tag_rows},
+            "emotions": {row["emotion_key"]: row["n"] for row in emotion_rows}
+        }
+
+    def rebuild_index(self) -> int:
+        """Refill the full-text index (other indexes stay up to date); returns the number of entries"""
+        if self.fts_enabled:
+            self._rebuild_fts()
+        return self._connection().execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def search_text(self,
+                    query: str,
+                    start_date: Optional[datetime] = None,
+                    end_date: Optional[datetime] = None,
+                    limit: int = 20) -> List[Dict]:
+        """Full-text search answered by the FTS5 index, ranked with its bm25()"""
+        if not self.fts_enabled:
+            print("Full-text search is unavailable: SQLite was built without FTS5")
+            return []
+        terms, phrases = parse_query(query)
+        if not terms:
+            return []
+        # Phrases must match; the OR group only adds the free terms to the ranking
+        any_term = " OR ".join(f'"{term}"' for term in terms)
+        match = " AND ".join([f'"{" ".join(phrase)}"' for phrase in phrases] + [f"({any_term})"])
+
+        clauses = ["entries_fts MATCH ?"]
+        params: List = [match]
+        if start_date:
+            clauses.append("date >= ?")
+            params.append(_date_key_bounds(start_date, start_date)[0])
+        if end_date:
+            clauses.append("date <= ?")
+            params.append(end_date.date().isoformat())
+        rows = self._connection().execute(
+            f"SELECT date, bm25(entries_fts) AS rank FROM entries_fts WHERE {' AND '.join(clauses)} "
+            "ORDER BY rank LIMIT ?",
+            params + [limit]
+        ).fetchall()
+        return self._search_results([(row["date"], round(-row["rank"], 4)) for row in rows], terms)
+
+    def pack_cold_months(self, min_age_days: int = PACK_AFTER_DAYS) -> int:
+        """Entries live in one database file, so there are no day files to pack"""
+        return 0
+
+    def migrate_format(self, storage_format: Optional[str] = None) -> int:
+        """The database has its own encoding; nothing to rewrite"""
+        return 0
@@ -0,0 +1,508 @@
+"""
+Text Index Module
+Maintains a per-user inverted index over the text of journal entries (entry
+text, tags and chat messages) for ranked full-text search.
+
+Like the entry index, the text index is sharded by month: each YYYY-MM
+journal directory holds a _text.json file with the term positions of that
+month's entries, so saving an entry only rewrites one shard. Chat messages
+and later saves of a day are appended to the month's _text.delta.jsonl
+instead (see shard_delta). Term frequencies of all months are kept in memory
+for BM25 scoring; positions are read from the shards only to verify phrase
+matches.
+"""
+
+import heapq
+import math
+import os
+import re
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from src.journal_index import CHAT_LOG_SUFFIX, SEGMENT_LOG_SUFFIX, list_day_files, list_month_dirs, month_is_current
+from src.shard_delta import DELTA_COMPACT_BYTES, append_delta, delta_path, delta_stat, read_delta, remove_delta
+from src.utils.file_io import atomic_write
+from src.utils.serialization import json_dumps, json_loads
+
+TEXT_INDEX_FILENAME = "_text.json"
+TEXT_INDEX_VERSION = 1
+
+# BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+PHRASE_PATTERN = re.compile(r'"([^"]*)"')
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase word tokens"""
+    return TOKEN_PATTERN.findall(text.lower()) if text else []
+
+def chat_message_text(message: Dict) -> List[str]:
+    """Get the searchable texts of a chat message in either stored layout"""
+    if not isinstance(message, dict):
+        return []
+    return [message[key] for key in ("user", "assistant", "content") if isinstance(message.get(key), str)]
+
+def entry_texts(entry: Dict) -> List[str]:
+    """
+    Get the searchable texts of an entry
+
+    Args:
+        entry: A journal entry
+
+    Returns:
+        The entry text, its tags and its chat messages, as separate fields
+    """
+    content = entry.get("content") or {}
+    texts = [content.get("text") or "", " ".join(content.get("tags") or [])]
+    for message in content.get("chat_history") or []:
+        texts.extend(chat_message_text(message))
+    return texts
+
+def index_texts(texts: Iterable[str], start: int = 0) -> Tuple[Dict[str, List[int]], int]:
+    """
+    Compute term positions for a sequence of fields
+
+    A gap is left between fields so that phrases never match across them.
+
+    Args:
+        texts: Field texts
+        start: Position of the first token
+
+    Returns:
+        (term -> positions, next free position)
+    """
+    terms: Dict[str, List[int]] = {}
+    position = start
+    for text in texts:
+        for token in tokenize(text):
+            terms.setdefault(token, []).append(position)
+            position += 1
+        position += 1
+    return terms, position
+
+def parse_query(query: str) -> Tuple[List[str], List[List[str]]]:
+    """
+    Parse a search query
+
+    Quoted parts are phrases that must appear verbatim; all other words are
+    ranked with BM25 and at least one of them (or a phrase) must match.
+
+    Args:
+        query: Query text, e.g. 'walk "morning run"'
+
+    Returns:
+        (all query terms, phrases as token lists)
+    """
+    phrases = [tokens for tokens in (tokenize(p) for p in PHRASE_PATTERN.findall(query)) if len(tokens) > 1]
+    terms = tokenize(PHRASE_PATTERN.sub(" ", query))
+    for phrase in phrases:
+        terms.extend(phrase)
+    return list(dict.fromkeys(terms)), phrases
+
+def make_snippet(text: str, terms: List[str], width: int = 160) -> str:
+    """
+    Cut a snippet of text around the first occurrence of a query term
+
+    Args:
+        text: Entry text
+        terms: Query terms
+        width: Approximate snippet length in characters
+
+    Returns:
+        The snippet, with ellipses where text was cut
+    """
+    if not text:
+        return ""
+    lowered = text.lower()
+    first = min((match.start() for term in terms
+                 for match in [re.search(r"\b" + re.escape(term) + r"\b", lowered)] if match), default=0)
+    start = max(0, first - width // 3)
+    end = min(len(text), start + width)
+    snippet = text[start:end].strip()
+    return ("…" if start > 0 else "") + snippet + ("…" if end < len(text) else "")
+
+class TextIndex:
+    """Month-sharded inverted index of a single user's journal text"""
+
+    def __init__(self, journal_dir: str, load_entry: Callable[[str, str], Optional[Dict]]):
+        """
+        Initialize the text index for a journal directory
+
+        Args:
+            journal_dir: The user's journal directory (containing YYYY-MM folders)
+            load_entry: Function (file path, date) -> entry used to rebuild shards
+        """
+        self.journal_dir = journal_dir
+        self.load_entry = load_entry
+        # month -> (shard mtime_ns, month directory mtime_ns when last checked,
+        #           delta bytes applied, {date: {term: frequency}})
+        self._months: Dict[str, Tuple[int, Optional[int], int, Dict[str, Dict[str, int]]]] = {}
+        # term -> {date: frequency}
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._lengths: Dict[str, int] = {}
+        self._total_length = 0
+        self._lock = threading.RLock()
+
+    def _shard_path(self, month: str) -> str:
+        return os.path.join(self.journal_dir, month, TEXT_INDEX_FILENAME)
+
+    def _delta_path(self, month: str) -> str:
+        return delta_path(self._shard_path(month))
+
+    def _read_shard(self, month: str) -> Optional[Tuple[Dict[str, Dict[str, List[int]]], int]]:
+        """Read the term positions of a month and its delta offset, or None if the shard is missing or unreadable"""
+        shard_path = self._shard_path(month)
+        try:
+            with open(shard_path, 'rb') as f:
+                data = json_loads(f.read())
+            return data.get("docs", {}), data.get("delta_offset", 0)
+        except FileNotFoundError:
+            return None
+        except (ValueError, OSError) as e:
+            print(f"Error reading text index {shard_path}: {str(e)}")
+            return None
+
+    def _read_positions(self, month: str) -> Optional[Dict[str, Dict[str, List[int]]]]:
+        """Read the term positions of a month with its delta applied"""
+        loaded = self._read_shard(month)
+        if loaded is None:
+            return None
+        docs, offset = loaded
+        for record in read_delta(self._delta_path(month), offset)[0]:
+            terms = docs.setdefault(record["date"], {})
+            start = max((positions[-1] for positions in terms.values()), default=-1) + 2
+            for term, positions in index_texts(record.get("texts") or [], start)[0].items():
+                terms.setdefault(term, []).extend(positions)
+        return docs
+
+    def _store_shard(self, month: str, docs: Dict[str, Dict[str, List[int]]], delta_offset: Optional[int] = None) -> None:
+        """
+        Persist a month shard and load its frequencies into memory
+
+        Args:
+            month: Month directory name (YYYY-MM)
+            docs: Term positions by date
+            delta_offset: Bytes of the delta the docs include, or None if they
+                include all of it (the delta is then removed)
+        """
+        shard_path = self._shard_path(month)
+        # The index can be rebuilt from the entries, so skip the fsync
+        atomic_write(shard_path, json_dumps({"version": TEXT_INDEX_VERSION, "docs": docs,
+                                             "delta_offset": delta_offset or 0}), fsync=False)
+        if delta_offset is None:
+            remove_delta(self._delta_path(month))
+        # Written under the lock from the entries, so the directory is known to match
+        self._set_month(month, os.stat(shard_path).st_mtime_ns, os.stat(os.path.dirname(shard_path)).st_mtime_ns,
+                        delta_offset or 0, docs)
+
+    def _set_month(self,
+                   month: str,
+                   mtime_ns: int,
+                   dir_mtime_ns: Optional[int],
+                   delta_offset: int,
+                   docs: Dict[str, Dict[str, List[int]]]) -> None:
+        """Replace the in-memory frequencies of a month"""
+        self._drop_month(month)
+        frequencies = {}
+        for date_str, terms in docs.items():
+            doc = {term: len(positions) for term, positions in terms.items()}
+            frequencies[date_str] = doc
+            for term, count in doc.items():
+                self._postings.setdefault(term, {})[date_str] = count
+            length = sum(doc.values())
+            self._lengths[date_str] = length
+            self._total_length += length
+        self._months[month] = (mtime_ns, dir_mtime_ns, delta_offset, frequencies)
+
+    def _apply_delta(self, month: str, records: List[Dict], delta_offset: int) -> None:
+        """Add the terms of delta records to the in-memory frequencies of a loaded month"""
+        mtime_ns, dir_mtime_ns, _, frequencies = self._months[month]
+        for record in records:
+            date_str = record["date"]
+            doc = frequencies.setdefault(date_str, {})
+            added = 0
+            for text in record.get("texts") or []:
+                for token in tokenize(text):
+                    doc[token] = doc.get(token, 0) + 1
+                    self._postings.setdefault(token, {})[date_str] = doc[token]
+                    added += 1
+            self._lengths[date_str] = self._lengths.get(date_str, 0) + added
+            self._total_length += added
+        self._months[month] = (mtime_ns, dir_mtime_ns, delta_offset, frequencies)
+
+    def _drop_month(self, month: str) -> None:
+        """Forget the in-memory frequencies of a month"""
+        cached = self._months.pop(month, None)
+        if cached is None:
+            return
+        for date_str, doc in cached[3].items():
+            for term in doc:
+                postings = self._postings.get(term)
+                if postings is not None:
+                    postings.pop(date_str, None)
+                    if not postings:
+                        del self._postings[term]
+            self._total_length -= self._lengths.pop(date_str, 0)
+
+    def _load_month(self, month: str, updating: Set[str] = frozenset()) -> None:
+        """
+        Make sure the in-memory frequencies of a month match its shard and delta
+
+        Lines appended to the delta since the last load are applied on top.
+        The month directory is only compared with the index when its mtime
+        changed since the last check, and a stale shard is rebuilt.
+
+        Args:
+            month: Month directory name (YYYY-MM)
+            updating: Dates the caller is about to re-index, whose files may
+                already be newer than the shard
+        """
+        shard_path = self._shard_path(month)
+        try:
+            mtime_ns = os.stat(shard_path).st_mtime_ns
+            dir_mtime_ns = os.stat(os.path.dirname(shard_path)).st_mtime_ns
+        except FileNotFoundError:
+            self.rebuild_month(month)
+            return
+        delta_size, delta_mtime_ns = delta_stat(self._delta_path(month))
+
+        cached = self._months.get(month)
+        if cached is None or cached[0] != mtime_ns or delta_size < cached[2]:
+            loaded = self._read_shard(month)
+            if loaded is None:
+                self.rebuild_month(month)
+                return
+            docs, offset = loaded
+            self._set_month(month, mtime_ns, None, min(offset, delta_size), docs)
+            cached = self._months[month]
+        if delta_size > cached[2]:
+            records, end = read_delta(self._delta_path(month), cached[2])
+            self._apply_delta(month, records, end)
+            cached = self._months[month]
+        if cached[1] == dir_mtime_ns:
+            return
+
+        if not month_is_current(self.journal_dir, month, cached[3], max(mtime_ns, delta_mtime_ns), updating,
+                                (SEGMENT_LOG_SUFFIX, CHAT_LOG_SUFFIX), exact=False):
+            print(f"Text index {shard_path} is out of date, rebuilding")
+            self.rebuild_month(month)
+            return
+        self._months[month] = (mtime_ns, dir_mtime_ns, cached[2], cached[3])
+
+    def refresh(self) -> None:
+        """Pick up shards and deltas written by other processes and months that were removed"""
+        with self._lock:
+            months = list_month_dirs(self.journal_dir)
+            for month in set(self._months) - set(months):
+                self._drop_month(month)
+            for month in months:
+                self._load_month(month)
+
+    def rebuild_month(self, month: str) -> int:
+        """
+        Rebuild the shard of one month from the entries on disk
+
+        Args:
+            month: Month directory name (YYYY-MM)
+
+        Returns:
+            Number of indexed entries
+        """
+        docs = {}
+        with self._lock:
+            if not os.path.isdir(os.path.join(self.journal_dir, month)):
+                self._drop_month(month)
+                return 0
+            # The entries include the chat and segment logs the delta was appended for
+            delta_offset = delta_stat(self._delta_path(month))[0]
+            for date_str, name in list_day_files(self.journal_dir, month):
+                file_path = os.path.join(self.journal_dir, month, name)
+                try:
+                    entry = self.load_entry(file_path, date_str)
+                except Exception as e:
+                    print(f"Error reading entry {file_path}: {str(e)}")
+                    continue
+                if entry is not None:
+                    docs[date_str] = index_texts(entry_texts(entry))[0]
+            self._store_shard(month, docs, delta_offset)
+        return len(docs)
+
+    def rebuild(self) -> int:
+        """
+        Rebuild the whole text index from the entries on disk
+
+        Returns:
+            Number of indexed entries
+        """
+        with self._lock:
+            for month in list(self._months):
+                self._drop_month(month)
+            return sum(self.rebuild_month(month) for month in list_month_dirs(self.journal_dir))
+
+    def update(self, entry: Dict) -> None:
+        """
+        Index (or re-index) a saved entry
+
+        Args:
+            entry: The full entry, including its chat history
+        """
+        self.update_many([entry])
+
+    def update_many(self, entries: List[Dict]) -> None:
+        """
+        Index several saved entries, writing each month shard once
+
+        The month's delta is folded into the shard at the same time.
+
+        Args:
+            entries: Full entries, including their chat history
+        """
+        by_month: Dict[str, List[Dict]] = {}
+        for entry in entries:
+            by_month.setdefault(entry["date"][:7], []).append(entry)
+        with self._lock:
+            for month, month_entries in by_month.items():
+                self._load_month(month, {entry["date"] for entry in month_entries})
+                docs = self._read_positions(month)
+                if docs is None:
+                    self.rebuild_month(month)
+                    continue
+                for entry in month_entries:
+                    docs[entry["date"]] = index_texts(entry_texts(entry))[0]
+                self._store_shard(month, docs)
+
+    def replace_month(self, month: str, entries: List[Dict]) -> None:
+        """
+        Store a month shard built from all of the month's entries
+
+        Args:
+            month: Month directory name (YYYY-MM)
+            entries: Every entry of the month, including its chat history
+        """
+        with self._lock:
+            self._store_shard(month, {entry["date"]: index_texts(entry_texts(entry))[0] for entry in entries})
+
+    def add_texts(self, date_str: str, texts: List[str]) -> None:
+        """
+        Append fields to an indexed entry, e.g. a new chat message
+
+        The fields are appended to the month's delta, so the cost does not
+        depend on the size of the month; the delta is folded into the shard
+        once it grows past DELTA_COMPACT_BYTES. Callers must serialize writes
+        (JournalManager holds its write lock).
+
+        Args:
+            date_str: Date of the entry (YYYY-MM-DD)
+            texts: Field texts to add after the entry's existing text
+        """
+        month = date_str[:7]
+        record = {"date": date_str, "texts": texts}
+        with self._lock:
+            os.makedirs(os.path.join(self.journal_dir, month), exist_ok=True)
+            start, end = append_delta(self._delta_path(month), [record])
+            cached = self._months.get(month)
+            if cached is not None and cached[2] == start:
+                self._apply_delta(month, [record], end)
+            if end >= DELTA_COMPACT_BYTES:
+                self.fold_month(month)
+
+    def fold_month(self, month: str) -> None:
+        """
+        Fold a month's delta into its shard
+
+        Args:
+            month: Month directory name (YYYY-MM)
+        """
+        with self._lock:
+            if not delta_stat(self._delta_path(month))[0]:
+                return
+            docs = self._read_positions(month)
+            if docs is None:
+                self.rebuild_month(month)
+            else:
+                self._store_shard(month, docs)
+
+    def _has_phrase(self, terms: Dict[str, List[int]], phrase: List[str]) -> bool:
+        """Check whether a document contains the tokens of a phrase consecutively"""
+        if any(token not in terms for token in phrase):
+            return False
+        following = [set(terms[token]) for token in phrase[1:]]
+        return any(all(start + offset + 1 in positions for offset, positions in enumerate(following))
+                   for start in terms[phrase[0]])
+
+    def search(self,
+               query: str,
+               start_key: Optional[str] = None,
+               end_key: Optional[str] = None,
+               limit: int = 20) -> List[Tuple[str, float]]:
+        """
+        Rank entries against a query with BM25
+
+        Args:
+            query: Query text; quoted parts are phrases
+            start_key: Inclusive lower date bound (YYYY-MM-DD)
+            end_key: Inclusive upper date bound (YYYY-MM-DD)
+            limit: Maximum number of results
+
+        Returns:
+            (date, score) tuples, best match first
+        """
+        terms, phrases = parse_query(query)
+        if not terms:
+            return []
+
+        with self._lock:
+            self.refresh()
+            doc_count = len(self._lengths)
+            if not doc_count:
+                return []
+            avg_length = self._total_length / doc_count
+
+            if phrases:
+                # Every phrase must match: start from the dates having all phrase tokens
+                candidates = None
+                for token in {token for phrase in phrases for token in phrase}:
+                    dates = set(self._postings.get(token, ()))
+                    candidates = dates if candidates is None else candidates & dates
+            else:
+                candidates = set()
+                for term in terms:
+                    candidates.update(self._postings.get(term, ()))
+            candidates = {date_str for date_str in candidates
+                          if (not start_key or date_str >= start_key) and (not end_key or date_str <= end_key)}
+
+            idf = {}
+            for term in terms:
+                df = len(self._postings.get(term, ()))
+                idf[term] = math.log(1 + (doc_count - df + 0.5) / (df + 0.5))
+
+            scored = []
+            for date_str in candidates:
+                length_norm = BM25_K1 * (1 - BM25_B + BM25_B * self._lengths[date_str] / avg_length)
+                score = 0.0
+                for term in terms:
+                    tf = self._postings.get(term, {}).get(date_str, 0)
+                    if tf:
+                        score += idf[term] * tf * (BM25_K1 + 1) / (tf + length_norm)
+                scored.append((score, date_str))
+
+            if not phrases:
+                ranked = heapq.nlargest(limit, scored)
+            else:
+                # Verify phrases in rank order and stop once enough entries matched,
+                # reading each month's positions at most once
+                ranked = []
+                shards: Dict[str, Dict[str, Dict[str, List[int]]]] = {}
+                for score, date_str in sorted(scored, reverse=True):
+                    month = date_str[:7]
+                    if month not in shards:
+                        shards[month] = self._read_positions(month) or {}
+                    terms_positions = shards[month].get(date_str)
+                    if terms_positions and all(self._has_phrase(terms_positions, phrase) for phrase in phrases):
+                        ranked.append((score, date_str))
+                        if len(ranked) >= limit:
+                            break
+
+        return [(date_str, round(score, 4)) for score, date_str in ranked]
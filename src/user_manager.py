@@ -4,7 +4,6 @@ Handles user authentication, sessions, and user-specific data management.
 """
 
 import os
-import json
 import requests
 from datetime import datetime, timedelta
 from typing import Dict, Optional, List, Any
@@ -12,10 +11,21 @@ from pathlib import Path
 import base64
 import urllib.parse
 
+from src.utils.file_io import atomic_write
+from src.utils.serialization import get_codec, read_file
+from src.utils.user_paths import ensure_dir, user_dir
+
 class UserManager:
-    def __init__(self, users_dir: str = "users"):
-        """Initialize the user manager"""
+    def __init__(self, users_dir: str = "users", storage_format: Optional[str] = None):
+        """
+        Initialize the user manager
+        
+        Args:
+            users_dir: Directory holding one folder per user
+            storage_format: Codec for user data writes (defaults to BUJONOW_ENTRY_FORMAT)
+        """
         self.users_dir = users_dir
+        self.codec = get_codec(storage_format)
         self._ensure_users_dir()
         self.client_id = os.getenv("OAUTH_CLIENT_ID")
         self.client_secret = os.getenv("OAUTH_CLIENT_SECRET")
@@ -26,18 +36,16 @@ class UserManager:
         Path(self.users_dir).mkdir(parents=True, exist_ok=True)
 
     def _get_user_dir(self, user_id: str) -> str:
-        """Get the directory for a specific user's data"""
-        user_dir = os.path.join(self.users_dir, user_id)
-        Path(user_dir).mkdir(parents=True, exist_ok=True)
-        return user_dir
+        """Get the directory for a specific user's data, creating it once per process"""
+        return ensure_dir(user_dir(user_id, self.users_dir))
 
     def _get_user_journal_dir(self, user_id: str) -> str:
         """Get the journal directory for a specific user"""
-        return os.path.join(self._get_user_dir(user_id), "journals")
+        return os.path.join(user_dir(user_id, self.users_dir), "journals")
 
     def _get_user_data_path(self, user_id: str) -> str:
-        """Get the path to the user's data file"""
-        return os.path.join(self._get_user_dir(user_id), "user_data.json")
+        """Get the path to the user's data file (lookups never create directories)"""
+        return os.path.join(user_dir(user_id, self.users_dir), "user_data.json")
 
     def get_auth_url(self, redirect_uri: str, state: str) -> str:
         """Generate the OAuth authorization URL"""
@@ -108,8 +116,7 @@ class UserManager:
         user_data_path = self._get_user_data_path(user_id)
         
         # Create user's journal directory
-        journal_dir = self._get_user_journal_dir(user_id)
-        Path(journal_dir).mkdir(parents=True, exist_ok=True)
+        ensure_dir(self._get_user_journal_dir(user_id))
         
         # Calculate token expiration time
         expires_in = token_data.get("expires_in", 86400)  # Default to 24 hours
@@ -131,18 +138,20 @@ class UserManager:
             "last_login": datetime.now().isoformat()
         }
         
-        with open(user_data_path, 'w', encoding='utf-8') as f:
-            json.dump(user_data, f, indent=2, ensure_ascii=False)
+        self._write_user_data(user_data_path, user_data)
         
         return user_id
 
+    def _write_user_data(self, user_data_path: str, user_data: Dict) -> None:
+        """Write a user data file with the configured codec"""
+        atomic_write(user_data_path, self.codec.encode(user_data))
+
     def get_user_data(self, user_id: str) -> Optional[Dict]:
         """Get stored user data"""
         user_data_path = self._get_user_data_path(user_id)
         
         try:
-            with open(user_data_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            return read_file(user_data_path)
         except FileNotFoundError:
             return None
 
@@ -153,8 +162,7 @@ class UserManager:
             user_data["last_login"] = datetime.now().isoformat()
             
             user_data_path = self._get_user_data_path(user_id)
-            with open(user_data_path, 'w', encoding='utf-8') as f:
-                json.dump(user_data, f, indent=2, ensure_ascii=False)
+            self._write_user_data(user_data_path, user_data)
 
     def is_session_valid(self, user_id: str) -> bool:
         """Check if a user's session is still valid"""
@@ -0,0 +1,126 @@
+"""
+User Session Module
+
+Per-request user context for the BujoNow application. A UserSession carries
+everything that is scoped to one user (journal manager and directories) so
+that concurrent requests from different users never share mutable state.
+Sessions are cached in a bounded LRU pool and resolved from the user ID of
+each request.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from src.journal_manager import create_journal_manager
+from src.utils.user_paths import USERS_DIR, ensure_dir, user_dir
+
+# Default number of user sessions kept warm in the pool
+DEFAULT_POOL_SIZE = int(os.environ.get("BUJONOW_SESSION_POOL_SIZE", "128"))
+
+class UserSession:
+    """User-scoped state for handling a request"""
+
+    def __init__(self, user_id: str, journals_dir: str = "journals", users_dir: str = USERS_DIR):
+        """
+        Create a session for a user
+
+        Args:
+            user_id: The user the session belongs to
+            journals_dir: Name of the journal directory inside the user directory
+            users_dir: Root directory holding all user data
+        """
+        self.user_id = user_id
+        self.journal_manager = create_journal_manager(journals_dir, user_id, users_dir=users_dir)
+        base_dir = user_dir(user_id, users_dir)
+        self.uploads_dir = ensure_dir(os.path.join(base_dir, "uploads"))
+        self.visualizations_dir = ensure_dir(os.path.join(base_dir, "visualizations"))
+
+    def close(self) -> None:
+        """Release the session's open files (requests still using it can continue)"""
+        try:
+            self.journal_manager.close()
+        except Exception as e:
+            print(f"Error closing session of {self.user_id}: {str(e)}")
+
+class UserSessionPool:
+    """Thread-safe LRU cache of UserSession objects keyed by user ID"""
+
+    def __init__(self, max_size: int = DEFAULT_POOL_SIZE, journals_dir: str = "journals", users_dir: str = USERS_DIR):
+        """
+        Initialize the session pool
+
+        Args:
+            max_size: Maximum number of sessions kept before evicting the least recently used
+            journals_dir: Journal directory name passed to new sessions
+            users_dir: Users root directory passed to new sessions
+        """
+        self.max_size = max(1, max_size)
+        self.journals_dir = journals_dir
+        self.users_dir = users_dir
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: str) -> UserSession:
+        """
+        Get the session for a user, creating it if needed
+
+        Args:
+            user_id: The user ID from the request state
+
+        Returns:
+            The user's session
+        """
+        if not user_id:
+            raise ValueError("A user ID is required to resolve a session")
+
+        with self._lock:
+            session = self._sessions.get(user_id)
+            if session is not None:
+                self._sessions.move_to_end(user_id)
+                return session
+
+        # Build outside the lock so slow directory setup doesn't block other users
+        session = UserSession(user_id, self.journals_dir, self.users_dir)
+
+        with self._lock:
+            # Another request may have created it in the meantime
+            existing = self._sessions.get(user_id)
+            if existing is not None:
+                self._sessions.move_to_end(user_id)
+                return existing
+            self._sessions[user_id] = session
+            evicted = []
+            while len(self._sessions) > self.max_size:
+                evicted.append(self._sessions.popitem(last=False)[1])
+        for old in evicted:
+            old.close()
+        return session
+
+    def evict(self, user_id: str) -> Optional[UserSession]:
+        """Remove a user's session from the pool (e.g. on logout) and close it"""
+        with self._lock:
+            session = self._sessions.pop(user_id, None)
+        if session is not None:
+            session.close()
+        return session
+
+    def clear(self) -> None:
+        """Remove and close all sessions"""
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        for session in sessions:
+            session.close()
+
+    def __contains__(self, user_id: str) -> bool:
+        with self._lock:
+            return user_id in self._sessions
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._sessions)
+
+# Process-wide session pool
+session_pool = UserSessionPool()
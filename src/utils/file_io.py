@@ -0,0 +1,249 @@
+"""
+File I/O utilities for crash-safe journal storage.
+Provides atomic file replacement and a reentrant lock that also excludes
+other processes, so several workers can share one users/ directory, plus
+batched fsyncs and optionally compressed streams for bulk import and export.
+"""
+
+import gzip
+import io
+import os
+import tempfile
+import threading
+import weakref
+from typing import BinaryIO, Iterable, Optional, Union
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+try:
+    import msvcrt
+except ImportError:  # POSIX
+    msvcrt = None
+
+def atomic_write(path: str, data: Union[str, bytes], fsync: bool = True) -> None:
+    """
+    Replace a file's contents atomically
+
+    The data is written to a temporary file in the same directory, flushed to
+    disk and renamed over the target, so readers see either the old or the new
+    contents and a crash never leaves a truncated file.
+
+    Args:
+        path: Target file path
+        data: Text (written as UTF-8) or bytes
+        fsync: Whether to force the data and the rename to stable storage
+    """
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+    if fsync and hasattr(os, "O_DIRECTORY"):
+        # Persist the rename itself
+        dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+def fsync_paths(paths: Iterable[str]) -> None:
+    """
+    Force already written files and their directories to stable storage
+
+    Lets bulk writers skip the per-file fsync of atomic_write and sync a whole
+    batch at once.
+
+    Args:
+        paths: Paths of the written files
+    """
+    directories = set()
+    for path in paths:
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        directories.add(os.path.dirname(path) or ".")
+    if hasattr(os, "O_DIRECTORY"):
+        for directory in directories:
+            dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+
+COMPRESSIONS = ("gzip", "zstd")
+
+def compression_for_path(path: str) -> Optional[str]:
+    """Guess the compression of a stream file from its extension"""
+    if path.endswith(".gz"):
+        return "gzip"
+    if path.endswith(".zst"):
+        return "zstd"
+    return None
+
+def open_stream(target: Union[str, BinaryIO], mode: str, compression: Optional[str] = None) -> BinaryIO:
+    """
+    Open a binary stream for reading ("rb") or writing ("wb"), optionally compressed
+
+    Args:
+        target: File path, or an open binary file (which is left open on close)
+        mode: "rb" or "wb"
+        compression: None, "gzip" or "zstd" (guessed from the extension of a path)
+
+    Returns:
+        A binary file object; closing it finishes the compressed stream
+
+    Raises:
+        ValueError: If the compression is unknown or zstandard is not installed
+    """
+    if mode not in ("rb", "wb"):
+        raise ValueError(f"Unsupported stream mode: {mode}")
+    if compression is None and isinstance(target, str):
+        compression = compression_for_path(target)
+    if compression not in (None,) + COMPRESSIONS:
+        raise ValueError(f"Unknown compression: {compression} (expected one of {', '.join(COMPRESSIONS)})")
+    if compression == "zstd" and zstandard is None:
+        raise ValueError("zstd compression requires the zstandard package (pip install zstandard)")
+
+    owns_file = isinstance(target, str)
+    if compression == "gzip":
+        # GzipFile never closes a file object it was given
+        return gzip.open(target, mode) if owns_file else gzip.GzipFile(fileobj=target, mode=mode)
+    raw = open(target, mode) if owns_file else target
+    if compression == "zstd":
+        if mode == "wb":
+            return zstandard.ZstdCompressor().stream_writer(raw, closefd=owns_file)
+        return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(raw, closefd=owns_file))
+    if owns_file:
+        return raw
+    return io.BufferedWriter(_Unclosed(raw)) if mode == "wb" else io.BufferedReader(_Unclosed(raw))
+
+class _Unclosed(io.RawIOBase):
+    """Wrapper that leaves a caller's file open when the stream is closed"""
+
+    def __init__(self, raw: BinaryIO):
+        self._raw = raw
+
+    def readable(self) -> bool:
+        return self._raw.readable()
+
+    def writable(self) -> bool:
+        return self._raw.writable()
+
+    def readinto(self, buffer) -> int:
+        data = self._raw.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def write(self, data) -> int:
+        return self._raw.write(data)
+
+    def close(self) -> None:
+        if not self.closed:
+            self._raw.flush()
+        super().close()
+
+class InterProcessLock:
+    """
+    Reentrant lock that serializes threads of this process and, through an
+    exclusive lock on a file, other processes using the same lock file.
+
+    The lock file is only open while the lock is held, so an idle lock keeps
+    no file descriptor.
+    """
+
+    def __init__(self, path: str):
+        """
+        Initialize the lock
+
+        Args:
+            path: Lock file path (created if missing)
+        """
+        self.path = path
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._fd = None
+
+    def acquire(self) -> None:
+        """Acquire the lock, blocking until it is available"""
+        self._thread_lock.acquire()
+        if self._depth == 0:
+            try:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+                if fcntl is not None:
+                    fcntl.flock(self._fd, fcntl.LOCK_EX)
+                elif msvcrt is not None:
+                    os.lseek(self._fd, 0, os.SEEK_SET)
+                    msvcrt.locking(self._fd, msvcrt.LK_LOCK, 1)
+            except BaseException:
+                if self._fd is not None:
+                    os.close(self._fd)
+                    self._fd = None
+                self._thread_lock.release()
+                raise
+        self._depth += 1
+
+    def release(self) -> None:
+        """Release one level of the lock"""
+        self._depth -= 1
+        if self._depth == 0:
+            try:
+                if fcntl is not None:
+                    fcntl.flock(self._fd, fcntl.LOCK_UN)
+                elif msvcrt is not None:
+                    os.lseek(self._fd, 0, os.SEEK_SET)
+                    msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+            finally:
+                os.close(self._fd)
+                self._fd = None
+        self._thread_lock.release()
+
+    def __enter__(self) -> "InterProcessLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.release()
+
+# Locks stay registered while some manager holds a reference to them
+_locks: "weakref.WeakValueDictionary[str, InterProcessLock]" = weakref.WeakValueDictionary()
+_locks_guard = threading.Lock()
+
+def get_file_lock(path: str) -> InterProcessLock:
+    """
+    Get the process-wide lock object for a lock file
+
+    All callers locking the same file share one object, so threads of this
+    process are serialized by its thread lock before contending for the file.
+    """
+    key = os.path.abspath(path)
+    with _locks_guard:
+        lock = _locks.get(key)
+        if lock is None:
+            lock = _locks[key] = InterProcessLock(key)
+        return lock
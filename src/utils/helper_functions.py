@@ -18,6 +18,8 @@ from pydub import AudioSegment
 import speech_recognition as sr
 from PIL import Image
 
+from src.knowledge_base import load_documents
+
 # Try to import face detection and emotion analysis libraries
 # Provide fallbacks if they're not available
 try:
@@ -47,61 +49,8 @@ if FER_AVAILABLE:
 else:
     emotion_detector = None
 
-# RAG documents for emotional support contexts
-RAG_DOCUMENTS = [
-    "Practicing gratitude can significantly improve mental well-being by shifting focus from negative thoughts.",
-    "CBT techniques help reframe negative thinking patterns into constructive insights.",
-    "Social connection and being heard improve emotional regulation and resilience.",
-    "Journaling builds self-awareness and emotional processing.",
-    "Mindfulness and breathing exercises can reduce anxiety symptoms.",
-    "Setting boundaries helps prevent burnout and protects well-being.",
-    "Labeling emotions accurately helps regulate them.",
-    "Acts of self-care can boost mood and positivity.",
-    "A sense of purpose improves long-term well-being.",
-    "Self-compassion reduces self-criticism and nurtures kindness.",
-    "Building resilience involves embracing challenges and learning from adversity.",
-    "Exercise and physical activity have a profound impact on mental health.",
-    "Developing a growth mindset helps overcome obstacles and setbacks.",
-    "Sleep hygiene and quality rest play a critical role in emotional health.",
-    "Accepting imperfections and practicing self-forgiveness can reduce stress.",
-    "Positive affirmations can improve self-esteem and mental clarity.",
-    "Mindful eating and nutrition impact mental and emotional states.",
-    "Visualization techniques can help manage stress and anxiety.",
-    "Effective communication skills are essential for managing conflict and building connections.",
-    "Grief is a complex emotional experience that requires time, patience, and support.",
-    "Your mental health is just as important as your physical health.",
-    "It's okay not to be okay.",
-    "You are not your mental illness.",
-    "Your struggles do not define you.",
-    "Taking care of your mental health is an act of self-love.",
-    "You are worthy of happiness and peace of mind.",
-    "There is no shame in seeking help for your mental health.",
-    "It's okay to take a break and prioritize your mental health.",
-    "You are not alone in your struggles.",
-    "It's okay to ask for support when you need it.",
-    "Mental health is not a destination, it's a journey.",
-    "Your mental health matters more than any external validation.",
-    "You are stronger than you realize.",
-    "Self-care is not selfish, it's necessary for good mental health.",
-    "Small steps can lead to big progress in mental health.",
-    "You are capable of overcoming your mental health challenges.",
-    "Mental illness is not a personal failure, it's a medical condition.",
-    "You are deserving of a life free from mental health struggles.",
-    "It's okay to take medication for your mental health.",
-    "You are not a burden for seeking help for your mental health.",
-    "Mental health issues do not make you any less of a person.",
-    "Your mental health is just as important as your career or education.",
-    "You are capable of managing your mental health and living a fulfilling life.",
-    "You have the power to overcome your mental health challenges.",
-    "You are deserving of love and compassion, especially from yourself.",
-    "Your mental health struggles do not define your future.",
-    "It's okay to prioritize your mental health over other commitments.",
-    "You are not alone in your journey towards better mental health.",
-    "Mental health recovery is possible, and it starts with seeking help.",
-    "You are worthy of a life filled with joy and happiness.",
-    "It's okay to have bad days and ask for support when you need it.",
-    "You have the power to change your relationship with your mental health."
-]
+# RAG documents for emotional support contexts (see knowledge/)
+RAG_DOCUMENTS = [doc["content"] for doc in load_documents()]
 
 # Pre-define emotion mapping for visualization
 EMOTION_SCORES = {
@@ -284,27 +233,30 @@ def visualize_emotion_trend(entries: List[Dict]) -> plt.Figure:
     plt.tight_layout()
     return fig
 
-def visualize_emotion_distribution(entries: List[Dict]) -> plt.Figure:
+def visualize_emotion_distribution(entries: List[Dict], emotion_counts: Optional[Dict[str, int]] = None) -> plt.Figure:
     """
     Creates a visualization of emotion distribution across journal entries.
     
     Args:
         entries (List[Dict]): List of journal entries.
+        emotion_counts (Dict[str, int], optional): Precomputed counts, e.g. the
+            "emotions" of JournalManager.get_stats; entries are ignored if given.
         
     Returns:
         plt.Figure: Matplotlib figure with the visualization.
     """
-    emotions = []
-    
-    for entry in entries:
-        try:
-            emotion = entry['emotion_analysis']['primary_emotion'].lower()
-            emotions.append(emotion)
-        except KeyError:
-            continue
-    
-    # Count emotion occurrences
-    emotion_counts = Counter(emotions)
+    if emotion_counts is None:
+        emotions = []
+        
+        for entry in entries:
+            try:
+                emotion = entry['emotion_analysis']['primary_emotion'].lower()
+                emotions.append(emotion)
+            except KeyError:
+                continue
+        
+        # Count emotion occurrences
+        emotion_counts = Counter(emotions)
     
     # Create the figure
     fig, ax = plt.subplots(figsize=(10, 6))
@@ -331,37 +283,47 @@ def visualize_emotion_distribution(entries: List[Dict]) -> plt.Figure:
     plt.tight_layout()
     return fig
 
-def get_weekly_summary(entries: List[Dict]) -> str:
+def get_weekly_summary(entries: List[Dict], stats: Optional[Dict] = None) -> str:
     """
     Generates a weekly summary of journal entries.
     
     Args:
         entries (List[Dict]): List of journal entries from the week.
+        stats (Dict, optional): Precomputed statistics (JournalManager.get_stats);
+            when given, counts are taken from it instead of the entries.
         
     Returns:
         str: A summary of the week's journal entries.
     """
-    if not entries:
-        return "No entries found for this week."
-    
-    # Extract emotions and themes
-    emotions = []
-    all_themes = []
-    
-    for entry in entries:
-        try:
-            emotion = entry['emotion_analysis']['primary_emotion'].lower()
-            emotions.append(emotion)
-            
-            # Extract themes if available
-            if 'themes' in entry['emotion_analysis']:
-                all_themes.extend(entry['emotion_analysis']['themes'])
-        except KeyError:
-            continue
-    
-    # Count occurrences
-    emotion_counts = Counter(emotions)
-    theme_counts = Counter(all_themes)
+    if stats is not None:
+        if not stats["entries"]:
+            return "No entries found for this week."
+        emotion_counts = Counter(stats["emotions"])
+        theme_counts = Counter(stats["themes"])
+        entry_count = stats["entries"]
+    else:
+        if not entries:
+            return "No entries found for this week."
+        
+        # Extract emotions and themes
+        emotions = []
+        all_themes = []
+        
+        for entry in entries:
+            try:
+                emotion = entry['emotion_analysis']['primary_emotion'].lower()
+                emotions.append(emotion)
+                
+                # Extract themes if available
+                if 'themes' in entry['emotion_analysis']:
+                    all_themes.extend(entry['emotion_analysis']['themes'])
+            except KeyError:
+                continue
+        
+        # Count occurrences
+        emotion_counts = Counter(emotions)
+        theme_counts = Counter(all_themes)
+        entry_count = len(entries)
     
     # Find most common
     primary_emotion = emotion_counts.most_common(1)[0][0] if emotion_counts else "unknown"
@@ -374,7 +336,7 @@ def get_weekly_summary(entries: List[Dict]) -> str:
     if common_themes:
         summary += "Common themes: " + ", ".join(common_themes) + "\n\n"
     
-    summary += f"You made {len(entries)} journal entries this week.\n\n"
+    summary += f"You made {entry_count} journal entries this week.\n\n"
     
     # Add general reflection based on primary emotion
     if primary_emotion in ["happy", "excited", "grateful", "content"]:
@@ -0,0 +1,162 @@
+"""
+Serialization utilities for journal storage.
+Provides the codecs used to store entries and user data on disk:
+
+- json: compact JSON, encoded with orjson when it is installed
+- json-pretty: indented JSON, the original human-readable layout
+- msgpack: binary MessagePack (requires the msgpack package)
+
+Reads never need to know which codec wrote a file: decode() detects the
+format from the first byte, so trees can hold a mix of formats while they
+are being migrated.
+"""
+
+import json
+import os
+from typing import Any, Callable, Dict, List
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# Codec used for new writes unless one is passed explicitly
+DEFAULT_FORMAT = os.environ.get("BUJONOW_ENTRY_FORMAT", "json")
+
+_JSON_START = frozenset(b"{[\"-0123456789tfn \t\r\n")
+_UTF8_BOM = b"\xef\xbb\xbf"
+
+def json_dumps(value: Any) -> str:
+    """Serialize a value to compact JSON text (non-ASCII kept as is)"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(value).decode('utf-8')
+        except TypeError:
+            # Non-string keys or out-of-range integers; let the stdlib handle them
+            pass
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+
+def json_loads(data: Any) -> Any:
+    """Parse JSON text or UTF-8 bytes"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+class Codec:
+    """A named pair of encode/decode functions"""
+
+    def __init__(self, name: str, encode: Callable[[Any], bytes], decode: Callable[[bytes], Any]):
+        """
+        Initialize the codec
+
+        Args:
+            name: Format name, as accepted by get_codec
+            encode: Function turning a value into bytes
+            decode: Function turning bytes back into a value
+        """
+        self.name = name
+        self.encode = encode
+        self.decode = decode
+
+def _encode_json(value: Any) -> bytes:
+    return json_dumps(value).encode('utf-8')
+
+def _encode_json_pretty(value: Any) -> bytes:
+    if orjson is not None:
+        try:
+            return orjson.dumps(value, option=orjson.OPT_INDENT_2)
+        except TypeError:
+            pass
+    return json.dumps(value, indent=2, ensure_ascii=False).encode('utf-8')
+
+def _decode_json(data: bytes) -> Any:
+    if data.startswith(_UTF8_BOM):
+        data = data[len(_UTF8_BOM):]
+    return json_loads(data)
+
+def _encode_msgpack(value: Any) -> bytes:
+    return msgpack.packb(value, use_bin_type=True)
+
+def _decode_msgpack(data: bytes) -> Any:
+    return msgpack.unpackb(data, raw=False)
+
+CODECS: Dict[str, Codec] = {
+    "json": Codec("json", _encode_json, _decode_json),
+    "json-pretty": Codec("json-pretty", _encode_json_pretty, _decode_json)
+}
+if msgpack is not None:
+    CODECS["msgpack"] = Codec("msgpack", _encode_msgpack, _decode_msgpack)
+
+def available_formats() -> List[str]:
+    """List the codec names usable in this environment"""
+    return list(CODECS)
+
+def get_codec(name: str = None) -> Codec:
+    """
+    Look up a codec by name
+
+    Args:
+        name: Format name (defaults to BUJONOW_ENTRY_FORMAT, or json)
+
+    Returns:
+        The codec
+
+    Raises:
+        ValueError: If the format is unknown or its package is not installed
+    """
+    name = name or DEFAULT_FORMAT
+    codec = CODECS.get(name)
+    if codec is None:
+        if name == "msgpack":
+            raise ValueError("The msgpack format requires the msgpack package (pip install msgpack)")
+        raise ValueError(f"Unknown storage format: {name} (expected one of {', '.join(CODECS)})")
+    return codec
+
+def detect_format(data: bytes) -> str:
+    """
+    Detect the format of stored data from its first byte
+
+    JSON documents start with a brace, bracket or whitespace, while a
+    MessagePack map starts with a byte of 0x80 or above.
+
+    Args:
+        data: Raw file contents
+
+    Returns:
+        "json" or "msgpack"
+    """
+    if not data or data.startswith(_UTF8_BOM) or data[0] in _JSON_START:
+        return "json"
+    return "msgpack"
+
+def decode(data: bytes) -> Any:
+    """
+    Decode stored data, whatever codec wrote it
+
+    Args:
+        data: Raw file contents
+
+    Returns:
+        The decoded value
+
+    Raises:
+        ValueError: If the data is malformed, or is MessagePack and msgpack is not installed
+    """
+    if detect_format(data) == "json":
+        return _decode_json(data)
+    if msgpack is None:
+        raise ValueError("Found a MessagePack file but the msgpack package is not installed")
+    try:
+        return _decode_msgpack(data)
+    except Exception as e:
+        raise ValueError(f"Invalid MessagePack data: {str(e)}") from e
+
+def read_file(path: str) -> Any:
+    """Read and decode a stored file"""
+    with open(path, 'rb') as f:
+        return decode(f.read())
@@ -0,0 +1,157 @@
+"""
+User directory layout.
+Places each user's data under a two-level hashed prefix of the users
+directory (users/ab/cd/<user_id>), so no directory holds more than a few
+hundred entries however many users there are.
+
+Directories of the older flat layout (users/<user_id>) are still found until
+they are moved with migrate_user_dirs. Path resolutions and created
+directories are remembered per process, so resolving a known user costs no
+system calls.
+"""
+
+import hashlib
+import os
+import re
+import threading
+from functools import lru_cache
+from typing import Iterator, Set, Tuple
+
+USERS_DIR = "users"
+
+# Names of the two hash levels: two lowercase hex digits each
+SHARD_PATTERN = re.compile(r"^[0-9a-f]{2}$")
+
+# Number of user directory resolutions remembered per process
+MAX_CACHED_USERS = 65536
+
+_created_dirs: Set[str] = set()
+_created_lock = threading.Lock()
+
+def _check_user_id(user_id: str) -> None:
+    if not user_id or user_id in (".", "..") or "/" in user_id or "\\" in user_id:
+        raise ValueError(f"Invalid user ID: {user_id!r}")
+
+def shard_prefix(user_id: str) -> Tuple[str, str]:
+    """Get the two hash levels a user's directory is placed under"""
+    digest = hashlib.sha1(user_id.encode('utf-8')).hexdigest()
+    return digest[:2], digest[2:4]
+
+def hashed_user_dir(user_id: str, users_dir: str = USERS_DIR) -> str:
+    """Get a user's directory in the hashed layout (users/ab/cd/<user_id>)"""
+    _check_user_id(user_id)
+    return os.path.join(users_dir, *shard_prefix(user_id), user_id)
+
+def legacy_user_dir(user_id: str, users_dir: str = USERS_DIR) -> str:
+    """Get a user's directory in the flat layout (users/<user_id>)"""
+    _check_user_id(user_id)
+    return os.path.join(users_dir, user_id)
+
+@lru_cache(maxsize=MAX_CACHED_USERS)
+def user_dir(user_id: str, users_dir: str = USERS_DIR) -> str:
+    """
+    Resolve a user's data directory
+
+    A user still in the flat layout keeps its directory until it is
+    migrated; everyone else uses the hashed layout. The result is cached,
+    so migrate_user_dirs clears the cache after moving directories.
+
+    Args:
+        user_id: The user ID
+        users_dir: Root directory holding all user data
+
+    Returns:
+        Path of the user's directory (which may not exist yet)
+
+    Raises:
+        ValueError: If the user ID cannot be used as a directory name
+    """
+    legacy = legacy_user_dir(user_id, users_dir)
+    # A two-hex-digit user ID names a shard directory, never a flat-layout user
+    if not SHARD_PATTERN.match(user_id) and os.path.isdir(legacy):
+        return legacy
+    return hashed_user_dir(user_id, users_dir)
+
+def ensure_dir(path: str) -> str:
+    """
+    Create a directory unless this process already created it
+
+    Args:
+        path: Directory path
+
+    Returns:
+        The path
+    """
+    if path in _created_dirs:
+        return path
+    os.makedirs(path, exist_ok=True)
+    with _created_lock:
+        _created_dirs.add(path)
+    return path
+
+def clear_cache() -> None:
+    """Forget cached resolutions and created directories (e.g. after moving directories)"""
+    user_dir.cache_clear()
+    with _created_lock:
+        _created_dirs.clear()
+
+def iter_user_dirs(users_dir: str = USERS_DIR) -> Iterator[Tuple[str, str]]:
+    """
+    List every user directory, in either layout
+
+    Args:
+        users_dir: Root directory holding all user data
+
+    Yields:
+        (user ID, user directory) tuples, sorted by user ID within each layout
+    """
+    try:
+        names = sorted(os.listdir(users_dir))
+    except FileNotFoundError:
+        return
+    shards = []
+    for name in names:
+        path = os.path.join(users_dir, name)
+        if not os.path.isdir(path):
+            continue
+        if SHARD_PATTERN.match(name):
+            shards.append(path)
+        else:
+            yield name, path
+    for first in shards:
+        for second in sorted(os.listdir(first)):
+            second_path = os.path.join(first, second)
+            if not SHARD_PATTERN.match(second) or not os.path.isdir(second_path):
+                continue
+            for user_id in sorted(os.listdir(second_path)):
+                path = os.path.join(second_path, user_id)
+                if os.path.isdir(path):
+                    yield user_id, path
+
+def migrate_user_dirs(users_dir: str = USERS_DIR) -> int:
+    """
+    Move flat-layout user directories into the hashed layout
+
+    Each directory is moved with a single rename, so its contents are never
+    copied. Run it while the app is stopped: running processes keep the paths
+    they already resolved.
+
+    Args:
+        users_dir: Root directory holding all user data
+
+    Returns:
+        Number of moved user directories
+    """
+    moved = 0
+    for user_id, path in list(iter_user_dirs(users_dir)):
+        target = hashed_user_dir(user_id, users_dir)
+        if path == target:
+            continue
+        if os.path.exists(target):
+            print(f"Not moving {path}: {target} already exists")
+            continue
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        os.rename(path, target)
+        moved += 1
+    clear_cache()
+    return moved
@@ -0,0 +1,115 @@
+"""
+Vector Index Module
+In-memory nearest-neighbour search over document embeddings for RAG.
+
+Embeddings are held as one contiguous float32 matrix whose rows are L2
+normalized when the index is built, so a query is scored against every
+document with a single matrix-vector product (cosine similarity) and the
+top k are selected with argpartition instead of sorting all scores.
+"""
+
+from typing import Any, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+def normalize_rows(matrix: "np.ndarray") -> "np.ndarray":
+    """
+    L2-normalize the rows of a matrix in place
+
+    Args:
+        matrix: float32 matrix, one vector per row
+
+    Returns:
+        The same matrix (all-zero rows are left as they are)
+    """
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    matrix /= norms
+    return matrix
+
+class VectorIndex:
+    """Cosine-similarity search over a fixed set of document embeddings"""
+
+    def __init__(self, vectors: Sequence[Sequence[float]], documents: Optional[Sequence[Any]] = None):
+        """
+        Build the index
+
+        Args:
+            vectors: One embedding per document (all of the same length)
+            documents: Optional per-row payload returned with search results
+                (e.g. {"title", "content"} dicts); defaults to row numbers
+        """
+        matrix = np.array(vectors, dtype=np.float32, order='C', copy=True)
+        if matrix.ndim != 2:
+            raise ValueError("vectors must be a sequence of equal-length embeddings")
+        self.matrix = normalize_rows(matrix)
+        self.documents = list(documents) if documents is not None else list(range(len(matrix)))
+        if len(self.documents) != len(self.matrix):
+            raise ValueError(f"Got {len(self.documents)} documents for {len(self.matrix)} vectors")
+
+    @classmethod
+    def from_normalized(cls, matrix: "np.ndarray", documents: Sequence[Any]) -> "VectorIndex":
+        """
+        Wrap a matrix whose rows are already L2-normalized, without copying it
+
+        Args:
+            matrix: float32 matrix, e.g. memory-mapped from an embedding cache
+            documents: Per-row payload returned with search results
+
+        Returns:
+            The index
+        """
+        index = cls.__new__(cls)
+        index.matrix = matrix
+        index.documents = list(documents)
+        if len(index.documents) != len(matrix):
+            raise ValueError(f"Got {len(index.documents)} documents for {len(matrix)} vectors")
+        return index
+
+    def __len__(self) -> int:
+        return len(self.matrix)
+
+    @property
+    def dimensions(self) -> int:
+        """Length of the embeddings"""
+        return self.matrix.shape[1]
+
+    def scores(self, query_vector: Sequence[float]) -> "np.ndarray":
+        """
+        Cosine similarity of a query to every document
+
+        Args:
+            query_vector: Query embedding
+
+        Returns:
+            One float32 score per document, in row order
+        """
+        query = np.asarray(query_vector, dtype=np.float32).ravel()
+        if query.shape[0] != self.dimensions:
+            raise ValueError(f"Query has {query.shape[0]} dimensions, the index has {self.dimensions}")
+        norm = np.linalg.norm(query)
+        if norm:
+            query = query / norm
+        return self.matrix @ query
+
+    def search(self, query_vector: Sequence[float], top_k: int = 3) -> List[Tuple[Any, float]]:
+        """
+        Find the documents most similar to a query
+
+        Args:
+            query_vector: Query embedding
+            top_k: Number of documents to return
+
+        Returns:
+            (document, score) pairs, most similar first
+        """
+        if not len(self) or top_k <= 0:
+            return []
+        scores = self.scores(query_vector)
+        top_k = min(top_k, len(scores))
+        if top_k < len(scores):
+            rows = np.argpartition(-scores, top_k - 1)[:top_k]
+        else:
+            rows = np.arange(len(scores))
+        rows = rows[np.argsort(-scores[rows], kind='stable')]
+        return [(self.documents[row], float(scores[row])) for row in rows]
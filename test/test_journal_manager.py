@@ -0,0 +1,711 @@
+"""
+Journal Manager Tests
+
+Checks the storage behaviour of JournalManager against a temporary journal
+directory. Run directly with `python test/test_journal_manager.py` or via pytest.
+"""
+
+import asyncio
+import gc
+import os
+import sys
+import json
+import tempfile
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add the project root to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.analyzer_simplified import Analyzer as SimplifiedAnalyzer
+from src.async_journal_manager import AsyncJournalManager
+from src.journal_manager import ConcurrentModificationError, JournalManager, create_journal_manager
+from src.user_session import UserSessionPool
+from src.utils import file_io, user_paths
+from src.utils.serialization import available_formats, detect_format
+
+def _analysis(emotion: str) -> dict:
+    return {
+        "primary_emotion": emotion,
+        "emotion_intensity": 5,
+        "emotional_themes": [],
+        "mood_summary": "",
+        "suggested_actions": []
+    }
+
+def test_index_search():
+    """Search through the per-month index matches the old full scan semantics"""
+    print("Testing indexed search...")
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = JournalManager(os.path.join(tmp, "journals"))
+        manager.create_entry("happy day", _analysis("happy"), date=datetime(2024, 1, 30), tags=["work"])
+        manager.create_entry("sad day", _analysis("sad"), date=datetime(2024, 2, 2), tags=["home"])
+        manager.create_entry("happy again", _analysis("Happy"), date=datetime(2024, 2, 5))
+
+        entries = manager.search_entries(datetime(2024, 1, 1), datetime(2024, 2, 28))
+        assert [e["date"] for e in entries] == ["2024-01-30", "2024-02-02", "2024-02-05"]
+
+        entries = manager.search_entries(datetime(2024, 1, 1), datetime(2024, 2, 28), emotion="happy")
+        assert [e["date"] for e in entries] == ["2024-01-30", "2024-02-05"]
+
+        entries = manager.search_entries(datetime(2024, 1, 1), datetime(2024, 2, 28), tags=["home", "x"])
+        assert [e["date"] for e in entries] == ["2024-02-02"]
+
+        # A start time after midnight excludes that day's entry
+        entries = manager.search_entries(datetime(2024, 1, 30, 12), datetime(2024, 2, 2, 8))
+        assert [e["date"] for e in entries] == ["2024-02-02"]
+        print("✅ Indexed search works")
+
+        # The pruned scan without the index returns the same results
+        scanner = JournalManager(os.path.join(tmp, "journals"), use_index=False)
+        entries = scanner.search_entries(datetime(2024, 2, 1), datetime(2024, 2, 28), emotion="happy")
+        assert [e["date"] for e in entries] == ["2024-02-05"]
+        print("✅ Month-pruned scan works")
+
+        # Deleting the shards forces a rebuild from the entry files
+        for month in ("2024-01", "2024-02"):
+            os.remove(os.path.join(tmp, "journals", month, "_index.json"))
+        fresh = JournalManager(os.path.join(tmp, "journals"))
+        assert [e["date"] for e in fresh.get_all_entries()] == ["2024-01-30", "2024-02-02", "2024-02-05"]
+        assert fresh.rebuild_index() == 3
+        print("✅ Index rebuilds from entry files")
+
+        # Day files written behind the index's back (a crash before the shard
+        # update, a restore) are picked up by the manager that cached the shard
+        assert fresh.search_entries(datetime(2024, 2, 1), datetime(2024, 2, 28), tags=["home"])
+        month_dir = os.path.join(tmp, "journals", "2024-02")
+        with open(os.path.join(month_dir, "2024-02-02.json")) as f:
+            restored = json.load(f)
+        restored["date"] = "2024-02-09"
+        restored["content"]["tags"] = ["restored"]
+        with open(os.path.join(month_dir, "2024-02-09.json"), "w") as f:
+            json.dump(restored, f)
+        entries = fresh.search_entries(datetime(2024, 2, 1), datetime(2024, 2, 28), tags=["restored"])
+        assert [e["date"] for e in entries] == ["2024-02-09"]
+        print("✅ Stale index shards are rebuilt")
+
+def test_tag_filters():
+    """Tag AND/OR filters, emotion filters and facet counts agree across backends"""
+    print("Testing tag filters and facets...")
+    with tempfile.TemporaryDirectory() as tmp:
+        managers = (JournalManager(os.path.join(tmp, "json")),
+                    JournalManager(os.path.join(tmp, "scan"), use_index=False),
+                    create_journal_manager(os.path.join(tmp, "sqlite"), backend="sqlite"))
+        for manager in managers:
+            manager.create_entry("a", _analysis("Happy"), date=datetime(2024, 4, 1), tags=["work", "gym"])
+            manager.create_entry("b", _analysis("sad"), date=datetime(2024, 4, 2), tags=["work"])
+            manager.create_entry("c", _analysis("happy"), date=datetime(2024, 5, 3), tags=["gym", "family"])
+
+            start, end = datetime(2024, 4, 1), datetime(2024, 5, 31)
+            dates = lambda entries: [e["date"] for e in entries]
+            assert dates(manager.search_entries(start, end, tags=["work", "gym"])) == ["2024-04-01", "2024-04-02", "2024-05-03"]
+            assert dates(manager.search_entries(start, end, tags=["work", "gym"], tag_mode="all")) == ["2024-04-01"]
+            assert dates(manager.search_entries(start, end, tags=["gym"], emotion="HAPPY")) == ["2024-04-01", "2024-05-03"]
+            assert manager.count_entries(start, end, tags=["family", "work"], tag_mode="all") == 0
+
+            facets = manager.get_facet_counts()
+            assert facets == {"tags": {"work": 2, "gym": 2, "family": 1}, "emotions": {"happy": 2, "sad": 1}}
+            assert manager.get_facet_counts(start_date=datetime(2024, 4, 2))["tags"] == {"work": 1, "gym": 1, "family": 1}
+            assert manager.get_facet_counts(tags=["gym"])["emotions"] == {"happy": 2}
+        print("✅ Tag filters and facets work")
+
+def test_rollups():
+    """Monthly rollups follow writes and agree with the SQLite aggregates"""
+    print("Testing rollups...")
+    with tempfile.TemporaryDirectory() as tmp:
+        for manager in (JournalManager(os.path.join(tmp, "json")),
+                        create_journal_manager(os.path.join(tmp, "sqlite"), backend="sqlite")):
+            happy = dict(_analysis("happy"), emotion_intensity=8, emotional_themes=["family", "rest"])
+            manager.create_entry("one two three", happy, date=datetime(2024, 6, 28),
+                                 tasks=[{"task": "a", "status": "done"}, {"task": "b", "status": "pending"}],
+                                 goals=[{"goal": "g", "progress": 100}])
+            manager.create_entry("four five", dict(_analysis("sad"), emotion_intensity=4, emotional_themes=["work"]),
+                                 date=datetime(2024, 7, 2))
+            manager.create_entry("six", dict(happy, emotional_themes=["family"]), date=datetime(2024, 7, 20))
+            # Rewriting a day replaces its contribution
+            manager.update_entry(datetime(2024, 7, 20), text="six seven")
+
+            stats = manager.get_stats()
+            assert stats["entries"] == 3
+            assert stats["emotions"] == {"happy": 2, "sad": 1}
+            assert stats["primary_emotion"] == "happy"
+            assert stats["average_intensity"] == round(20 / 3, 2)
+            assert stats["themes"] == {"family": 2, "rest": 1, "work": 1}
+            assert stats["word_count"] == 3 + 2 + 2
+            assert stats["tasks"] == {"total": 2, "done": 1}
+            assert stats["goals"] == {"total": 1, "done": 1}
+
+            week = manager.get_stats(datetime(2024, 6, 27), datetime(2024, 7, 3))
+            assert week["entries"] == 2 and week["emotions"] == {"happy": 1, "sad": 1}
+            monthly = manager.get_monthly_stats(datetime(2024, 1, 1), datetime(2024, 12, 31))
+            assert list(monthly) == ["2024-06", "2024-07"]
+            assert monthly["2024-07"]["entries"] == 2
+
+            # The weekly summary counts emotions the same way from entries and from rollups
+            manager.create_entry("seven", _analysis("Sad"), date=datetime(2024, 7, 3))
+            entries = manager.search_entries(datetime(2024, 6, 27), datetime(2024, 7, 3))
+            week = manager.get_stats(datetime(2024, 6, 27), datetime(2024, 7, 3))
+            analyzer = SimplifiedAnalyzer()
+            from_entries = analyzer.create_weekly_summary(entries)
+            from_stats = analyzer.create_weekly_summary(entries, week)
+            assert from_entries["summary"] == from_stats["summary"]
+            assert from_entries["emotion_trend"] == from_stats["emotion_trend"] == "sad"
+
+        # Day files written behind the rollup's back (a crash before the rollup
+        # update, a restore) are counted by the manager that cached the month
+        manager = JournalManager(os.path.join(tmp, "json"))
+        assert manager.get_stats(datetime(2024, 7, 1), datetime(2024, 7, 31))["entries"] == 3
+        month_dir = os.path.join(manager.journal_dir, "2024-07")
+        with open(os.path.join(month_dir, "2024-07-02.json")) as f:
+            restored = json.load(f)
+        restored["date"] = "2024-07-09"
+        with open(os.path.join(month_dir, "2024-07-09.json"), "w") as f:
+            json.dump(restored, f)
+        assert manager.get_stats(datetime(2024, 7, 1), datetime(2024, 7, 31))["emotions"] == {"happy": 1, "sad": 3}
+        assert manager.get_monthly_stats()["2024-07"]["entries"] == 4
+        print("✅ Rollups work")
+
+def test_entry_cache():
+    """Repeated reads are served from the cache and external edits are seen"""
+    print("Testing entry cache...")
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = JournalManager(os.path.join(tmp, "journals"))
+        day = datetime(2024, 5, 6)
+        manager.create_entry("cached", _analysis("calm"), date=day)
+
+        before = manager.cache_stats()
+        first = manager.get_entry(day)
+        first["content"]["text"] = "mutated by caller"
+        second = manager.get_entry(day)
+        after = manager.cache_stats()
+        assert second["content"]["text"] == "cached"
+        assert after["hits"] - before["hits"] == 2
+
+        # Rewrite the file behind the manager's back with a different size
+        path = manager._get_journal_path(day)
+        with open(path, 'r', encoding='utf-8') as f:
+            raw = json.load(f)
+        raw["content"]["text"] = "edited elsewhere"
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(raw, f)
+        assert manager.get_entry(day)["content"]["text"] == "edited elsewhere"
+        print("✅ Entry cache works")
+
+def test_chat_log():
+    """Chat messages are appended to a log, merged on read and compacted"""
+    print("Testing chat log...")
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = JournalManager(os.path.join(tmp, "journals"))
+        day = datetime(2024, 6, 1)
+        manager.create_entry("", _analysis("neutral"), date=day, chat_history=[{"user": "a", "assistant": "b"}])
+        entry_size = os.path.getsize(manager._get_journal_path(day))
+
+        for i in range(3):
+            manager.append_chat_message({"user": f"q{i}", "assistant": f"r{i}"}, date=day)
+        assert os.path.getsize(manager._get_journal_path(day)) == entry_size
+        chat = manager.get_entry(day)["content"]["chat_history"]
+        assert [m["user"] for m in chat] == ["a", "q0", "q1", "q2"]
+
+        assert manager.compact_chat_log(day)
+        assert not os.path.exists(manager._get_chat_log_path(day))
+        chat = manager.get_entry(day)["content"]["chat_history"]
+        assert [m["user"] for m in chat] == ["a", "q0", "q1", "q2"]
+        print("✅ Chat log works")
+
+def test_iter_entries():
+    """iter_entries streams entries in date order and projects fields"""
+    print("Testing iter_entries...")
+    with tempfile.TemporaryDirectory() as tmp:
+        for manager in (JournalManager(os.path.join(tmp, "json")),
+                        create_journal_manager(os.path.join(tmp, "sqlite"), backend="sqlite")):
+            for day, emotion in ((3, "happy"), (1, "sad"), (2, "happy")):
+                manager.create_entry(f"day {day}", _analysis(emotion), date=datetime(2024, 8, day),
+                                     chat_history=[{"user": "hi", "assistant": "hello"}])
+
+            light = list(manager.iter_entries(fields=["date", "emotion_analysis.primary_emotion"]))
+            assert [e["date"] for e in light] == ["2024-08-01", "2024-08-02", "2024-08-03"]
+            assert light[0] == {"date": "2024-08-01", "emotion_analysis": {"primary_emotion": "sad"}}
+
+            texts = list(manager.iter_entries(start_date=datetime(2024, 8, 2), emotion="happy",
+                                              fields=["date", "content.text"]))
+            assert texts == [{"date": "2024-08-02", "content": {"text": "day 2"}},
+                             {"date": "2024-08-03", "content": {"text": "day 3"}}]
+
+            full = next(manager.iter_entries(end_date=datetime(2024, 8, 1)))
+            assert full["content"]["chat_history"] == [{"user": "hi", "assistant": "hello"}]
+        print("✅ iter_entries works")
+
+def test_list_entries():
+    """list_entries pages through entries with date cursors"""
+    print("Testing list_entries...")
+    with tempfile.TemporaryDirectory() as tmp:
+        for manager in (JournalManager(os.path.join(tmp, "json")),
+                        create_journal_manager(os.path.join(tmp, "sqlite"), backend="sqlite")):
+            # Entries span a month boundary
+            days = [datetime(2024, 9, 28) + timedelta(days=i) for i in range(7)]
+            for i, day in enumerate(days):
+                manager.create_entry(f"day {i}", _analysis("calm"), date=day, tags=["even" if i % 2 == 0 else "odd"])
+            dates = [day.strftime("%Y-%m-%d") for day in days]
+
+            seen, cursor = [], None
+            while True:
+                page = manager.list_entries(limit=3, cursor=cursor, fields=["date", "content.text"])
+                seen.extend(entry["date"] for entry in page["entries"])
+                cursor = page["next_cursor"]
+                if cursor is None:
+                    break
+            assert seen == dates[::-1]
+
+            page = manager.list_entries(limit=2, descending=False, tags=["even"])
+            assert [entry["date"] for entry in page["entries"]] == [dates[0], dates[2]]
+            page = manager.list_entries(limit=2, cursor=page["next_cursor"], descending=False, tags=["even"])
+            assert [entry["date"] for entry in page["entries"]] == [dates[4], dates[6]]
+            assert page["next_cursor"] is None
+
+            assert manager.list_entries(limit=7)["next_cursor"] is None
+            page = manager.list_entries(limit=1, fields=["content.text"])
+            assert page == {"entries": [{"content": {"text": "day 6"}}], "next_cursor": dates[6]}
+            try:
+                manager.list_entries(cursor="not-a-date")
+                assert False, "invalid cursor accepted"
+            except ValueError:
+                pass
+        print("✅ list_entries works")
+
+def test_storage_formats():
+    """Entries written in any format are read back and can be migrated"""
+    print("Testing storage formats...")
+    with tempfile.TemporaryDirectory() as tmp:
+        journal_dir = os.path.join(tmp, "journals")
+        day = datetime(2024, 9, 1)
+        pretty = JournalManager(journal_dir, storage_format="json-pretty")
+        pretty.create_entry("Café ☕", _analysis("calm"), date=day, tags=["coffee"])
+        path = pretty._get_journal_path(day)
+        pretty_size = os.path.getsize(path)
+
+        compact = JournalManager(journal_dir, storage_format="json")
+        assert compact.get_entry(day)["content"]["text"] == "Café ☕"
+        assert compact.migrate_format() == 1
+        assert compact.migrate_format() == 0
+        assert os.path.getsize(path) < pretty_size
+        assert compact.get_entry(day)["content"]["tags"] == ["coffee"]
+
+        if "msgpack" in available_formats():
+            assert compact.migrate_format("msgpack") == 1
+            with open(path, 'rb') as f:
+                assert detect_format(f.read()) == "msgpack"
+            assert JournalManager(journal_dir).get_entry(day)["content"]["text"] == "Café ☕"
+            assert compact.rebuild_index() == 1
+        print("✅ Storage formats work")
+
+def test_search_text():
+    """Full-text search ranks entries, matches phrases and chat, and honours dates"""
+    print("Testing full-text search...")
+    with tempfile.TemporaryDirectory() as tmp:
+        for manager in (JournalManager(os.path.join(tmp, "json")),
+                        create_journal_manager(os.path.join(tmp, "sqlite"), backend="sqlite")):
+            manager.create_entry("Morning run by the river, then coffee.", _analysis("happy"), date=datetime(2024, 1, 5))
+            manager.create_entry("A run of bad luck. Morning meetings all day.", _analysis("sad"), date=datetime(2024, 2, 5))
+            manager.create_entry("Run, run, run! Training for the race.", _analysis("excited"),
+                                 date=datetime(2024, 3, 5), tags=["training"])
+            manager.append_chat_message({"user": "How do I stay calm?", "assistant": "Try breathing exercises."},
+                                        date=datetime(2024, 3, 5))
+
+            assert [r["date"] for r in manager.search_text("run")][0] == "2024-03-05"
+            assert [r["date"] for r in manager.search_text('"morning run"')] == ["2024-01-05"]
+            assert [r["date"] for r in manager.search_text("breathing")] == ["2024-03-05"]
+            assert [r["date"] for r in manager.search_text("training")] == ["2024-03-05"]
+            assert [r["date"] for r in manager.search_text("morning", start_date=datetime(2024, 2, 1))] == ["2024-02-05"]
+            assert "river" in manager.search_text("river")[0]["snippet"]
+            assert manager.search_text("nothing-like-this") == []
+
+        # Shards are rebuilt when missing
+        manager = JournalManager(os.path.join(tmp, "json"))
+        os.remove(os.path.join(manager.journal_dir, "2024-01", "_text.json"))
+        assert [r["date"] for r in JournalManager(manager.journal_dir).search_text("river")] == ["2024-01-05"]
+
+        # Chat messages are appended to the month's delta instead of rewriting its shard
+        month_dir = os.path.join(manager.journal_dir, "2024-03")
+        shard_mtime = os.stat(os.path.join(month_dir, "_text.json")).st_mtime_ns
+        reader = JournalManager(manager.journal_dir)
+        assert reader.search_text("kayak") == []
+        for i in range(3):
+            manager.append_chat_message({"user": f"kayak trip {i}", "assistant": "paddle on"}, date=datetime(2024, 3, 5))
+        assert os.stat(os.path.join(month_dir, "_text.json")).st_mtime_ns == shard_mtime
+        assert [r["date"] for r in manager.search_text('"kayak trip"')] == ["2024-03-05"]
+        assert [r["date"] for r in reader.search_text("paddle")] == ["2024-03-05"]
+        manager.text_index.fold_month("2024-03")
+        assert not os.path.exists(os.path.join(month_dir, "_text.delta.jsonl"))
+        assert [r["date"] for r in reader.search_text('"kayak trip"')] == ["2024-03-05"]
+
+        # Entries written behind the index's back (a crash before indexing, a restore) are found
+        with open(os.path.join(manager.journal_dir, "2024-01", "2024-01-05.json")) as f:
+            restored = json.load(f)
+        restored["date"] = "2024-01-20"
+        restored["content"]["text"] = "Sailing lessons at the lake."
+        with open(os.path.join(manager.journal_dir, "2024-01", "2024-01-20.json"), "w") as f:
+            json.dump(restored, f)
+        assert [r["date"] for r in reader.search_text("sailing")] == ["2024-01-20"]
+        print("✅ Full-text search works")
+
+def test_segments():
+    """Later saves of a day are appended as segments and merged on read"""
+    print("Testing entry segments...")
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = JournalManager(os.path.join(tmp, "journals"))
+        day = datetime(2024, 10, 1)
+        task = {"task": "call mom", "status": "pending"}
+        manager.record_entry("first", _analysis("calm"), date=day, tags=["home"], tasks=[task])
+        entry_size = os.path.getsize(manager._get_journal_path(day))
+        month_dir = os.path.join(manager.journal_dir, "2024-10")
+        shards = ("_index.json", "_rollup.json", "_text.json")
+        shard_mtimes = [os.stat(os.path.join(month_dir, name)).st_mtime_ns for name in shards]
+
+        manager.record_entry("second", {"primary_emotion": "happy"}, date=day, tags=["home", "work"], tasks=[task])
+        merged = manager.record_entry("third", {}, date=day, tags=["work"])
+        assert os.path.getsize(manager._get_journal_path(day)) == entry_size
+        # Saves go to the month deltas instead of rewriting the shards
+        assert [os.stat(os.path.join(month_dir, name)).st_mtime_ns for name in shards] == shard_mtimes
+        fresh = JournalManager(os.path.join(tmp, "journals"))
+        assert [e["date"] for e in fresh.search_entries(day, day, tags=["work"], emotion="happy")] == ["2024-10-01"]
+        assert fresh.get_stats()["emotions"] == {"happy": 1}
+        assert [r["date"] for r in fresh.search_text("third")] == ["2024-10-01"]
+
+        assert merged["content"]["text"] == "third \n second \n first"
+        assert merged["content"]["tags"] == ["work", "home"]
+        assert merged["content"]["tasks"] == [task]
+        assert merged["emotion_analysis"]["primary_emotion"] == "happy"
+        assert [info["emotion_analysis"].get("primary_emotion") for info in merged["metadata"]["segments"]] == \
+            ["calm", "happy", None]
+        assert manager.get_entry(day) == merged
+        assert manager.search_entries(day, day, tags=["work"], emotion="happy")[0]["date"] == "2024-10-01"
+        assert [r["date"] for r in manager.search_text("second")] == ["2024-10-01"]
+
+        # Rebuilding a lost index shard keeps the tags and emotion of the segments
+        os.remove(os.path.join(manager.journal_dir, "2024-10", "_index.json"))
+        rebuilt = JournalManager(os.path.join(tmp, "journals"))
+        assert [e["date"] for e in rebuilt.search_entries(day, day, tags=["work"], emotion="happy")] == ["2024-10-01"]
+        assert rebuilt.get_facet_counts(day, day)["tags"].get("work") == 1
+
+        # A log left behind by a crash during compaction is not applied twice
+        log_path = manager._get_segment_log_path(day)
+        with open(log_path, 'rb') as f:
+            log = f.read()
+        assert manager.compact_chat_log(day)
+        assert not os.path.exists(log_path)
+        assert not [name for name in os.listdir(month_dir) if name.endswith(".delta.jsonl")]
+        compacted = manager.get_entry(day)
+        assert compacted["content"] == merged["content"]
+        with open(log_path, 'wb') as f:
+            f.write(log)
+        assert manager.get_entry(day) == compacted
+        print("✅ Entry segments work")
+
+def test_export_import():
+    """Journals round-trip through (compressed) NDJSON streams"""
+    print("Testing export and import...")
+    with tempfile.TemporaryDirectory() as tmp:
+        source = JournalManager(os.path.join(tmp, "source"))
+        for day in range(1, 8):
+            source.create_entry(f"day {day}", _analysis("calm"), date=datetime(2024, 11, day), tags=[f"t{day % 2}"])
+        source.record_entry("more", {}, date=datetime(2024, 11, 3))
+        source.append_chat_message({"user": "hi", "assistant": "hello"}, date=datetime(2024, 11, 3))
+        expected = source.get_all_entries()
+
+        for name in ("journal.ndjson", "journal.ndjson.gz"):
+            path = os.path.join(tmp, name)
+            assert source.export_stream(path) == 7
+            for target in (JournalManager(os.path.join(tmp, "json-" + name)),
+                           create_journal_manager(os.path.join(tmp, "sqlite-" + name), backend="sqlite")):
+                assert target.import_stream(path, batch_size=3) == 7
+                assert target.get_all_entries() == expected
+                assert target.count_entries(datetime(2024, 11, 1), datetime(2024, 11, 30), tags=["t1"]) == 4
+                assert [r["date"] for r in target.search_text("hello")] == ["2024-11-03"]
+                assert target.get_stats()["entries"] == 7
+        print("✅ Export and import work")
+
+def test_packed_months():
+    """Cold months are packed and read back; later saves overlay the pack"""
+    print("Testing packed months...")
+    with tempfile.TemporaryDirectory() as tmp:
+        journal_dir = os.path.join(tmp, "journals")
+        manager = JournalManager(journal_dir)
+        for day in range(1, 6):
+            manager.create_entry(f"old day {day}", _analysis("calm"), date=datetime(2023, 1, day), tags=[f"t{day % 2}"])
+        manager.append_chat_message({"user": "hi", "assistant": "packed hello"}, date=datetime(2023, 1, 2))
+        manager.create_entry("recent", _analysis("happy"), date=datetime.now())
+        expected = manager.get_all_entries()
+
+        assert manager.pack_cold_months() == 5
+        assert manager.pack_cold_months() == 0
+        month_dir = os.path.join(journal_dir, "2023-01")
+        assert sorted(os.listdir(month_dir)) == ["_entries.pack", "_index.json", "_rollup.json", "_text.json"]
+
+        # A fresh manager (cold cache) reads single entries from the pack, without rebuilding the shards
+        shard_mtimes = [os.stat(os.path.join(month_dir, name)).st_mtime_ns
+                        for name in ("_index.json", "_rollup.json", "_text.json")]
+        reader = JournalManager(journal_dir)
+        assert reader.get_all_entries() == expected
+        assert reader.count_entries(datetime(2023, 1, 1), datetime(2023, 1, 31)) == 5
+        assert reader.get_stats(datetime(2023, 1, 1), datetime(2023, 1, 31))["entries"] == 5
+        assert len(reader.search_text("old day")) == 5
+        assert [os.stat(os.path.join(month_dir, name)).st_mtime_ns
+                for name in ("_index.json", "_rollup.json", "_text.json")] == shard_mtimes
+        assert reader.has_entry(datetime(2023, 1, 3)) and not reader.has_entry(datetime(2023, 1, 9))
+        assert [r["date"] for r in reader.search_text("packed hello")] == ["2023-01-02"]
+        assert reader.count_entries(datetime(2023, 1, 1), datetime(2023, 1, 31), tags=["t1"]) == 3
+        assert reader.rebuild_index() == 6
+        assert reader.get_stats(datetime(2023, 1, 1), datetime(2023, 1, 31))["entries"] == 5
+
+        # Saving to a packed month writes a day file that takes precedence, until the month is repacked
+        reader.update_entry(datetime(2023, 1, 3), text="rewritten")
+        assert os.path.exists(os.path.join(month_dir, "2023-01-03.json"))
+        assert reader.get_entry(datetime(2023, 1, 3))["content"]["text"] == "rewritten"
+        assert reader.pack_cold_months() == 5
+        assert not os.path.exists(os.path.join(month_dir, "2023-01-03.json"))
+        assert JournalManager(journal_dir).get_entry(datetime(2023, 1, 3))["content"]["text"] == "rewritten"
+        print("✅ Packed months work")
+
+def test_user_layout():
+    """User directories are hashed, legacy ones are found and migrated"""
+    print("Testing user directory layout...")
+    with tempfile.TemporaryDirectory() as tmp:
+        users_dir = os.path.join(tmp, "users")
+        os.makedirs(os.path.join(users_dir, "old_user", "journals"))
+        new_dir = user_paths.user_dir("new_user", users_dir)
+        assert new_dir == os.path.join(users_dir, *user_paths.shard_prefix("new_user"), "new_user")
+        assert user_paths.user_dir("old_user", users_dir) == os.path.join(users_dir, "old_user")
+        user_paths.ensure_dir(os.path.join(new_dir, "journals"))
+
+        # Known directories are not created again
+        calls = []
+        makedirs = user_paths.os.makedirs
+        user_paths.os.makedirs = lambda *args, **kwargs: calls.append(args)
+        try:
+            user_paths.ensure_dir(os.path.join(new_dir, "journals"))
+        finally:
+            user_paths.os.makedirs = makedirs
+        assert calls == []
+
+        assert sorted(uid for uid, _ in user_paths.iter_user_dirs(users_dir)) == ["new_user", "old_user"]
+        assert user_paths.migrate_user_dirs(users_dir) == 1
+        assert user_paths.migrate_user_dirs(users_dir) == 0
+        old_dir = user_paths.user_dir("old_user", users_dir)
+        assert old_dir == user_paths.hashed_user_dir("old_user", users_dir)
+        assert os.path.isdir(os.path.join(old_dir, "journals"))
+
+        for bad_id in ("", "..", "a/b"):
+            try:
+                user_paths.user_dir(bad_id, users_dir)
+                assert False, f"accepted user ID {bad_id!r}"
+            except ValueError:
+                pass
+        print("✅ User directory layout works")
+
+def test_user_sessions():
+    """Sessions keep each user's data under the pool's users directory and are evicted LRU"""
+    print("Testing user sessions...")
+    with tempfile.TemporaryDirectory() as tmp:
+        users_dir = os.path.join(tmp, "users")
+        pool = UserSessionPool(max_size=2, users_dir=users_dir)
+        alice = pool.get("alice")
+        assert pool.get("alice") is alice
+        base_dir = user_paths.user_dir("alice", users_dir)
+        assert alice.journal_manager.journal_dir == os.path.join(base_dir, "journals")
+        assert alice.uploads_dir == os.path.join(base_dir, "uploads")
+
+        # Users never see each other's entries
+        day = datetime(2024, 5, 1)
+        alice.journal_manager.create_entry("alice's day", _analysis("calm"), date=day)
+        bob = pool.get("bob")
+        assert bob.journal_manager.get_entry(day) is None
+        assert pool.get("alice").journal_manager.get_entry(day)["content"]["text"] == "alice's day"
+
+        # alice was used last, so bob is evicted first
+        pool.get("carol")
+        assert len(pool) == 2 and "alice" in pool and "bob" not in pool
+        assert pool.get("bob") is not bob
+        assert pool.evict("carol") is not None and "carol" not in pool
+
+        # Idle journal locks keep no file open, and are dropped with their last manager
+        assert alice.journal_manager.lock._fd is None
+        scratch = JournalManager(os.path.join(tmp, "scratch"))
+        scratch.create_entry("scratch", _analysis("calm"), date=day)
+        lock_path = scratch.lock.path
+        assert lock_path in file_io._locks
+        del scratch
+        gc.collect()
+        assert lock_path not in file_io._locks
+        try:
+            pool.get("")
+            assert False, "a session without a user ID must be rejected"
+        except ValueError:
+            pass
+
+        try:
+            from src.app_manager import AppManager, SharedComponents
+        except ImportError as e:
+            print(f"Skipping AppManager.for_user check ({e})")
+        else:
+            components = SharedComponents()
+            manager = AppManager(initialize_dirs=False, components=components,
+                                 session=pool.get("alice"), sessions=pool)
+            scoped = manager.for_user("dave")
+            assert scoped is not manager and scoped.components is components
+            assert scoped.current_user_id == "dave"
+            assert scoped.journal_manager is pool.get("dave").journal_manager
+            assert manager.current_user_id == "alice"
+            assert manager.for_user(None) is manager
+        print("✅ User sessions work")
+
+def test_change_feed():
+    """Writes are recorded in the change log and consumers resume from checkpoints"""
+    print("Testing change feed...")
+    with tempfile.TemporaryDirectory() as tmp:
+        for manager in (JournalManager(os.path.join(tmp, "json")),
+                        create_journal_manager(os.path.join(tmp, "sqlite"), backend="sqlite")):
+            day = datetime(2024, 12, 1)
+            manager.record_entry("first", _analysis("calm"), date=day)
+            manager.record_entry("second", {}, date=day, tags=["walk"])
+            manager.update_entry(day, tasks=[{"task": "call", "status": "pending"}])
+            manager.append_chat_message({"user": "hi", "assistant": "hello"}, date=day)
+
+            changes = manager.get_changes()
+            assert [(c["seq"], c["op"]) for c in changes] == [(1, "create"), (2, "record"), (3, "update"), (4, "chat")]
+            assert changes[1]["fields"] == ["content.text", "content.tags"]
+            assert changes[2]["fields"] == ["content.tasks"] and changes[2]["date"] == "2024-12-01"
+
+            seen = []
+            assert manager.consume_changes("backup", lambda batch: seen.extend(c["seq"] for c in batch), batch_size=3) == 4
+            manager.create_entry("later", _analysis("happy"), date=datetime(2024, 12, 2))
+            assert manager.consume_changes("backup", lambda batch: seen.extend(c["seq"] for c in batch)) == 1
+            assert seen == [1, 2, 3, 4, 5]
+
+            # A failing handler leaves the checkpoint where it was
+            def failing(batch):
+                raise RuntimeError("offline")
+            try:
+                manager.consume_changes("replica", failing)
+            except RuntimeError:
+                pass
+            assert manager.changes.get_checkpoint("replica") == 0
+
+        # The start of a range is found by binary search in long logs
+        log = JournalManager(os.path.join(tmp, "long")).changes
+        log.append_many([(f"2024-01-{i % 28 + 1:02d}", "update", ["content.text"]) for i in range(5000)], fsync=False)
+        assert [c["seq"] for c in log.read(4321, limit=3)] == [4322, 4323, 4324]
+        assert log.read(5000) == [] and log.last_seq() == 5000
+
+        # Readers skip a record still being appended; the next locked append repairs a torn one
+        with open(log.path, 'ab') as f:
+            f.write(b'{"seq": 5001, "da')
+        size = os.path.getsize(log.path)
+        assert log.last_seq() == 5000 and log.read(4999) and os.path.getsize(log.path) == size
+        assert log.append("2024-02-01", "update", ["content.text"], fsync=False) == 5001
+        assert [c["seq"] for c in log.read(4999)] == [5000, 5001]
+        print("✅ Change feed works")
+
+def test_async_journal_manager():
+    """AsyncJournalManager returns what the blocking calls return"""
+    print("Testing AsyncJournalManager...")
+    with tempfile.TemporaryDirectory() as tmp:
+        for manager in (JournalManager(os.path.join(tmp, "json")),
+                        create_journal_manager(os.path.join(tmp, "sqlite"), backend="sqlite")):
+            journal = AsyncJournalManager(manager, read_concurrency=3)
+
+            async def scenario():
+                await asyncio.gather(*(journal.record_entry(f"day {day}", _analysis("calm" if day % 2 else "sad"),
+                                                            date=datetime(2025, 1, day), tags=["walk"])
+                                       for day in range(1, 11)))
+                await journal.record_entry("more", {}, date=datetime(2025, 1, 4))
+                entry = await journal.get_entry(datetime(2025, 1, 4))
+                found = await journal.search_entries(datetime(2025, 1, 1), datetime(2025, 1, 31), emotion="sad")
+                page = await journal.list_entries(limit=4, fields=["date", "content.text"])
+                facets = await journal.get_facet_counts(datetime(2025, 1, 1), datetime(2025, 1, 31))
+                return entry, found, page, facets
+
+            entry, found, page, facets = asyncio.run(scenario())
+            assert entry == manager.get_entry(datetime(2025, 1, 4))
+            assert found == manager.search_entries(datetime(2025, 1, 1), datetime(2025, 1, 31), emotion="sad")
+            assert [e["date"] for e in found] == [f"2025-01-{day:02d}" for day in (2, 4, 6, 8, 10)]
+            assert page == manager.list_entries(limit=4, fields=["date", "content.text"])
+            assert facets["tags"] == {"walk": 10}
+        print("✅ AsyncJournalManager works")
+
+def test_concurrent_writes():
+    """Concurrent record_entry calls don't lose text and stale updates are rejected"""
+    print("Testing concurrent writes...")
+    with tempfile.TemporaryDirectory() as tmp:
+        journal_dir = os.path.join(tmp, "journals")
+        day = datetime(2024, 7, 1)
+        JournalManager(journal_dir).create_entry("start", _analysis("calm"), date=day)
+
+        def writer(i):
+            # Separate managers for the same user behave like separate tabs
+            JournalManager(journal_dir).record_entry(f"note{i}", {}, date=day, tasks=[], goals=[], tags=[])
+
+        threads = [threading.Thread(target=writer, args=(i,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        manager = JournalManager(journal_dir)
+        text = manager.get_entry(day)["content"]["text"]
+        assert all(f"note{i}" in text for i in range(8)) and "start" in text
+
+        stale = manager.get_entry(day)["metadata"]["last_modified"]
+        manager.update_entry(day, text="fresh")
+        try:
+            manager.update_entry(day, text="stale edit", expected_last_modified=stale)
+            assert False, "Stale update should have been rejected"
+        except ConcurrentModificationError:
+            pass
+        assert manager.get_entry(day)["content"]["text"] == "fresh"
+        assert not [n for n in os.listdir(os.path.join(journal_dir, "2024-07")) if n.startswith(".tmp-")]
+        print("✅ Concurrent writes are serialized")
+
+def test_sqlite_backend():
+    """The SQLite backend keeps the JournalManager API and entry shape"""
+    print("Testing SQLite backend...")
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = create_journal_manager(os.path.join(tmp, "journals"), backend="sqlite")
+        day = datetime(2024, 3, 4)
+        created = manager.create_entry("first", _analysis("calm"), date=day, tags=["a"],
+                                       tasks=[{"task": "t1", "status": "pending"}])
+        assert manager.get_entry(day) == created
+
+        merged = manager.record_entry("second", {"primary_emotion": "Happy"}, date=day, tags=["b"])
+        assert merged["content"]["tags"] == ["b", "a"]
+        assert manager.get_entry(day)["content"]["text"].startswith("second")
+
+        assert manager.count_entries(datetime(2024, 3, 1), datetime(2024, 3, 31), tags=["b"]) == 1
+        assert manager.get_emotion_counts(datetime(2024, 3, 1), datetime(2024, 3, 31)) == {"happy": 1}
+        assert [e["date"] for e in manager.search_entries(datetime(2024, 3, 1), datetime(2024, 3, 31), emotion="HAPPY")] == ["2024-03-04"]
+
+        manager.append_chat_message({"user": "hi", "assistant": "hello"}, date=day)
+        assert manager.get_entry(day)["content"]["chat_history"][-1]["user"] == "hi"
+        manager.close()
+        print("✅ SQLite backend works")
+
+if __name__ == "__main__":
+    test_index_search()
+    test_tag_filters()
+    test_rollups()
+    test_entry_cache()
+    test_chat_log()
+    test_iter_entries()
+    test_list_entries()
+    test_storage_formats()
+    test_search_text()
+    test_segments()
+    test_export_import()
+    test_packed_months()
+    test_user_layout()
+    test_user_sessions()
+    test_change_feed()
+    test_async_journal_manager()
+    test_concurrent_writes()
+    test_sqlite_backend()
+    print("✅ All JournalManager tests passed!")
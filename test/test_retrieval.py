@@ -0,0 +1,316 @@
+"""
+Retrieval Tests
+
+Checks the analyzer's RAG retrieval pieces (embedding cache, knowledge base
+and vector search) against temporary directories, with the embedding API
+replaced by local functions. Run directly with `python test/test_retrieval.py`
+or via pytest. Tests needing numpy or scikit-learn are skipped without them.
+"""
+
+import os
+import sys
+import tempfile
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+
+# Add the project root to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+import src.analyzer as analyzer_module
+from src.analyzer import EmbeddingClient
+from src.embedding_cache import EmbeddingCache, content_hash
+from src.knowledge_base import KnowledgeBase, load_documents
+
+def _fake_embed(calls: list):
+    """Embedding function returning a vector derived from each text, recording its calls"""
+    def embed(texts):
+        calls.append(list(texts))
+        return [[float(len(text)), float(sum(map(ord, text)) % 7), 1.0] for text in texts]
+    return embed
+
+def _normalized(vector) -> "np.ndarray":
+    vector = np.asarray(vector, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+def test_embedding_cache():
+    """Embeddings are cached by model and content, and only changed texts are embedded again"""
+    print("Testing embedding cache...")
+    if np is None:
+        print("Skipping embedding cache test (numpy is not installed)")
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        calls = []
+        embed = _fake_embed(calls)
+        cache = EmbeddingCache("models/test-embedding", tmp)
+        vectors = cache.embed(["alpha", "beta"], embed)
+        assert calls == [["alpha", "beta"]]
+        assert len(vectors) == 2
+        assert os.path.exists(cache.manifest_path)
+        assert len([name for name in os.listdir(tmp) if name.endswith(".npy")]) == 1
+
+        # A hit loads the cached (normalized) rows without embedding anything
+        calls.clear()
+        cached = EmbeddingCache("models/test-embedding", tmp).embed(["alpha", "beta"], embed)
+        assert calls == []
+        for vector, expected in zip(cached, vectors):
+            assert np.allclose(vector, _normalized(expected))
+
+        # Changing one document's text only embeds that document
+        cache.embed(["alpha", "beta, edited"], embed)
+        assert calls == [["beta, edited"]]
+        hashes, matrix = cache.load_matrix()
+        assert hashes == [content_hash("alpha"), content_hash("beta, edited")]
+        assert matrix.shape == (2, 3)
+        assert np.allclose(matrix[1], _normalized(embed(["beta, edited"])[0]))
+        # The matrix of the previous version is removed
+        assert len([name for name in os.listdir(tmp) if name.endswith(".npy")]) == 1
+
+        # Writers wait for the cache lock before replacing the cache and removing old matrices
+        with cache.lock:
+            writer = threading.Thread(target=cache.save, args=([content_hash("delta")], embed(["delta"])))
+            writer.start()
+            writer.join(0.2)
+            assert writer.is_alive() and cache.load_matrix()[0] == [content_hash("alpha"), content_hash("beta, edited")]
+        writer.join()
+        assert cache.load_matrix()[0] == [content_hash("delta")]
+        assert len([name for name in os.listdir(tmp) if name.endswith(".npy")]) == 1
+        cache.embed(["alpha", "beta, edited"], embed)
+
+        # Failed embeddings are not cached, and are retried on the next call
+        calls.clear()
+        result = cache.embed(["alpha", "gamma"], lambda texts: calls.append(list(texts)) or [None] * len(texts))
+        assert result[0] is not None and result[1] is None
+        assert calls == [["gamma"]]
+        assert cache.load_matrix()[0] == [content_hash("alpha")]
+
+        # Each model has its own cache
+        assert EmbeddingCache("models/other-embedding", tmp).load() == {}
+
+        # A manifest that does not match its matrix is ignored
+        with open(cache.manifest_path, 'w') as f:
+            f.write('{"model": "models/test-embedding", "matrix": "missing.npy", "hashes": []}')
+        assert cache.load_matrix() == ([], None)
+        print("✅ Embedding cache works")
+
+def test_embedding_client():
+    """Texts are embedded in batches, and failing batches are retried and split"""
+    print("Testing batched embedding client...")
+    requests = []
+    failures = {"flaky": 1}
+    requests_lock = threading.Lock()
+
+    def embed_content(model, content, task_type):
+        texts = content if isinstance(content, list) else [content]
+        with requests_lock:
+            requests.append(texts)
+            if failures.get("flaky") and any("flaky" in text for text in texts):
+                failures["flaky"] -= 1
+                raise RuntimeError("temporary error")
+        if any("bad" in text for text in texts):
+            raise RuntimeError("invalid text")
+        if any("short" in text for text in texts):
+            # A result missing vectors is treated as a failed request
+            return {"embedding": [[1.0, 0.0]] * (len(texts) - 1)}
+        vectors = [[float(len(text)), 1.0] for text in texts]
+        return {"embedding": vectors if isinstance(content, list) else vectors[0]}
+
+    previous = analyzer_module.__dict__.get("genai")
+    analyzer_module.genai = SimpleNamespace(embed_content=embed_content)
+    try:
+        client = EmbeddingClient(batch_size=4, concurrency=2, max_retries=1, retry_delay=0)
+
+        # Ten texts take three requests
+        texts = [f"text {i}" for i in range(10)]
+        assert client.embed(texts) == [[float(len(text)), 1.0] for text in texts]
+        assert sorted(len(batch) for batch in requests) == [2, 4, 4]
+
+        # A transient failure is retried without splitting the batch
+        requests.clear()
+        assert client.embed(["a", "flaky b", "c"]) == [[1.0, 1.0], [7.0, 1.0], [1.0, 1.0]]
+        assert requests == [["a", "flaky b", "c"], ["a", "flaky b", "c"]]
+
+        # A text that always fails only costs its own embedding
+        texts = ["one", "two", "bad three", "four", "five", "short six"]
+        embeddings = client.embed(texts)
+        assert embeddings[2] is None and embeddings[5] is None
+        assert [e for i, e in enumerate(embeddings) if i not in (2, 5)] == \
+            [[float(len(texts[i])), 1.0] for i in (0, 1, 3, 4)]
+
+        # Queries are not retried
+        requests.clear()
+        assert client.embed_one("bad query") is None
+        assert requests == [["bad query"]]
+        assert client.embed_one("query") == [5.0, 1.0]
+    finally:
+        if previous is None:
+            del analyzer_module.genai
+        else:
+            analyzer_module.genai = previous
+    print("✅ Batched embedding client works")
+
+def test_vector_index():
+    """Top-k search over the normalized matrix matches a brute-force cosine ranking"""
+    print("Testing vector index...")
+    if np is None:
+        print("Skipping vector index test (numpy is not installed)")
+        return
+    from src.vector_index import VectorIndex
+
+    rng = np.random.default_rng(7)
+    vectors = rng.standard_normal((500, 32))
+    # Scaling a row must not change its cosine similarity
+    vectors[3] *= 1000
+    documents = [f"doc {i}" for i in range(len(vectors))]
+    index = VectorIndex(vectors.tolist(), documents)
+    assert len(index) == 500 and index.dimensions == 32
+    assert index.matrix.dtype == np.float32 and index.matrix.flags['C_CONTIGUOUS']
+    assert np.allclose(np.linalg.norm(index.matrix, axis=1), 1.0, atol=1e-5)
+
+    for _ in range(5):
+        query = rng.standard_normal(32)
+        cosine = vectors @ query / (np.linalg.norm(vectors, axis=1) * np.linalg.norm(query))
+        expected = np.argsort(-cosine)[:10]
+        results = index.search(query * 3, top_k=10)
+        assert [doc for doc, _ in results] == [documents[i] for i in expected]
+        assert np.allclose([score for _, score in results], cosine[expected], atol=1e-5)
+        assert [score for _, score in results] == sorted((score for _, score in results), reverse=True)
+
+    # top_k larger than the index returns everything; zero returns nothing
+    assert len(index.search(query, top_k=1000)) == 500
+    assert index.search(query, top_k=0) == []
+
+    # A pre-normalized matrix is searched without copying it
+    wrapped = VectorIndex.from_normalized(index.matrix, documents)
+    assert wrapped.matrix is index.matrix
+    assert wrapped.search(query, 3) == index.search(query, 3)
+
+    try:
+        index.search([1.0, 2.0], 3)
+        assert False, "a query of the wrong length must be rejected"
+    except ValueError:
+        pass
+    print("✅ Vector index works")
+
+def test_knowledge_base():
+    """Documents are loaded from jsonl and markdown files and searched through the cached matrix"""
+    print("Testing knowledge base...")
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = os.path.join(tmp, "knowledge")
+        os.makedirs(directory)
+        with open(os.path.join(directory, "a_tips.jsonl"), 'w') as f:
+            f.write('{"title": "Sleep", "content": "Keep a regular bedtime."}\n')
+            f.write('\n')
+            f.write('not json\n')
+            f.write('{"content": "  Walk outside every day.  "}\n')
+            f.write('"A plain string document."\n')
+        with open(os.path.join(directory, "b_stress-relief.md"), 'w') as f:
+            f.write("Breathe slowly.\n\n# Breathing\nCount to four.\nHold.\n\n## Empty\n\n## Movement ##\nStretch.\n")
+        with open(os.path.join(directory, "c_note.txt"), 'w') as f:
+            f.write("Drink water.\n")
+        with open(os.path.join(directory, "ignored.csv"), 'w') as f:
+            f.write("title,content\n")
+
+        documents = load_documents(directory)
+        assert documents == [
+            {"title": "Sleep", "content": "Keep a regular bedtime."},
+            {"title": "", "content": "Walk outside every day."},
+            {"title": "", "content": "A plain string document."},
+            {"title": "b stress relief", "content": "Breathe slowly."},
+            {"title": "Breathing", "content": "Count to four.\nHold."},
+            {"title": "Movement", "content": "Stretch."},
+            {"title": "c note", "content": "Drink water."}
+        ]
+        assert load_documents(os.path.join(tmp, "missing")) == []
+
+        knowledge_base = KnowledgeBase(directory, os.path.join(tmp, "cache"))
+        assert len(knowledge_base) == 7
+        if np is None:
+            print("Skipping knowledge base search test (numpy is not installed)")
+            return
+
+        # One-hot embeddings, so each document is its own nearest neighbour
+        calls = []
+        def embed(texts):
+            calls.append(list(texts))
+            return [np.eye(8)[[doc["content"] for doc in documents].index(text)] for text in texts]
+
+        index = knowledge_base.vector_index("models/test-embedding", embed)
+        assert len(calls) == 1 and len(index) == 7
+        assert index.search(np.eye(8)[4], 1)[0][0] == documents[4]
+
+        # Other processes map the cached matrix instead of embedding again
+        calls.clear()
+        shared = KnowledgeBase(directory, os.path.join(tmp, "cache")).vector_index("models/test-embedding", embed)
+        assert calls == []
+        assert isinstance(shared.matrix, np.memmap)
+        assert shared.search(np.eye(8)[1], 1)[0][0] == documents[1]
+
+        # Documents that could not be embedded are left out of the index
+        partial = KnowledgeBase(directory, os.path.join(tmp, "partial")).vector_index(
+            "models/test-embedding", lambda texts: [None if "water" in text else embed([text])[0] for text in texts])
+        assert len(partial) == 6
+        assert documents[6] not in partial.documents
+    print("✅ Knowledge base works")
+
+def test_local_embeddings():
+    """The local model is fitted once per set of documents, and retrieval works without an API key"""
+    print("Testing local embeddings...")
+    try:
+        from src.local_embeddings import LOCAL_MODEL_PREFIX, LocalEmbeddingClient
+    except ImportError:
+        print("Skipping local embeddings test (numpy or scikit-learn is not installed)")
+        return
+    texts = [
+        "Keep a regular bedtime and avoid screens before sleep.",
+        "A short walk outside lifts your mood.",
+        "Write down three things you are grateful for.",
+        "Slow breathing calms stress and anxiety.",
+        "Drink water and eat regular meals."
+    ]
+    with tempfile.TemporaryDirectory() as tmp:
+        client = LocalEmbeddingClient.load_or_fit(texts, tmp)
+        assert client.model.startswith(f"{LOCAL_MODEL_PREFIX}-")
+        assert os.listdir(tmp) == [f"{client.model}.pkl"]
+
+        # The saved model is loaded instead of refitted, and embeds alike
+        loaded = LocalEmbeddingClient.load_or_fit(texts, tmp)
+        assert loaded.model == client.model
+        assert np.allclose(np.array(loaded.embed(texts)), np.array(client.embed(texts)))
+        assert np.allclose(loaded.embed_one(texts[0]), client.embed([texts[0]])[0])
+
+        # Editing the documents refits under a new name and removes the old model
+        refitted = LocalEmbeddingClient.load_or_fit(texts + ["Call a friend."], tmp)
+        assert refitted.model != client.model
+        assert os.listdir(tmp) == [f"{refitted.model}.pkl"]
+
+        # With the local provider, the analyzer retrieves context without an API key
+        directory = os.path.join(tmp, "knowledge")
+        os.makedirs(directory)
+        with open(os.path.join(directory, "tips.jsonl"), 'w') as f:
+            for i, text in enumerate(texts):
+                f.write(f'{{"title": "Tip {i}", "content": "{text}"}}\n')
+        previous = analyzer_module.shared_knowledge_base
+        analyzer_module.shared_knowledge_base = lambda: KnowledgeBase(directory, os.path.join(tmp, "cache"))
+        try:
+            analyzer = analyzer_module.Analyzer(api_key="", embedding_provider="local")
+            assert analyzer.client is None
+            assert analyzer.rag_index is not None
+            context = analyzer.get_top_context("I cannot sleep at night", top_k=1)
+            assert texts[0] in context
+        finally:
+            analyzer_module.shared_knowledge_base = previous
+    print("✅ Local embeddings work")
+
+if __name__ == "__main__":
+    test_embedding_cache()
+    test_embedding_client()
+    test_vector_index()
+    test_knowledge_base()
+    test_local_embeddings()
+    print("✅ All retrieval tests passed!")